@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'ECOSIRE Fleet API',
-    'version': '18.0.2.2.0',
+    'version': '18.0.2.10.0',
     'category': 'Fleet',
     'summary': 'ECOSIRE Fleet Management API Integration',
     'description': """
@@ -20,6 +20,7 @@
     'website': 'https://ecosire.com',
     'depends': [
         'base',
+        'mail',
         'fleet',
         'contacts',
         'hr',
@@ -28,6 +29,9 @@
         'sale',
         'account',     
     ],
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
     'data': [
         # Security files
         'security/ir.model.access.csv',
@@ -43,10 +47,16 @@
         'views/menu_views.xml',
         'views/hr_contract_views.xml',
         'views/hr_employee_views.xml',
+        'views/invoice_upload_job_views.xml',
+        'views/fleet_order_report_views.xml',
+        'views/fleet_order_archive_views.xml',
+        'views/fleet_tariff_views.xml',
         
         # Data files
         'data/partner_data.xml',
         'data/ir_sequence.xml',
+        'data/mail_activity_type.xml',
+        'data/ir_cron.xml',
     ],
     'demo': [
         # Demo data will be added here
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Create and fill ``status_changed_at`` before the ORM adds the column.
+
+    There is no status history yet, so orders fall back to their last write
+    instead of being stamped with the upgrade time.
+    """
+    if not version:
+        return
+    cr.execute("ALTER TABLE ecosire_fleet_order ADD COLUMN IF NOT EXISTS status_changed_at timestamp")
+    cr.execute(
+        """
+        UPDATE ecosire_fleet_order
+           SET status_changed_at = COALESCE(write_date, create_date)
+         WHERE status_changed_at IS NULL
+        """
+    )
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Backfill the location geohashes of existing orders in chunks."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["ecosire.fleet.order"]._backfill_geohashes()
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Create the location geohash columns up front.
+
+    When the columns already exist the ORM does not schedule a recompute of
+    every order at upgrade; the post-migration fills them in chunks instead.
+    """
+    if not version:
+        return
+    cr.execute(
+        """
+        ALTER TABLE ecosire_fleet_order
+            ADD COLUMN IF NOT EXISTS pickup_geohash varchar,
+            ADD COLUMN IF NOT EXISTS drop_off_geohash varchar,
+            ADD COLUMN IF NOT EXISTS empty_dropoff_geohash varchar,
+            ADD COLUMN IF NOT EXISTS yard_dropoff_geohash varchar
+        """
+    )
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Create the trip distance columns up front.
+
+    When the columns already exist the ORM does not schedule a recompute of
+    every order at upgrade; the post-migration fills them in chunks instead.
+    """
+    if not version:
+        return
+    cr.execute(
+        """
+        ALTER TABLE ecosire_fleet_order
+            ADD COLUMN IF NOT EXISTS trip_distance_km numeric,
+            ADD COLUMN IF NOT EXISTS return_distance_km numeric
+        """
+    )
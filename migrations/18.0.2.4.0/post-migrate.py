@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Initialize the status counters from the existing orders."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["ecosire.fleet.order.status.count"]._rebuild()
+    env["ecosire.fleet.order.status.day.count"]._rebuild()
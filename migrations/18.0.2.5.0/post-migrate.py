@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Build the fleet order analysis from the existing orders."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["ecosire.fleet.order.report"]._rebuild()
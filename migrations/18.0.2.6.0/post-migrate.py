@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import logging
+
+from odoo import SUPERUSER_ID, api, tools
+from odoo.tools.sql import column_exists
+
+from odoo.addons.ecosire_fleet_api.models.fleet_order import PROOF_PAYLOAD_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+
+
+def migrate(cr, version):
+    """Move the proof payloads stored on the order rows into attachments.
+
+    Orders are processed in id-ordered chunks so memory stays bounded; the
+    attachments and signature thumbnails of a chunk are created in one batch.
+    The emptied columns are dropped at the end.
+    """
+    if not version:
+        return
+    columns = [name for name in PROOF_PAYLOAD_FIELDS if column_exists(cr, "ecosire_fleet_order", name)]
+    if not columns:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Order = env["ecosire.fleet.order"]
+    thumbnails = Order._ecosire_get_signature_thumbnails_enabled()
+    last_id = 0
+    total = 0
+    while True:
+        cr.execute(
+            f"""
+            SELECT id, {", ".join(columns)}
+              FROM ecosire_fleet_order
+             WHERE id > %s AND ({" OR ".join(f"{name} IS NOT NULL" for name in columns)})
+          ORDER BY id
+             LIMIT %s
+            """,
+            (last_id, CHUNK_SIZE),
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+        attachment_vals = []
+        for order_id, *values in rows:
+            for name, value in zip(columns, values):
+                raw = Order._encode_proof_payload(name, value)
+                if raw:
+                    attachment_vals.append({
+                        "name": PROOF_PAYLOAD_FIELDS[name],
+                        "res_model": Order._name,
+                        "res_field": PROOF_PAYLOAD_FIELDS[name],
+                        "res_id": order_id,
+                        "raw": raw,
+                    })
+            if thumbnails and "proof_of_delivery_sign" in columns:
+                image = Order._get_signature_image(values[columns.index("proof_of_delivery_sign")])
+                if image:
+                    attachment_vals.append({
+                        "name": "proof_of_delivery_sign_thumbnail",
+                        "res_model": Order._name,
+                        "res_field": "proof_of_delivery_sign_thumbnail",
+                        "res_id": order_id,
+                        "raw": tools.image_process(base64.b64decode(image), size=(256, 256)),
+                    })
+        env["ir.attachment"].create(attachment_vals)
+        ids = [row[0] for row in rows]
+        cr.execute(
+            f"UPDATE ecosire_fleet_order SET {', '.join(f'{name} = NULL' for name in columns)} WHERE id = ANY(%s)",
+            (ids,),
+        )
+        env.flush_all()
+        env.invalidate_all()
+        last_id = ids[-1]
+        total += len(ids)
+        _logger.info("Moved the proof payloads of %s fleet orders to attachments.", total)
+    for name in columns:
+        cr.execute(f"ALTER TABLE ecosire_fleet_order DROP COLUMN {name}")
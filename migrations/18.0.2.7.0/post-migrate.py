@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Convert the ``items`` of existing orders into order lines and fill the item totals."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["ecosire.fleet.order"]._backfill_item_lines()
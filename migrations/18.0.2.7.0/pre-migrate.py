@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Create the item total columns up front.
+
+    When the columns already exist the ORM does not schedule a recompute of
+    every order at upgrade; the post-migration fills them in chunks instead.
+    """
+    if not version:
+        return
+    cr.execute(
+        """
+        ALTER TABLE ecosire_fleet_order
+            ADD COLUMN IF NOT EXISTS total_weight double precision,
+            ADD COLUMN IF NOT EXISTS total_quantity double precision
+        """
+    )
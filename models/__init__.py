@@ -3,6 +3,16 @@
 from . import res_partner
 from . import fleet_vehicle
 from . import fleet_order
+from . import fleet_order_event
+from . import fleet_order_status_count
+from . import fleet_order_report
+from . import fleet_order_archive
+from . import fleet_order_container_return
+from . import fleet_dispatch
+from . import fleet_route
+from . import fleet_trip_submission
+from . import fleet_tariff
 from . import hr_contract
 from . import sale_inherit
 from . import account_move_inherit
+from . import invoice_upload_job
@@ -1,15 +1,107 @@
 # -*- coding: utf-8 -*-
 
+import base64
+import hashlib
+import json
 import logging
-
-import requests
+import os
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 from odoo import fields, models
+from odoo.tools import split_every
+
+from ..tools.http_session import get_http_session
 
 
 _logger = logging.getLogger(__name__)
 
 
+def _quote_multipart_param(value):
+    """Escape a ``name``/``filename`` parameter of a multipart part header.
+
+    Follows RFC 7578 (section 4.2) as browsers implement it: the quote, CR and
+    LF characters are percent-encoded so they cannot end the parameter or the
+    header line.
+    """
+    return str(value).replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class _MultipartFileBody:
+    """Iterable multipart/form-data body that streams its file part in chunks.
+
+    The file is read from ``file_path`` (the attachment in the filestore) while
+    the request is being sent, so memory use does not depend on the file size.
+    ``file_content`` is used instead for attachments stored in the database.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, data, file_name, content_type, file_path=None, file_content=None):
+        self.boundary = uuid.uuid4().hex
+        self.file_path = file_path
+        self.file_content = file_content
+        head = [
+            f'--{self.boundary}\r\nContent-Disposition: form-data; '
+            f'name="{_quote_multipart_param(name)}"\r\n\r\n{value}\r\n'
+            for name, value in data.items()
+        ]
+        head.append(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; '
+            f'name="file"; filename="{_quote_multipart_param(file_name)}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        self.head = "".join(head).encode()
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self.file_size = os.path.getsize(file_path) if file_path else len(file_content)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self.head) + self.file_size + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        if self.file_path:
+            with open(self.file_path, "rb") as file:
+                while chunk := file.read(self.chunk_size):
+                    yield chunk
+        else:
+            view = memoryview(self.file_content)
+            for start in range(0, len(view), self.chunk_size):
+                yield view[start:start + self.chunk_size]
+        yield self.tail
+
+
+def _gzip_chunks(chunks):
+    """Gzip-compress an iterable of byte chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _post_upload(session, upload):
+    """Send one prepared upload; runs in a worker thread and must not touch the ORM.
+
+    The body is streamed with a ``Content-Length``; with ``gzip`` enabled it is
+    compressed on the fly and sent with chunked transfer encoding instead.
+    """
+    body = _MultipartFileBody(upload["data"], **upload["file"])
+    headers = {"Content-Type": body.content_type}
+    if upload.get("gzip"):
+        headers["Content-Encoding"] = "gzip"
+        body = _gzip_chunks(body)
+    response = session.post(upload["url"], data=body, headers=headers, timeout=20)
+    response.raise_for_status()
+    return response
+
+
 class AccountMove(models.Model):
     _inherit = "account.move"
 
@@ -19,6 +111,20 @@ class AccountMove(models.Model):
         help="External order identifier coming from the Fleet Management or Sales system.",
     )
 
+    ecosire_upload_job_id = fields.Many2one(
+        "ecosire.invoice.upload.job",
+        string="PDF Upload Job",
+        copy=False,
+        readonly=True,
+        help="Latest job uploading this invoice's PDF to the external API.",
+    )
+    ecosire_upload_state = fields.Selection(
+        related="ecosire_upload_job_id.state", string="PDF Upload Status"
+    )
+    ecosire_upload_error = fields.Text(
+        related="ecosire_upload_job_id.last_error", string="PDF Upload Error"
+    )
+
     # -------------------------------------------------------------------------
     # Helpers
     # -------------------------------------------------------------------------
@@ -51,12 +157,272 @@ class AccountMove(models.Model):
         )
         return pdf_content
 
-    def _ecosire_upload_invoice_pdf(self):
-        """Upload this invoice's PDF to the external API.
+    def _ecosire_get_render_batch_size(self):
+        """Return how many invoices are rendered per report call, configurable via system parameter.
+
+        System parameter: ``ecosire_fleet_api.upload_render_batch_size``, default ``50``.
+        """
+        batch_size = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("ecosire_fleet_api.upload_render_batch_size", default=50)
+        )
+        return max(int(batch_size), 1)
+
+    def _ecosire_render_invoice_pdfs(self):
+        """Render the PDFs of these customer invoices with as few report calls as possible.
+
+        Each chunk of invoices goes through a single wkhtmltopdf run; the report
+        engine splits the result back into one stream per invoice (and reuses the
+        stored invoice attachment when there is one). Invoices the engine could not
+        split are rendered individually.
+
+        Returns a dict mapping each move id to its PDF bytes, or to the exception
+        raised while rendering it.
+        """
+        results = {}
+        invoices = self.filtered(lambda move: move.move_type == "out_invoice")
+        for move in self - invoices:
+            results[move.id] = ValueError(f"Move {move.name} is not a customer invoice.")
+
+        report_service = self.env["ir.actions.report"]
+        # Same data as account's ``_render_qweb_pdf`` override, whose entry-move guard
+        # is covered by only rendering customer invoices here.
+        data = {}
+        if self.env["ir.config_parameter"].sudo().get_param("account.display_name_in_footer"):
+            data["display_name_in_footer"] = True
+        for chunk in split_every(self._ecosire_get_render_batch_size(), invoices.ids, self.browse):
+            try:
+                streams = report_service._render_qweb_pdf_prepare_streams(
+                    "account.account_invoices", dict(data), res_ids=chunk.ids
+                )
+            except Exception:
+                _logger.exception(
+                    "Batch rendering of %s invoices failed; rendering them one by one.", len(chunk)
+                )
+                streams = {}
+            for move in chunk:
+                stream = streams.get(move.id, {}).get("stream")
+                if stream:
+                    results[move.id] = stream.getvalue()
+                    continue
+                try:
+                    results[move.id] = move._ecosire_render_invoice_pdf()
+                except Exception as error:
+                    results[move.id] = error
+            for stream_data in streams.values():
+                if stream_data.get("stream"):
+                    stream_data["stream"].close()
+        return results
+
+    def _ecosire_get_pdf_hash_values(self):
+        """Return the invoice values that affect the rendered PDF."""
+        self.ensure_one()
+        partner = self.partner_id
+        return {
+            "name": self.name,
+            "external_order_id": self.external_order_id,
+            "partner": [partner.id, partner.display_name, partner.vat, partner.contact_address],
+            "invoice_date": self.invoice_date,
+            "invoice_date_due": self.invoice_date_due,
+            "payment_reference": self.payment_reference,
+            "narration": self.narration,
+            "currency": self.currency_id.name,
+            "amount_untaxed": self.amount_untaxed,
+            "amount_tax": self.amount_tax,
+            "amount_total": self.amount_total,
+            # The report shows the payment status and the amount due.
+            "payment_state": self.payment_state,
+            "amount_residual": self.amount_residual,
+            "lines": [
+                [
+                    line.display_type,
+                    line.name,
+                    line.product_id.id,
+                    line.quantity,
+                    line.price_unit,
+                    line.discount,
+                    line.tax_ids.ids,
+                    line.price_subtotal,
+                ]
+                for line in self.invoice_line_ids
+            ],
+        }
+
+    def _ecosire_compute_pdf_hash(self):
+        """Return a SHA-256 hash of the invoice values that affect the rendered PDF."""
+        self.ensure_one()
+        payload = json.dumps(self._ecosire_get_pdf_hash_values(), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _ecosire_get_invoice_pdf_attachments(self, pdf_hashes):
+        """Return the PDF of each invoice, rendering only the ones not stored yet.
+
+        Rendered PDFs are stored with their hash on the invoice's upload job,
+        never on the posted invoice, so the invoice row is not locked while the
+        uploads run. A PDF stored on any job of the invoice is reused as long as
+        its hash matches ``pdf_hashes[move.id]``; the other invoices are
+        rendered in batch.
+
+        Returns a dict mapping each move id to its ``ir.attachment`` (to the PDF
+        bytes for invoices without an upload job), or to the exception raised
+        while rendering it.
+        """
+        Job = self.env["ecosire.invoice.upload.job"].sudo()
+        results = {}
+        jobs = Job.search(
+            [("move_id", "in", self.ids), ("pdf_file_hash", "in", list(set(pdf_hashes.values())))],
+            order="id desc",
+        )
+        stored = {}
+        for job in jobs:
+            if job.pdf_file_hash == pdf_hashes[job.move_id.id]:
+                stored.setdefault(job.id, job.move_id.id)
+        for attachment in Job.browse(list(stored))._get_pdf_attachments():
+            results.setdefault(stored[attachment.res_id], attachment)
+        stale = self.filtered(lambda move: move.id not in results)
+        if not stale:
+            return results
+
+        rendered = {}
+        for move_id, pdf_content in stale._ecosire_render_invoice_pdfs().items():
+            job = self.browse(move_id).ecosire_upload_job_id.sudo()
+            if isinstance(pdf_content, Exception) or not job:
+                results[move_id] = pdf_content
+                continue
+            job.write({
+                "pdf_file": base64.b64encode(pdf_content),
+                "pdf_file_hash": pdf_hashes[move_id],
+            })
+            rendered[job.id] = move_id
+        for attachment in Job.browse(list(rendered))._get_pdf_attachments():
+            results[rendered[attachment.res_id]] = attachment
+        return results
+
+    def _ecosire_should_upload(self):
+        """Return whether this move's PDF must be sent to the external API."""
+        self.ensure_one()
+        return self.move_type == "out_invoice" and bool(self.external_order_id)
+
+    def _ecosire_get_upload_concurrency(self):
+        """Return how many uploads may run in parallel, configurable via system parameter.
+
+        System parameter: ``ecosire_fleet_api.upload_concurrency``, default ``4``.
+        """
+        concurrency = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("ecosire_fleet_api.upload_concurrency", default=4)
+        )
+        return max(int(concurrency), 1)
+
+    def _ecosire_get_upload_gzip(self):
+        """Return whether uploads are gzip-compressed, configurable via system parameter.
+
+        Only enable it when the endpoint accepts ``Content-Encoding: gzip`` request bodies.
+
+        System parameter: ``ecosire_fleet_api.upload_gzip``, default ``False``.
+        """
+        value = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("ecosire_fleet_api.upload_gzip", default="False")
+        )
+        return str(value).lower() in ("1", "true", "yes")
+
+    def _ecosire_prepare_upload(self, attachment, use_gzip=False):
+        """Return the multipart request sending the PDF ``attachment`` (or PDF bytes) for this invoice.
 
         Sends multipart/form-data with:
         - order_id: invoice.external_order_id
-        - file: invoice PDF
+        - file: invoice PDF, streamed from the filestore when stored there
+        """
+        self.ensure_one()
+        file_vals = {
+            "file_name": f"invoice_{self.name or self.id}.pdf",
+            "content_type": "application/pdf",
+        }
+        if isinstance(attachment, bytes):
+            file_vals["file_content"] = attachment
+        elif attachment.store_fname:
+            file_vals["file_path"] = attachment._full_path(attachment.store_fname)
+        else:
+            file_vals["file_content"] = attachment.raw
+        return {
+            "url": self._ecosire_get_upload_endpoint(),
+            "data": {
+                "order_id": self.external_order_id,
+            },
+            "file": file_vals,
+            "gzip": use_gzip,
+        }
+
+    def _ecosire_upload_invoice_pdfs(self):
+        """Upload the PDFs of these invoices to the external API.
+
+        Invoices whose current PDF hash was already acknowledged by the remote
+        service for their ``external_order_id`` are skipped. The others reuse their
+        stored PDF when it is still up to date and are otherwise rendered in batched
+        report calls in the current thread; the HTTP requests are sent in parallel
+        over the worker's pooled session, bounded by the configured upload
+        concurrency.
+
+        Returns a dict mapping each move id to its response on success, ``None``
+        when the upload was skipped, or to the exception raised while rendering or
+        uploading it.
+        """
+        results = {}
+        pdf_hashes = {move.id: move._ecosire_compute_pdf_hash() for move in self}
+        acknowledged = self.env["ecosire.invoice.upload.job"]._get_acknowledged_hashes(
+            [(move.external_order_id, pdf_hashes[move.id]) for move in self]
+        )
+        to_upload = self.browse()
+        for move in self:
+            if (move.external_order_id, pdf_hashes[move.id]) in acknowledged:
+                _logger.info(
+                    "Skip upload of invoice %s: this PDF was already acknowledged.", move.name
+                )
+                results[move.id] = None
+            else:
+                to_upload |= move
+
+        uploads = {}
+        use_gzip = self._ecosire_get_upload_gzip()
+        for move_id, attachment in to_upload._ecosire_get_invoice_pdf_attachments(pdf_hashes).items():
+            if isinstance(attachment, Exception):
+                results[move_id] = attachment
+            else:
+                uploads[move_id] = self.browse(move_id)._ecosire_prepare_upload(attachment, use_gzip)
+        if not uploads:
+            return results
+
+        pool_size = self._ecosire_get_upload_concurrency()
+        session = get_http_session(pool_size)
+
+        def send(move_id):
+            try:
+                return move_id, _post_upload(session, uploads[move_id])
+            except Exception as error:
+                return move_id, error
+
+        with ThreadPoolExecutor(max_workers=min(pool_size, len(uploads))) as executor:
+            results.update(executor.map(send, list(uploads)))
+
+        for move in self.browse(uploads).filtered(lambda m: not isinstance(results[m.id], Exception)):
+            _logger.info(
+                "Successfully uploaded invoice PDF for %s (status %s).",
+                move.name,
+                results[move.id].status_code,
+            )
+        return results
+
+    def _ecosire_upload_invoice_pdf(self):
+        """Upload this invoice's PDF to the external API.
+
+        Invoices that are not customer invoices or have no ``external_order_id``
+        are skipped. Rendering, transport and HTTP errors are logged, never
+        raised, so callers are not blocked by the external service; the upload
+        jobs use ``_ecosire_upload_invoice_pdfs`` to get the errors back.
         """
         self.ensure_one()
 
@@ -75,64 +441,28 @@ class AccountMove(models.Model):
             )
             return
 
-        try:
-            pdf_content = self._ecosire_render_invoice_pdf()
-        except Exception:
-            _logger.exception(
-                "Failed to render PDF for invoice %s; skipping external upload.",
+        result = self._ecosire_upload_invoice_pdfs()[self.id]
+        if isinstance(result, Exception):
+            _logger.error(
+                "Error while uploading invoice PDF for %s to external service: %s",
                 self.name,
-            )
-            return
-
-        url = self._ecosire_get_upload_endpoint()
-
-        data = {
-            "order_id": self.external_order_id,
-        }
-        files = {
-            "file": (
-                f"invoice_{self.name or self.id}.pdf",
-                pdf_content,
-                "application/pdf",
-            )
-        }
-
-        try:
-            response = requests.post(url, data=data, files=files, timeout=20)
-            if response.ok:
-                _logger.info(
-                    "Successfully uploaded invoice PDF for %s to %s (status %s).",
-                    self.name,
-                    url,
-                    response.status_code,
-                )
-            else:
-                _logger.warning(
-                    "Upload of invoice PDF for %s to %s failed with status %s: %s",
-                    self.name,
-                    url,
-                    response.status_code,
-                    response.text,
-                )
-        except Exception:
-            # Do not block posting; just log the error.
-            _logger.exception(
-                "Error while uploading invoice PDF for %s to external service at %s.",
-                self.name,
-                url,
+                result,
             )
 
     # -------------------------------------------------------------------------
     # Overrides
     # -------------------------------------------------------------------------
     def action_post(self):
-        """After posting, upload PDFs for relevant invoices to the external API."""
+        """After posting, queue PDF uploads for relevant invoices to the external API.
+
+        The upload itself runs in the ``Invoice PDF Upload`` cron so posting does not
+        wait on the external service.
+        """
         res = super().action_post()
 
-        for move in self:
-            # Only attempt upload for customer invoices with external_order_id set.
-            if move.move_type == "out_invoice" and move.external_order_id:
-                move._ecosire_upload_invoice_pdf()
+        # Only queue uploads for customer invoices with external_order_id set.
+        self.env["ecosire.invoice.upload.job"]._enqueue(
+            self.filtered(lambda move: move._ecosire_should_upload())
+        )
 
         return res
-
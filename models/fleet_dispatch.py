@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+import numpy as np
+
+from odoo import _, api, models
+
+from ..tools import geo
+from ..tools.assignment import INFEASIBLE, solve_assignment
+
+
+_logger = logging.getLogger(__name__)
+
+# Vehicle categories able to carry each cargo type; vehicles without a category are not restricted.
+CARGO_VEHICLE_CATEGORIES = {
+    "container": {"truck"},
+    "bulk": {"truck", "dyna", "pickup", "van"},
+}
+# License classes allowed to drive heavy loads (containers or loads above HEAVY_LOAD_KG).
+HEAVY_LICENSE_CLASSES = {"class_a", "commercial"}
+HEAVY_LOAD_KG = 3500.0
+# Distance charged for vehicles whose position is unknown.
+UNKNOWN_POSITION_KM = 500.0
+# Statuses in which an order keeps its vehicle and driver busy.
+BUSY_STATUSES = (
+    "dispatched", "started", "enroute", "drop_off_complete", "yard_drop_off", "yard_pick_up",
+)
+
+
+class EcosireFleetDispatcher(models.AbstractModel):
+    """Assigns drivers and vehicles to created fleet orders.
+
+    A cost matrix of pickup distances (with incompatible cargo, capacity and
+    license combinations marked infeasible) is built between the orders and the
+    available vehicles, solved as a minimum-cost assignment, and written back in
+    one batch.
+    """
+
+    _name = "ecosire.fleet.dispatcher"
+    _description = "ECOSIRE Fleet Dispatcher"
+
+    @api.model
+    def _get_available_vehicles(self, company):
+        """Return ``(vehicle, employee)`` pairs free to take a new order.
+
+        Each employee appears at most once: a driver of several free vehicles
+        is offered with one of them, preferring a vehicle with a known position.
+        """
+        vehicles = self.env["fleet.vehicle"].search([
+            ("driver_id", "!=", False),
+            ("company_id", "in", [company.id, False]),
+        ])
+        busy = self.env["ecosire.fleet.order"].search([
+            ("status", "in", BUSY_STATUSES),
+            ("vehicle_id", "in", vehicles.ids),
+        ]).vehicle_id
+        vehicles -= busy
+        employees = self.env["hr.employee"].search([
+            ("work_contact_id", "in", vehicles.driver_id.ids),
+            ("company_id", "in", [company.id, False]),
+        ])
+        employee_by_partner = {employee.work_contact_id.id: employee for employee in employees}
+        busy_employees = self.env["ecosire.fleet.order"].search([
+            ("status", "in", BUSY_STATUSES),
+            ("driver_id", "in", employees.ids),
+        ]).driver_id
+        units = {}
+        located_first = vehicles.sorted(
+            lambda vehicle: (not (vehicle.current_location_lat or vehicle.current_location_lng), vehicle.id)
+        )
+        for vehicle in located_first:
+            employee = employee_by_partner.get(vehicle.driver_id.id)
+            if employee and employee not in busy_employees:
+                units.setdefault(employee, (vehicle, employee))
+        return list(units.values())
+
+    @api.model
+    def _build_cost_matrix(self, orders, units):
+        """Return the ``len(orders) x len(units)`` dispatch cost matrix in kilometres."""
+        order_lat = np.array(orders.mapped("pickup_location_lat"), dtype=float)
+        order_lng = np.array(orders.mapped("pickup_location_lng"), dtype=float)
+        order_weight = np.array(
+            [order.container_weight or order.bulk_weight for order in orders], dtype=float
+        )
+        order_heavy = np.array(
+            [order.cargo_type == "container" for order in orders], dtype=bool
+        ) | (order_weight > HEAVY_LOAD_KG)
+
+        unit_lat = np.array([
+            vehicle.current_location_lat or vehicle.driver_id.partner_latitude for vehicle, _employee in units
+        ], dtype=float)
+        unit_lng = np.array([
+            vehicle.current_location_lng or vehicle.driver_id.partner_longitude for vehicle, _employee in units
+        ], dtype=float)
+        unit_capacity = np.array([vehicle.payload_capacity or np.inf for vehicle, _employee in units])
+        unit_heavy_license = np.array([
+            vehicle.driver_id.driver_license_class in HEAVY_LICENSE_CLASSES for vehicle, _employee in units
+        ], dtype=bool)
+
+        cost = geo.haversine_km_array(
+            order_lat[:, None], order_lng[:, None], unit_lat[None, :], unit_lng[None, :]
+        )
+        order_located = (order_lat != 0) | (order_lng != 0)
+        unit_located = (unit_lat != 0) | (unit_lng != 0)
+        cost = np.where(order_located[:, None], cost, 0.0)
+        cost = np.where(unit_located[None, :], cost, UNKNOWN_POSITION_KM)
+
+        feasible = order_weight[:, None] <= unit_capacity[None, :]
+        feasible &= ~order_heavy[:, None] | unit_heavy_license[None, :]
+        for cargo_type, categories in CARGO_VEHICLE_CATEGORIES.items():
+            is_cargo = np.array([order.cargo_type == cargo_type for order in orders], dtype=bool)
+            fits = np.array([
+                not vehicle.vehicle_category or vehicle.vehicle_category in categories
+                for vehicle, _employee in units
+            ], dtype=bool)
+            feasible &= ~is_cargo[:, None] | fits[None, :]
+        return np.where(feasible, cost, INFEASIBLE)
+
+    @api.model
+    def dispatch(self, orders):
+        """Assign a vehicle and driver to the created, unassigned ``orders`` and dispatch them.
+
+        Returns the orders that were dispatched.
+        """
+        orders = orders.filtered(
+            lambda order: order.status == "created" and not order.vehicle_id and not order.driver_id
+        )
+        dispatched = orders.browse()
+        for company in orders.company_id:
+            company_orders = orders.filtered(lambda order: order.company_id == company)
+            units = self._get_available_vehicles(company)
+            if not units:
+                continue
+            start = time.perf_counter()
+            cost = self._build_cost_matrix(company_orders, units)
+            pairs = solve_assignment(cost)
+            _logger.info(
+                "Dispatch of %s orders over %s vehicles solved in %.3fs (%s assigned).",
+                len(company_orders), len(units), time.perf_counter() - start, len(pairs),
+            )
+            for order_index, unit_index in pairs:
+                vehicle, employee = units[unit_index]
+                order = company_orders[order_index]
+                order.write({"vehicle_id": vehicle.id, "driver_id": employee.id})
+                dispatched |= order
+        # One status write runs the status hooks (events, counters, report) once for all orders.
+        dispatched.write({"status": "dispatched"})
+        return dispatched
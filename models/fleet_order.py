@@ -1,12 +1,81 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models
+import base64
+import json
+import logging
+import threading
+from datetime import datetime
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError
+from odoo.tools import SQL, escape_psql, groupby, split_every
+
+from ..tools import geo
+
+
+_logger = logging.getLogger(__name__)
+
+# Allowed status changes: current status -> statuses it may move to.
+STATUS_TRANSITIONS = {
+    "created": {"dispatched", "canceled"},
+    "dispatched": {"created", "started", "canceled"},
+    "started": {"enroute", "canceled"},
+    "enroute": {"drop_off_complete", "yard_drop_off", "canceled"},
+    "drop_off_complete": {"completed", "empty_container_return"},
+    "completed": {"empty_container_return"},
+    "empty_container_return": set(),
+    "yard_drop_off": {"yard_drop_off_complete", "canceled"},
+    "yard_drop_off_complete": {"yard_pick_up", "completed"},
+    "yard_pick_up": {"enroute", "canceled"},
+    "canceled": set(),
+}
+
+# Location kinds of a fleet order: kind -> (latitude field, longitude field, geohash field).
+LOCATION_FIELDS = {
+    "pickup": ("pickup_location_lat", "pickup_location_lng", "pickup_geohash"),
+    "drop_off": ("drop_off_location_lat", "drop_off_location_lng", "drop_off_geohash"),
+    "empty_dropoff": ("empty_dropoff_location_lat", "empty_dropoff_location_lng", "empty_dropoff_geohash"),
+    "yard_dropoff": ("yard_dropoff_location_lat", "yard_dropoff_location_lng", "yard_dropoff_geohash"),
+}
+GEOHASH_PRECISION = 9
+
+# Identifier and address fields covered by the trigram quick search.
+QUICK_SEARCH_FIELDS = (
+    "container_number", "bill_of_lading_number", "bayan_number", "external_order_id",
+    "pickup_location_address", "drop_off_location_address",
+)
+QUICK_SEARCH_MAX_LIMIT = 100
+
+# Order line field -> keys accepted for it in the ``items`` payload.
+ITEM_LINE_KEYS = {
+    "unit": ("unit",),
+    "quantity": ("quantity", "qty"),
+    "price": ("price",),
+    "good_type": ("good_type", "goodType"),
+    "weight": ("weight",),
+}
+
+# Proof payload fields -> binary field holding the payload as an attachment.
+PROOF_PAYLOAD_FIELDS = {
+    "proof_of_delivery": "proof_of_delivery_file",
+    "proof_of_delivery_sign": "proof_of_delivery_sign_file",
+    "proof_empty_container_return": "proof_empty_container_return_file",
+}
+
+COMPOSITE_INDEXES = {
+    "create_date": ["create_date DESC", "id DESC"],
+    "company_status_create_date": ["company_id", "status", "create_date DESC", "id DESC"],
+    "customer_create_date": ["customer_id", "create_date DESC", "id DESC"],
+    "vehicle_status": ["vehicle_id", "status"],
+    "status_changed_at": ["status", "status_changed_at"],
+    "status_container_return": ["status", "last_date_container_return"],
+}
 
 
 class EcosireFleetOrder(models.Model):
     _name = "ecosire.fleet.order"
     _description = "ECOSIRE Fleet Order"
-    _order = "create_date desc"
+    _order = "create_date desc, id desc"
     _rec_name = "order_no"
 
     company_id = fields.Many2one(
@@ -53,20 +122,20 @@ class EcosireFleetOrder(models.Model):
     )
 
     cargo_size = fields.Char()
-    container_number = fields.Char()
+    container_number = fields.Char(index="trigram")
     container_weight = fields.Float()
     bulk_weight = fields.Float()
 
     # ---- Pickup Location ----
     pickup_location_lat = fields.Float("Pickup Latitude")
     pickup_location_lng = fields.Float("Pickup Longitude")
-    pickup_location_address = fields.Char("Pickup Address")
+    pickup_location_address = fields.Char("Pickup Address", index="trigram")
     pickup_location_city_new = fields.Char("Pickup City")
 
     # ---- Drop-off Location ----
     drop_off_location_lat = fields.Float("Drop-off Latitude")
     drop_off_location_lng = fields.Float("Drop-off Longitude")
-    drop_off_location_address = fields.Char("Drop-off Address")
+    drop_off_location_address = fields.Char("Drop-off Address", index="trigram")
     drop_off_location_city_new = fields.Char("Drop-off City")
 
     # ---- Empty Dropoff Location ----
@@ -83,10 +152,62 @@ class EcosireFleetOrder(models.Model):
     yard_dropoff_location_address = fields.Char("Yard Dropoff Address")
     yard_dropoff_location_city_new = fields.Char("Yard Dropoff City")
 
+    # ---- Geohash cells (prefix-indexed for proximity search) ----
+    pickup_geohash = fields.Char(
+        "Pickup Geohash", compute="_compute_geohashes", store=True, readonly=True
+    )
+    drop_off_geohash = fields.Char(
+        "Drop-off Geohash", compute="_compute_geohashes", store=True, readonly=True
+    )
+    empty_dropoff_geohash = fields.Char(
+        "Empty Dropoff Geohash", compute="_compute_geohashes", store=True, readonly=True
+    )
+    yard_dropoff_geohash = fields.Char(
+        "Yard Dropoff Geohash", compute="_compute_geohashes", store=True, readonly=True
+    )
+
+    # ---- Trip distances (great-circle, km) ----
+    trip_distance_km = fields.Float(
+        "Trip Distance (km)",
+        compute="_compute_trip_distances",
+        store=True,
+        readonly=True,
+        digits=(16, 3),
+        help="Great-circle distance from the pickup to the drop-off location.",
+    )
+    return_distance_km = fields.Float(
+        "Empty Return Distance (km)",
+        compute="_compute_trip_distances",
+        store=True,
+        readonly=True,
+        digits=(16, 3),
+        help="Great-circle distance from the drop-off to the empty container return location.",
+    )
+
     notes = fields.Text()
-    proof_of_delivery = fields.Char()
-    proof_of_delivery_sign = fields.Json()
-    proof_empty_container_return = fields.Char()
+    # Proof payloads are kept in attachments and only loaded when read, so they do
+    # not weigh on the order rows; identical payloads share one filestore file.
+    proof_of_delivery = fields.Char(
+        compute="_compute_proof_payloads",
+        inverse="_inverse_proof_of_delivery",
+        search="_search_proof_of_delivery",
+    )
+    proof_of_delivery_sign = fields.Json(
+        compute="_compute_proof_payloads",
+        inverse="_inverse_proof_of_delivery_sign",
+        search="_search_proof_of_delivery_sign",
+    )
+    proof_empty_container_return = fields.Char(
+        compute="_compute_proof_payloads",
+        inverse="_inverse_proof_empty_container_return",
+        search="_search_proof_empty_container_return",
+    )
+    proof_of_delivery_file = fields.Binary(attachment=True, copy=False)
+    proof_of_delivery_sign_file = fields.Binary(attachment=True, copy=False)
+    proof_empty_container_return_file = fields.Binary(attachment=True, copy=False)
+    proof_of_delivery_sign_thumbnail = fields.Image(
+        string="Signature", max_width=256, max_height=256, attachment=True, copy=False, readonly=True
+    )
 
     last_date_container_return = fields.Date()
     items = fields.Json()
@@ -94,8 +215,10 @@ class EcosireFleetOrder(models.Model):
     expected_delivery_date = fields.Date()
     waybill_id = fields.Integer()
     bayan_trip_id = fields.Integer()
-    bill_of_lading_number = fields.Char()
-    bayan_number = fields.Char()
+    bill_of_lading_number = fields.Char(index="trigram")
+    bayan_number = fields.Char(index="trigram")
+    bayan_submitted_at = fields.Datetime(string="Trip Submitted On", readonly=True, copy=False)
+    bayan_submission_error = fields.Text(string="Trip Submission Error", readonly=True, copy=False)
 
     # Payment Terms
     payment_method = fields.Selection(
@@ -113,30 +236,826 @@ class EcosireFleetOrder(models.Model):
     fare = fields.Float(string="Fare")
     paid_by_sender = fields.Boolean(string="Paid By Sender")
 
-    # Item lines
+    # Item lines, normalized from the ``items`` payload when it is received
     line_ids = fields.One2many("ecosire.fleet.order.line", "order_id", string="Items")
+    total_weight = fields.Float(string="Total Weight", compute="_compute_item_totals", store=True, readonly=True)
+    total_quantity = fields.Float(
+        string="Total Quantity", compute="_compute_item_totals", store=True, readonly=True
+    )
 
     # Cost lines to be billed
     cost_line_ids = fields.One2many(
         "ecosire.fleet.order.cost.line", "order_id", string="Cost Lines"
     )
 
+    currency_id = fields.Many2one(
+        related="company_id.currency_id", comodel_name="res.currency", string="Currency", store=True, readonly=True
+    )
+    amount_untaxed = fields.Monetary(
+        string="Untaxed Amount", compute="_compute_amounts", store=True, readonly=True
+    )
+    amount_total = fields.Monetary(
+        string="Total", compute="_compute_amounts", store=True, readonly=True
+    )
+
     # Related Sales Orders created from this fleet order
     sale_order_ids = fields.One2many(
         "sale.order", "fleet_order_id", string="Sales Orders"
     )
 
+    # Status history
+    status_changed_at = fields.Datetime(
+        string="Status Changed On", default=fields.Datetime.now, readonly=True, copy=False, index=True
+    )
+    event_ids = fields.One2many(
+        "ecosire.fleet.order.event", "order_id", string="Status History", readonly=True
+    )
+
     _sql_constraints = [
         ("ecosire_fleet_order_order_no_uniq", "unique(order_no)", "Order number must be unique."),
     ]
 
+    def init(self):
+        for _lat_field, _lng_field, geohash_field in LOCATION_FIELDS.values():
+            # text_pattern_ops lets prefix LIKE queries use the index whatever the collation.
+            tools.create_index(
+                self._cr,
+                f"ecosire_fleet_order_{geohash_field}_idx",
+                self._table,
+                [f"{geohash_field} text_pattern_ops"],
+            )
+        if self.pool.has_trigram:
+            # The other quick search fields declare ``index="trigram"``; the external ID
+            # keeps its btree index for the exact upsert lookups, so its trigram one is added here.
+            tools.create_index(
+                self._cr,
+                "ecosire_fleet_order_external_order_id_trgm_idx",
+                self._table,
+                ["external_order_id gin_trgm_ops"],
+                method="gin",
+            )
+        # Composite indexes matching the list, API and dashboard access patterns.
+        for name, expressions in COMPOSITE_INDEXES.items():
+            tools.create_index(self._cr, f"ecosire_fleet_order_{name}_idx", self._table, expressions)
+
+    @api.depends(*[name for lat, lng, _geohash in LOCATION_FIELDS.values() for name in (lat, lng)])
+    def _compute_geohashes(self):
+        for order in self:
+            for lat_field, lng_field, geohash_field in LOCATION_FIELDS.values():
+                lat, lng = order[lat_field], order[lng_field]
+                order[geohash_field] = (
+                    geo.geohash_encode(lat, lng, GEOHASH_PRECISION)
+                    if geo.has_coordinates(lat, lng) else False
+                )
+
+    @api.model
+    def _backfill_geohashes(self, chunk_size=10000):
+        """Recompute the stored location geohashes of every order, in id-ordered chunks.
+
+        Coordinates are read and geohashes written with plain SQL, so memory
+        stays bounded by ``chunk_size`` and no record enters the ORM cache. Runs
+        in the caller's transaction, e.g. the upgrade's.
+        """
+        columns = [name for lat, lng, geohash in LOCATION_FIELDS.values() for name in (lat, lng)]
+        geohash_fields = [geohash for _lat, _lng, geohash in LOCATION_FIELDS.values()]
+        self.flush_model()
+        cr = self.env.cr
+        last_id = 0
+        total = 0
+        while True:
+            cr.execute(
+                SQL(
+                    "SELECT id, %s FROM ecosire_fleet_order WHERE id > %s ORDER BY id LIMIT %s",
+                    SQL(", ").join(SQL.identifier(column) for column in columns),
+                    last_id,
+                    chunk_size,
+                )
+            )
+            rows = cr.fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            geohashes = [[] for _field in geohash_fields]
+            for row in rows:
+                for index, (lat, lng) in enumerate(zip(row[1::2], row[2::2])):
+                    geohashes[index].append(
+                        geo.geohash_encode(lat or 0.0, lng or 0.0, GEOHASH_PRECISION)
+                        if geo.has_coordinates(lat, lng) else None
+                    )
+            cr.execute(
+                SQL(
+                    """
+                    UPDATE ecosire_fleet_order AS o
+                       SET %s
+                      FROM unnest(%s::int[], %s) AS v(id, %s)
+                     WHERE o.id = v.id
+                    """,
+                    SQL(", ").join(
+                        SQL("%s = v.%s", SQL.identifier(name), SQL.identifier(name)) for name in geohash_fields
+                    ),
+                    ids,
+                    SQL(", ").join(SQL("%s::varchar[]", values) for values in geohashes),
+                    SQL(", ").join(SQL.identifier(name) for name in geohash_fields),
+                )
+            )
+            last_id = ids[-1]
+            total += len(ids)
+            _logger.info("Backfilled location geohashes of %s fleet orders.", total)
+        self.invalidate_model(geohash_fields)
+        return total
+
+    @api.depends(
+        "pickup_location_lat", "pickup_location_lng",
+        "drop_off_location_lat", "drop_off_location_lng",
+        "empty_dropoff_location_lat", "empty_dropoff_location_lng",
+    )
+    def _compute_trip_distances(self):
+        rows = [
+            (
+                order.pickup_location_lat, order.pickup_location_lng,
+                order.drop_off_location_lat, order.drop_off_location_lng,
+                order.empty_dropoff_location_lat, order.empty_dropoff_location_lng,
+            )
+            for order in self
+        ]
+        trip_distances, return_distances = self._compute_leg_distances(rows)
+        for order, trip_distance, return_distance in zip(self, trip_distances, return_distances):
+            order.trip_distance_km = trip_distance
+            order.return_distance_km = return_distance
+
+    @api.model
+    def _compute_leg_distances(self, rows):
+        """Return the trip and empty return distances of coordinate ``rows`` in one vectorized pass.
+
+        Each row is ``(pickup_lat, pickup_lng, drop_off_lat, drop_off_lng,
+        empty_dropoff_lat, empty_dropoff_lng)``.
+        """
+        if not rows:
+            return [], []
+        pickup_lat, pickup_lng, drop_lat, drop_lng, empty_lat, empty_lng = zip(*rows)
+        trip_distances = geo.leg_distances_km(pickup_lat, pickup_lng, drop_lat, drop_lng)
+        return_distances = geo.leg_distances_km(drop_lat, drop_lng, empty_lat, empty_lng)
+        return trip_distances.round(3).tolist(), return_distances.round(3).tolist()
+
+    @api.model
+    def _backfill_trip_distances(self, chunk_size=10000, commit=False):
+        """Recompute the stored trip distances of every order, in id-ordered chunks.
+
+        Coordinates are read and distances written with plain SQL, so memory stays
+        bounded by ``chunk_size`` and no record enters the ORM cache. Runs in the
+        caller's transaction, e.g. the upgrade's; manual backfills may pass
+        ``commit=True`` to commit after each chunk (outside of tests), e.g. from
+        ``odoo-bin shell``: ``env["ecosire.fleet.order"]._backfill_trip_distances(commit=True)``.
+        """
+        auto_commit = commit and not getattr(threading.current_thread(), "testing", False)
+        self.flush_model()
+        cr = self.env.cr
+        last_id = 0
+        total = 0
+        while True:
+            cr.execute(
+                """
+                SELECT id,
+                       pickup_location_lat, pickup_location_lng,
+                       drop_off_location_lat, drop_off_location_lng,
+                       empty_dropoff_location_lat, empty_dropoff_location_lng
+                  FROM ecosire_fleet_order
+                 WHERE id > %s
+              ORDER BY id
+                 LIMIT %s
+                """,
+                (last_id, chunk_size),
+            )
+            rows = cr.fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            trip_distances, return_distances = self._compute_leg_distances(
+                [[value or 0.0 for value in row[1:]] for row in rows]
+            )
+            cr.execute(
+                """
+                UPDATE ecosire_fleet_order AS o
+                   SET trip_distance_km = v.trip_distance_km,
+                       return_distance_km = v.return_distance_km
+                  FROM unnest(%s::int[], %s::numeric[], %s::numeric[])
+                       AS v(id, trip_distance_km, return_distance_km)
+                 WHERE o.id = v.id
+                """,
+                (ids, trip_distances, return_distances),
+            )
+            last_id = ids[-1]
+            total += len(ids)
+            if auto_commit:
+                cr.commit()
+            _logger.info("Backfilled trip distances of %s fleet orders.", total)
+        self.invalidate_model(["trip_distance_km", "return_distance_km"])
+        return total
+
+    @api.depends("cost_line_ids.price_subtotal", "cost_line_ids.price_total")
+    def _compute_amounts(self):
+        for order in self:
+            order.amount_untaxed = sum(order.cost_line_ids.mapped("price_subtotal"))
+            order.amount_total = sum(order.cost_line_ids.mapped("price_total"))
+
+    @api.depends("line_ids.weight", "line_ids.quantity")
+    def _compute_item_totals(self):
+        for order in self:
+            order.total_weight = sum(order.line_ids.mapped("weight"))
+            order.total_quantity = sum(order.line_ids.mapped("quantity"))
+
+    @api.model
+    def _prepare_item_line_vals(self, items):
+        """Return the order line values of an ``items`` payload (a list of item dicts).
+
+        Unknown keys are ignored and numeric values sent as strings are converted;
+        anything that is not an item dict is skipped.
+        """
+        if isinstance(items, dict):
+            items = [items]
+        if not isinstance(items, list):
+            return []
+        vals_list = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            vals = {}
+            for name, keys in ITEM_LINE_KEYS.items():
+                value = next((item[key] for key in keys if item.get(key) not in (None, "")), None)
+                if value is None:
+                    continue
+                if self.env["ecosire.fleet.order.line"]._fields[name].type == "float":
+                    try:
+                        value = float(value)
+                    except (TypeError, ValueError):
+                        continue
+                else:
+                    value = str(value)
+                vals[name] = value
+            vals_list.append(vals)
+        return vals_list
+
+    @api.model
+    def _normalize_items_vals(self, vals):
+        """Add the ``line_ids`` commands replacing the order lines by the ``items`` of ``vals``.
+
+        Explicit ``line_ids`` take precedence over ``items``.
+        """
+        if "items" in vals and "line_ids" not in vals:
+            vals["line_ids"] = [(5, 0, 0)] + [
+                (0, 0, line_vals) for line_vals in self._prepare_item_line_vals(vals["items"])
+            ]
+        return vals
+
+    @api.model
+    def _backfill_item_lines(self, chunk_size=1000, commit=False):
+        """Create the order lines of orders whose ``items`` were never normalized, in id-ordered chunks.
+
+        Only orders with ``items`` and no lines are converted. The stored item
+        totals of every order in a chunk are refreshed with one SQL update, so the
+        totals of orders whose lines predate them are filled in too. Runs in the
+        caller's transaction, e.g. the upgrade's; manual runs from ``odoo-bin shell``
+        may pass ``commit=True`` to commit after each chunk (outside of tests).
+        """
+        auto_commit = commit and not getattr(threading.current_thread(), "testing", False)
+        self.flush_model()
+        cr = self.env.cr
+        OrderLine = self.env["ecosire.fleet.order.line"]
+        last_id = 0
+        total = 0
+        while True:
+            cr.execute(
+                """
+                SELECT o.id, o.items
+                  FROM ecosire_fleet_order o
+                 WHERE o.id > %s
+                   AND o.items IS NOT NULL
+                   AND NOT EXISTS (SELECT 1 FROM ecosire_fleet_order_line l WHERE l.order_id = o.id)
+              ORDER BY o.id
+                 LIMIT %s
+                """,
+                (last_id, chunk_size),
+            )
+            rows = cr.fetchall()
+            if not rows:
+                break
+            OrderLine.create([
+                dict(line_vals, order_id=order_id)
+                for order_id, items in rows
+                for line_vals in self._prepare_item_line_vals(items)
+            ])
+            OrderLine.flush_model()
+            last_id = rows[-1][0]
+            total += len(rows)
+            if auto_commit:
+                cr.commit()
+            self.env.invalidate_all()
+            _logger.info("Normalized the items of %s fleet orders.", total)
+        # Totals are plain aggregates of the lines; refresh them for every order in id chunks.
+        last_id = 0
+        while True:
+            cr.execute(
+                """
+                WITH chunk AS (
+                    SELECT id FROM ecosire_fleet_order WHERE id > %s ORDER BY id LIMIT %s
+                )
+                UPDATE ecosire_fleet_order o
+                   SET total_weight = COALESCE(t.total_weight, 0),
+                       total_quantity = COALESCE(t.total_quantity, 0)
+                  FROM chunk
+             LEFT JOIN (
+                        SELECT order_id, sum(weight) AS total_weight, sum(quantity) AS total_quantity
+                          FROM ecosire_fleet_order_line
+                         WHERE order_id IN (SELECT id FROM chunk)
+                      GROUP BY order_id
+                       ) t ON t.order_id = chunk.id
+                 WHERE o.id = chunk.id
+             RETURNING o.id
+                """,
+                (last_id, chunk_size),
+            )
+            ids = [order_id for (order_id,) in cr.fetchall()]
+            if not ids:
+                break
+            last_id = max(ids)
+            if auto_commit:
+                cr.commit()
+        self.invalidate_model(["total_weight", "total_quantity"])
+        return total
+
+    @api.depends(*PROOF_PAYLOAD_FIELDS.values())
+    def _compute_proof_payloads(self):
+        # One attachment query for the three payloads of every order in the batch.
+        payloads = {}
+        if self.ids:
+            attachments = self.env["ir.attachment"].sudo().search_fetch(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_field", "in", list(PROOF_PAYLOAD_FIELDS.values())),
+                    ("res_id", "in", self.ids),
+                ],
+                ["res_id", "res_field", "raw"],
+            )
+            payloads = {(att.res_id, att.res_field): att.raw for att in attachments}
+        for order in self:
+            for name, file_field in PROOF_PAYLOAD_FIELDS.items():
+                raw = payloads.get((order.id, file_field))
+                order[name] = self._decode_proof_payload(name, raw) if raw else False
+
+    def _inverse_proof_of_delivery(self):
+        self._write_proof_payload("proof_of_delivery")
+
+    def _inverse_proof_of_delivery_sign(self):
+        self._write_proof_payload("proof_of_delivery_sign")
+        thumbnails = self._ecosire_get_signature_thumbnails_enabled()
+        for order in self:
+            signature = order.proof_of_delivery_sign
+            if signature or order.proof_of_delivery_sign_thumbnail:
+                order.proof_of_delivery_sign_thumbnail = thumbnails and self._get_signature_image(signature)
+
+    def _inverse_proof_empty_container_return(self):
+        self._write_proof_payload("proof_empty_container_return")
+
+    def _write_proof_payload(self, name):
+        """Store the values of the proof field ``name`` in its attachment field."""
+        file_field = PROOF_PAYLOAD_FIELDS[name]
+        for order in self:
+            raw = self._encode_proof_payload(name, order[name])
+            order[file_field] = base64.b64encode(raw) if raw else False
+
+    def _search_proof_of_delivery(self, operator, value):
+        return self._search_proof_payload("proof_of_delivery", operator, value)
+
+    def _search_proof_of_delivery_sign(self, operator, value):
+        return self._search_proof_payload("proof_of_delivery_sign", operator, value)
+
+    def _search_proof_empty_container_return(self, operator, value):
+        return self._search_proof_payload("proof_empty_container_return", operator, value)
+
+    @api.model
+    def _search_proof_payload(self, name, operator, value):
+        """Search on whether the proof field ``name`` is set, through its attachment field."""
+        if operator not in ("=", "!=") or value not in (False, None):
+            raise UserError(_("Proof fields can only be searched for being set or not."))
+        return [(PROOF_PAYLOAD_FIELDS[name], operator, False)]
+
+    @api.model
+    def _encode_proof_payload(self, name, value):
+        """Return the attachment content storing ``value`` of the proof field ``name``."""
+        if value in (None, False, ""):
+            return b""
+        if self._fields[name].type == "json":
+            # Canonical JSON so identical signatures map to the same filestore file.
+            return json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+        return value.encode()
+
+    @api.model
+    def _decode_proof_payload(self, name, raw):
+        if self._fields[name].type == "json":
+            return json.loads(raw)
+        return raw.decode()
+
     @api.model
-    def create(self, vals):
-        if not vals.get("order_no") or vals.get("order_no") in (False, "/", ""):
-            vals["order_no"] = (
+    def _get_signature_image(self, signature):
+        """Return the base64 image embedded in ``signature`` as a data URI, or False.
+
+        The first ``data:image/...;base64,`` string found in the JSON payload is used;
+        payloads that are not valid images yield no thumbnail.
+        """
+        stack = [signature]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(value)
+            elif isinstance(value, str) and value.startswith("data:image/") and ";base64," in value:
+                image = value.split(";base64,", 1)[1].encode()
+                try:
+                    tools.image_process(base64.b64decode(image), verify_resolution=True)
+                except (UserError, ValueError):
+                    return False
+                return image
+        return False
+
+    @api.model
+    def _ecosire_get_signature_thumbnails_enabled(self):
+        """Return whether signature thumbnails are generated.
+
+        System parameter: ``ecosire_fleet_api.pod_signature_thumbnails``, default ``True``.
+        """
+        value = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("ecosire_fleet_api.pod_signature_thumbnails", default="True")
+        )
+        return str(value).lower() in ("1", "true", "yes")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        missing = [
+            vals for vals in vals_list
+            if not vals.get("order_no") or vals.get("order_no") in (False, "/", "")
+        ]
+        if missing:
+            numbers = self._reserve_order_numbers(len(missing))
+            for vals, number in zip(missing, numbers):
+                vals["order_no"] = number
+        for vals in vals_list:
+            self._normalize_items_vals(vals)
+        orders = super().create(vals_list)
+        self.env["ecosire.fleet.order.event"]._log_status_changes(
+            [(order, False, order.status) for order in orders]
+        )
+        return orders
+
+    @api.model
+    def _reserve_order_numbers(self, count):
+        """Reserve ``count`` order numbers from the order sequence in one round trip.
+
+        Standard (PostgreSQL backed) sequences are advanced with a single
+        ``nextval`` over ``generate_series``; no-gap sequences are advanced with a
+        single locked ``UPDATE``. Sequences using date ranges fall back to
+        ``next_by_code`` per number since each range keeps its own counter.
+        """
+        if count <= 0:
+            return []
+        sequence = self.env["ir.sequence"].sudo().search(
+            [
+                ("code", "=", "ecosire.fleet.order.seq"),
+                ("company_id", "in", [self.env.company.id, False]),
+            ],
+            order="company_id",
+            limit=1,
+        )
+        if not sequence:
+            return ["/"] * count
+        if sequence.use_date_range:
+            return [
                 self.env["ir.sequence"].next_by_code("ecosire.fleet.order.seq") or "/"
+                for _i in range(count)
+            ]
+
+        cr = self.env.cr
+        if sequence.implementation == "standard":
+            cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ("ir_sequence_%03d" % sequence.id, count),
+            )
+            numbers = sorted(row[0] for row in cr.fetchall())
+        else:
+            step = sequence.number_increment
+            cr.execute(
+                """
+                UPDATE ir_sequence
+                   SET number_next = number_next + %s
+                 WHERE id = %s
+             RETURNING number_next - %s
+                """,
+                (step * count, sequence.id, step * count),
             )
-        return super().create(vals)
+            start = cr.fetchone()[0]
+            sequence.invalidate_recordset(["number_next"])
+            numbers = [start + step * i for i in range(count)]
+        return [sequence.get_next_char(number) for number in numbers]
+
+    # -------------------------------------------------------------------------
+    # External sync
+    # -------------------------------------------------------------------------
+    @api.model
+    def upsert_from_external(self, payloads, batch_size=1000):
+        """Create or update fleet orders from external payloads keyed on ``external_order_id``.
+
+        Existing orders are resolved with a single indexed lookup, only fields whose
+        value actually differs are written, and creates/updates are issued in
+        batches of ``batch_size``. A failing batch is retried item by item so one
+        bad payload does not reject its neighbours. x2many values are always
+        treated as changes, so resent payloads should replace lines (``(5, 0, 0)``)
+        rather than append them.
+
+        Returns a list aligned with ``payloads`` where each item is a dict with
+        ``external_order_id``, ``id``, ``status`` (``created``, ``updated``,
+        ``unchanged`` or ``error``) and ``error``.
+        """
+        results = [None] * len(payloads)
+        indexes_by_key = {}
+        for index, payload in enumerate(payloads):
+            key = payload.get("external_order_id") if isinstance(payload, dict) else None
+            if not key:
+                results[index] = self._upsert_result(key, "error", error="Missing external_order_id.")
+            elif key in indexes_by_key:
+                results[index] = self._upsert_result(
+                    key, "error", error="Duplicate external_order_id in payload."
+                )
+            elif set(payload) - set(self._fields):
+                results[index] = self._upsert_result(
+                    key, "error",
+                    error="Unknown fields: %s" % ", ".join(sorted(set(payload) - set(self._fields))),
+                )
+            else:
+                indexes_by_key[key] = index
+
+        existing = self.search([("external_order_id", "in", list(indexes_by_key))])
+        field_names = {name for index in indexes_by_key.values() for name in payloads[index]}
+        existing.fetch([name for name in field_names if self._fields[name].store])
+        orders_by_key = {}
+        for order in existing:
+            orders_by_key.setdefault(order.external_order_id, order)
+
+        to_create, to_write = [], []
+        for key, index in indexes_by_key.items():
+            vals = dict(payloads[index])
+            order = orders_by_key.get(key)
+            if not order:
+                to_create.append((index, vals))
+                continue
+            changes = order._ecosire_diff_values(vals)
+            if changes:
+                to_write.append((index, order, changes))
+            else:
+                results[index] = self._upsert_result(key, "unchanged", order_id=order.id)
+
+        for chunk in split_every(batch_size, to_create, list):
+            self._upsert_create_batch(chunk, results)
+        for chunk in split_every(batch_size, to_write, list):
+            self._upsert_write_batch(chunk, results)
+        return results
+
+    @api.model
+    def _upsert_result(self, key, status, order_id=False, error=False):
+        return {"external_order_id": key, "id": order_id, "status": status, "error": error}
+
+    def _ecosire_diff_values(self, vals):
+        """Return the subset of ``vals`` that differs from the values stored on this order."""
+        self.ensure_one()
+        changes = {}
+        for name, value in vals.items():
+            field = self._fields[name]
+            if field.type in ("one2many", "many2many"):
+                changes[name] = value
+                continue
+            new_value = field.convert_to_cache(value, self, validate=False)
+            old_value = field.convert_to_cache(self[name], self, validate=False)
+            if new_value != old_value:
+                changes[name] = value
+        return changes
+
+    @api.model
+    def _upsert_create_batch(self, chunk, results):
+        try:
+            with self.env.cr.savepoint():
+                orders = self.create([vals for _index, vals in chunk])
+        except Exception as error:
+            if len(chunk) > 1:
+                for item in chunk:
+                    self._upsert_create_batch([item], results)
+                return
+            index, vals = chunk[0]
+            _logger.warning("Upsert of fleet order %s failed: %s", vals.get("external_order_id"), error)
+            results[index] = self._upsert_result(vals.get("external_order_id"), "error", error=str(error))
+            return
+        for (index, vals), order in zip(chunk, orders):
+            results[index] = self._upsert_result(vals.get("external_order_id"), "created", order_id=order.id)
+
+    @api.model
+    def _upsert_write_batch(self, chunk, results):
+        try:
+            # Writes only fill the cache; the savepoint flushes them as batched UPDATEs.
+            with self.env.cr.savepoint():
+                for _index, order, changes in chunk:
+                    order.write(changes)
+        except Exception as error:
+            if len(chunk) > 1:
+                for item in chunk:
+                    self._upsert_write_batch([item], results)
+                return
+            index, order, _changes = chunk[0]
+            _logger.warning("Upsert of fleet order %s failed: %s", order.external_order_id, error)
+            results[index] = self._upsert_result(
+                order.external_order_id, "error", order_id=order.id, error=str(error)
+            )
+            return
+        for index, order, _changes in chunk:
+            results[index] = self._upsert_result(order.external_order_id, "updated", order_id=order.id)
+
+    # -------------------------------------------------------------------------
+    # Keyset pagination
+    # -------------------------------------------------------------------------
+    @api.model
+    def _encode_page_cursor(self, create_date, order_id):
+        # Keep the microseconds: orders created in the same second must not be skipped.
+        payload = json.dumps([create_date.isoformat(), order_id])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @api.model
+    def _decode_page_cursor(self, cursor):
+        try:
+            create_date, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(create_date), int(order_id)
+        except (TypeError, ValueError):
+            raise UserError(_("Invalid page cursor.")) from None
+
+    @api.model
+    def search_page(self, domain=None, cursor=None, limit=80, field_names=None):
+        """Return one page of orders, newest first, using keyset pagination.
+
+        Instead of an OFFSET, the page continues after the ``(create_date, id)``
+        position encoded in the opaque ``cursor`` returned with the previous page,
+        so fetching any page costs the same whatever its depth.
+
+        Returns ``{"records": [...], "next_cursor": str or False}``; ``records``
+        holds the ``field_names`` values (``read`` format) and ``next_cursor`` is
+        ``False`` on the last page.
+        """
+        self.flush_model(["create_date"])
+        query = self._search(domain or [], limit=limit, order="create_date desc, id desc")
+        if cursor:
+            create_date, order_id = self._decode_page_cursor(cursor)
+            query.add_where(SQL(
+                "(%s, %s) < (%s, %s)",
+                SQL.identifier(self._table, "create_date"),
+                SQL.identifier(self._table, "id"),
+                create_date,
+                order_id,
+            ))
+        self.env.cr.execute(query.select(
+            SQL.identifier(self._table, "id"), SQL.identifier(self._table, "create_date")
+        ))
+        rows = self.env.cr.fetchall()
+        orders = self.browse([order_id for order_id, _create_date in rows])
+        next_cursor = False
+        if limit and len(rows) == limit:
+            next_cursor = self._encode_page_cursor(rows[-1][1], rows[-1][0])
+        return {
+            "records": orders.read(field_names or ["order_no", "status", "customer_id", "create_date"]),
+            "next_cursor": next_cursor,
+        }
+
+    # -------------------------------------------------------------------------
+    # Proximity search
+    # -------------------------------------------------------------------------
+    @api.model
+    def _search_near_distances(self, point, radius_km, location_kind="pickup", domain=None, limit=None):
+        """Return ``[(order_id, distance_km)]`` within ``radius_km`` of ``point``, nearest first.
+
+        Candidates are prefiltered in SQL on the geohash cells covering the
+        circle, then refined with the exact haversine distance.
+        """
+        if location_kind not in LOCATION_FIELDS:
+            raise UserError(_("Unknown location kind: %s", location_kind))
+        lat, lng = point
+        lat_field, lng_field, geohash_field = LOCATION_FIELDS[location_kind]
+        cells = geo.geohash_cover(lat, lng, radius_km, GEOHASH_PRECISION)
+
+        self.flush_model([lat_field, lng_field, geohash_field])
+        query = self._search(domain or [])
+        geohash_column = SQL.identifier(self._table, geohash_field)
+        query.add_where(SQL("(%s)", SQL(" OR ").join(
+            SQL("%s LIKE %s", geohash_column, f"{cell}%") for cell in cells
+        )))
+        self.env.cr.execute(query.select(
+            SQL.identifier(self._table, "id"),
+            SQL.identifier(self._table, lat_field),
+            SQL.identifier(self._table, lng_field),
+        ))
+        distances = []
+        for order_id, order_lat, order_lng in self.env.cr.fetchall():
+            distance = geo.haversine_km(lat, lng, order_lat, order_lng)
+            if distance <= radius_km:
+                distances.append((order_id, distance))
+        distances.sort(key=lambda item: (item[1], item[0]))
+        return distances[:limit] if limit else distances
+
+    @api.model
+    def search_near(self, point, radius_km, location_kind="pickup", domain=None, limit=None):
+        """Return the orders whose ``location_kind`` point lies within ``radius_km`` of ``point``.
+
+        ``point`` is a ``(latitude, longitude)`` pair and ``location_kind`` one of
+        ``pickup``, ``drop_off``, ``empty_dropoff`` or ``yard_dropoff``. Results are
+        sorted by distance, nearest first.
+        """
+        distances = self._search_near_distances(point, radius_km, location_kind, domain, limit)
+        return self.browse([order_id for order_id, _distance in distances])
+
+    # -------------------------------------------------------------------------
+    # Quick search
+    # -------------------------------------------------------------------------
+    @api.model
+    def _quick_search_scores(self, term, domain=None, limit=20):
+        """Return ``[(order_id, score)]`` of orders matching ``term``, best first.
+
+        ``term`` is matched as a case-insensitive substring of the identifier and
+        address fields, which the trigram indexes resolve without scanning the
+        table. Exact identifier matches rank first, then trigram word similarity
+        (when pg_trgm is available), then the newest orders. At most
+        ``QUICK_SEARCH_MAX_LIMIT`` results are returned.
+        """
+        term = (term or "").strip()
+        if not term:
+            return []
+        limit = min(limit or QUICK_SEARCH_MAX_LIMIT, QUICK_SEARCH_MAX_LIMIT)
+        columns = [SQL.identifier(self._table, name) for name in QUICK_SEARCH_FIELDS]
+
+        self.flush_model(QUICK_SEARCH_FIELDS)
+        query = self._search(domain or [], limit=limit)
+        pattern = f"%{escape_psql(term)}%"
+        query.add_where(SQL("(%s)", SQL(" OR ").join(SQL("%s ILIKE %s", column, pattern) for column in columns)))
+        exact = SQL("(%s)", SQL(" OR ").join(
+            SQL("lower(%s) = lower(%s)", column, term) for column in columns[:4]
+        ))
+        if self.pool.has_trigram:
+            similarity = SQL("GREATEST(%s)", SQL(", ").join(
+                SQL("word_similarity(%s, %s)", term, column) for column in columns
+            ))
+        else:
+            similarity = SQL("0")
+        score = SQL("(CASE WHEN %s THEN 1 ELSE 0 END + COALESCE(%s, 0))", exact, similarity)
+        query.order = SQL("%s DESC, %s DESC", score, SQL.identifier(self._table, "id"))
+        self.env.cr.execute(query.select(SQL.identifier(self._table, "id"), score))
+        return self.env.cr.fetchall()
+
+    @api.model
+    def quick_search(self, term, domain=None, limit=20):
+        """Return the orders whose container, bill of lading, Bayan or external number,
+        or pickup/drop-off address contains ``term``, best matches first.
+        """
+        return self.browse([order_id for order_id, _score in self._quick_search_scores(term, domain, limit)])
+
+    def action_submit_trips(self):
+        """Submit the trips of the selected eligible orders to the Bayan service."""
+        results = self.env["ecosire.fleet.trip.submitter"].submit(self)
+        failed = sum(1 for result in results.values() if result.get("error"))
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Trip Submission"),
+                "message": _(
+                    "%(submitted)s of %(total)s eligible orders submitted.",
+                    submitted=len(results) - failed,
+                    total=len(results),
+                ),
+                "type": "warning" if failed else "success",
+                "sticky": False,
+            },
+        }
+
+    def action_auto_dispatch(self):
+        """Assign drivers and vehicles to the selected created orders and dispatch them."""
+        dispatched = self.env["ecosire.fleet.dispatcher"].dispatch(self)
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Dispatch"),
+                "message": _(
+                    "%(dispatched)s of %(total)s orders dispatched.",
+                    dispatched=len(dispatched),
+                    total=len(self),
+                ),
+                "type": "success" if dispatched else "warning",
+            },
+        }
 
     def action_open_form(self):
         self.ensure_one()
@@ -149,35 +1068,93 @@ class EcosireFleetOrder(models.Model):
         }
 
     def write(self, vals):
-        creating_quotation_after = False
+        changes = []
+        if "status" in vals:
+            changes = [
+                (order, order.status, vals["status"])
+                for order in self
+                if order.status != vals["status"]
+            ]
+            self._check_status_transitions(changes)
+        if "items" in vals:
+            vals = self._normalize_items_vals(dict(vals))
+        orders = self
+        if changes and "status_changed_at" not in vals:
+            changed = self.browse([order.id for order, _old, _new in changes])
+            if changed != self:
+                # Orders already in the target status keep their status timestamp.
+                super(EcosireFleetOrder, self - changed).write(vals)
+                orders = changed
+            vals = dict(vals, status_changed_at=fields.Datetime.now())
+        result = super(EcosireFleetOrder, orders).write(vals)
+        if changes:
+            self.env["ecosire.fleet.order.event"]._log_status_changes(changes)
         if vals.get("status") == "completed":
-            creating_quotation_after = True
-        result = super().write(vals)
-        if creating_quotation_after:
-            for order in self:
-                order._create_quotation_from_cost_lines()
+            self._create_quotation_from_cost_lines()
         return result
 
-    def _create_quotation_from_cost_lines(self):
-        """Create a quotation (draft sale order) when fleet order is completed"""
+    @api.model
+    def _check_status_transitions(self, changes):
+        """Raise if one of the ``(order, old_status, new_status)`` changes is not allowed.
+
+        Set ``ecosire_skip_status_check`` in the context to bypass the check, e.g.
+        when correcting data or replaying history from the external system.
+        """
+        if self.env.context.get("ecosire_skip_status_check"):
+            return
+        labels = dict(self._fields["status"].selection)
+        for order, old_status, new_status in changes:
+            if new_status not in STATUS_TRANSITIONS.get(old_status, ()):
+                raise UserError(_(
+                    "Order %(order)s cannot move from %(old)s to %(new)s.",
+                    order=order.order_no,
+                    old=labels.get(old_status, old_status),
+                    new=labels.get(new_status, new_status),
+                ))
+
+    def _prepare_quotation_vals(self, cache=None):
+        """Return the values of the draft sale order generated for this fleet order.
+
+        ``cache`` is shared across the orders of a batch so product descriptions
+        are computed once per product.
+        """
         self.ensure_one()
-        SaleOrder = self.env["sale.order"]
-        
-        # Create the Sale Order in draft state (Quotation)
-        sale = SaleOrder.create(
-            {
-                "partner_id": self.customer_id.id,
-                "company_id": self.company_id.id,
-                "origin": self.order_no,
-                "fleet_order_id": self.id,
-                "external_order_id": self.external_order_id,
-                # state will be 'draft' by default - this is a quotation
-            }
-        )
-        
-        # DO NOT confirm the order - leave it as a quotation (draft state)
-        # Order lines can be added via API later, and user can confirm manually
-        return sale
+        cache = {} if cache is None else cache
+        return {
+            "partner_id": self.customer_id.id,
+            "company_id": self.company_id.id,
+            "origin": self.order_no,
+            "fleet_order_id": self.id,
+            "external_order_id": self.external_order_id,
+            "order_line": [
+                (0, 0, line._prepare_sale_order_line_vals(cache)) for line in self.cost_line_ids
+            ],
+            # state will be 'draft' by default - this is a quotation
+        }
+
+    def _create_quotation_from_cost_lines(self):
+        """Create quotations (draft sale orders) for completed fleet orders.
+
+        Orders that already have a sale order are skipped so repeated writes do not
+        multiply drafts; the remaining quotations are created, lines included, with
+        one multi-create per company.
+        """
+        orders = self.filtered(lambda order: not order.sale_order_ids)
+        # Load partners, companies and cost lines for the whole batch before
+        # building the vals.
+        orders.customer_id.fetch(["name"])
+        orders.company_id.fetch(["name"])
+        orders.cost_line_ids.fetch(["product_id", "name", "quantity", "price_unit", "tax_ids"])
+
+        # DO NOT confirm the orders - leave them as quotations (draft state)
+        # User can review and confirm manually
+        cache = {}
+        sales = self.env["sale.order"]
+        for company, company_orders in groupby(orders, key=lambda order: order.company_id):
+            sales |= sales.with_company(company).create(
+                [order._prepare_quotation_vals(cache) for order in company_orders]
+            )
+        return sales
 
     def action_view_sale_orders(self):
         self.ensure_one()
@@ -233,24 +1210,59 @@ class EcosireFleetOrderCostLine(models.Model):
         string="Taxes",
         domain="[('type_tax_use','=','sale'), ('company_id','=',company_id)]",
     )
-    price_subtotal = fields.Monetary(string="Subtotal", compute="_compute_amount", store=False)
-    price_total = fields.Monetary(string="Total", compute="_compute_amount", store=False)
+    price_subtotal = fields.Monetary(string="Subtotal", compute="_compute_amount", store=True)
+    price_total = fields.Monetary(string="Total", compute="_compute_amount", store=True)
 
-    @api.depends("price_unit", "quantity", "tax_ids")
+    @api.depends("price_unit", "quantity", "tax_ids", "currency_id", "product_id", "order_id.customer_id")
     def _compute_amount(self):
+        # Lines sharing taxes, price, quantity and currency share their tax computation,
+        # so recomputing many lines after a tax change only calls compute_all once per
+        # distinct combination.
+        memo = {}
         for line in self:
-            taxes_res = line.tax_ids.compute_all(
-                line.price_unit,
-                currency=line.currency_id,
-                quantity=line.quantity,
-                product=line.product_id,
-                partner=line.order_id.customer_id,
-            ) if line.tax_ids else {
-                'total_excluded': line.price_unit * line.quantity,
-                'total_included': line.price_unit * line.quantity,
-            }
-            line.price_subtotal = taxes_res.get("total_excluded", 0.0)
-            line.price_total = taxes_res.get("total_included", 0.0)
+            if not line.tax_ids:
+                line.price_subtotal = line.price_total = line.price_unit * line.quantity
+                continue
+            key = (tuple(line.tax_ids.ids), line.price_unit, line.quantity, line.currency_id.id)
+            if any(tax.amount_type == "code" for tax in line.tax_ids):
+                # Python-code taxes may depend on the product and partner.
+                key += (line.product_id.id, line.order_id.customer_id.id)
+            if key not in memo:
+                taxes_res = line.tax_ids.compute_all(
+                    line.price_unit,
+                    currency=line.currency_id,
+                    quantity=line.quantity,
+                    product=line.product_id,
+                    partner=line.order_id.customer_id,
+                )
+                memo[key] = (taxes_res.get("total_excluded", 0.0), taxes_res.get("total_included", 0.0))
+            line.price_subtotal, line.price_total = memo[key]
+
+    def _get_product_description(self, cache):
+        """Return the sale description of the line's product, memoized in ``cache``."""
+        self.ensure_one()
+        key = ("description", self.product_id.id)
+        if key not in cache:
+            cache[key] = self.product_id.get_product_multiline_description_sale()
+        return cache[key]
+
+    def _prepare_sale_order_line_vals(self, cache):
+        """Return the ``sale.order.line`` values billing this cost line.
+
+        The line's own taxes are kept as they are, none included, so the
+        quotation totals match the order's.
+        """
+        self.ensure_one()
+        if not self.product_id:
+            # Sale order lines need a product; keep the description as a note.
+            return {"display_type": "line_note", "name": self.name or ""}
+        return {
+            "product_id": self.product_id.id,
+            "name": self.name or self._get_product_description(cache),
+            "product_uom_qty": self.quantity,
+            "price_unit": self.price_unit,
+            "tax_id": [(6, 0, self.tax_ids.ids)],
+        }
 
     @api.onchange("product_id")
     def _onchange_product_id_set_defaults(self):
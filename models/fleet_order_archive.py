@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError
+
+from .fleet_order import PROOF_PAYLOAD_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Statuses of orders moved to the archive once they are old enough.
+ARCHIVE_STATUSES = ("completed", "empty_container_return", "canceled", "yard_drop_off_complete")
+# Order columns copied as-is onto the archive rows, so they stay searchable and reportable.
+ARCHIVE_COLUMNS = (
+    "order_no", "external_order_id", "company_id", "customer_id", "driver_id", "vehicle_id",
+    "order_type", "cargo_type", "delivery_type", "status", "status_changed_at",
+    "container_number", "container_weight", "bulk_weight", "bill_of_lading_number", "bayan_number",
+    "pickup_location_address", "drop_off_location_address", "expected_delivery_date",
+    "fare", "currency_id", "amount_untaxed", "amount_total", "total_weight", "total_quantity",
+)
+
+
+def _order_selection(name):
+    return lambda self: self.env["ecosire.fleet.order"]._fields[name].selection
+
+
+class EcosireFleetOrderArchive(models.Model):
+    """Read-only cold storage of old fleet orders in a terminal status.
+
+    The archiving cron moves orders here in small committed chunks, keeping the
+    order table the dispatchers work on small. Each archive row keeps the
+    searchable order columns plus a JSON snapshot of the order, its lines, cost
+    lines and status history; proof attachments, status events and sale orders
+    are relinked. Archive rows are only created by the cron and cannot be edited
+    or deleted.
+    """
+
+    _name = "ecosire.fleet.order.archive"
+    _description = "ECOSIRE Archived Fleet Order"
+    _order = "status_changed_at desc, id desc"
+    _rec_name = "order_no"
+    _log_access = False
+
+    order_id = fields.Integer(string="Original Order ID", required=True, readonly=True, index=True)
+    order_no = fields.Char(string="Order No", readonly=True, index=True)
+    external_order_id = fields.Char(string="External ID", readonly=True, index=True)
+    company_id = fields.Many2one("res.company", string="Company", required=True, readonly=True)
+    customer_id = fields.Many2one("res.partner", string="Customer", readonly=True, index=True)
+    driver_id = fields.Many2one("hr.employee", string="Driver", readonly=True)
+    vehicle_id = fields.Many2one("fleet.vehicle", string="Vehicle", readonly=True)
+    order_type = fields.Selection(selection=_order_selection("order_type"), readonly=True)
+    cargo_type = fields.Selection(selection=_order_selection("cargo_type"), readonly=True)
+    delivery_type = fields.Selection(selection=_order_selection("delivery_type"), readonly=True)
+    status = fields.Selection(selection=_order_selection("status"), string="Status", readonly=True)
+    status_changed_at = fields.Datetime(string="Status Changed On", readonly=True)
+    container_number = fields.Char(readonly=True, index=True)
+    container_weight = fields.Float(readonly=True)
+    bulk_weight = fields.Float(readonly=True)
+    bill_of_lading_number = fields.Char(readonly=True, index=True)
+    bayan_number = fields.Char(readonly=True, index=True)
+    pickup_location_address = fields.Char("Pickup Address", readonly=True)
+    drop_off_location_address = fields.Char("Drop-off Address", readonly=True)
+    expected_delivery_date = fields.Date(readonly=True)
+    fare = fields.Float(string="Fare", readonly=True)
+    currency_id = fields.Many2one("res.currency", string="Currency", readonly=True)
+    amount_untaxed = fields.Monetary(string="Untaxed Amount", readonly=True)
+    amount_total = fields.Monetary(string="Total", readonly=True)
+    total_weight = fields.Float(string="Total Weight", readonly=True)
+    total_quantity = fields.Float(string="Total Quantity", readonly=True)
+    order_create_date = fields.Datetime(string="Created On", readonly=True)
+    archived_at = fields.Datetime(string="Archived On", readonly=True)
+    data = fields.Json(string="Snapshot", readonly=True)
+    sale_order_ids = fields.One2many("sale.order", "fleet_order_archive_id", string="Quotations", readonly=True)
+
+    # Proof payloads, relinked from the order attachments.
+    proof_of_delivery = fields.Char(compute="_compute_proof_payloads")
+    proof_of_delivery_sign = fields.Json(compute="_compute_proof_payloads")
+    proof_empty_container_return = fields.Char(compute="_compute_proof_payloads")
+    proof_of_delivery_file = fields.Binary(attachment=True, readonly=True)
+    proof_of_delivery_sign_file = fields.Binary(attachment=True, readonly=True)
+    proof_empty_container_return_file = fields.Binary(attachment=True, readonly=True)
+    proof_of_delivery_sign_thumbnail = fields.Image(string="Signature", attachment=True, readonly=True)
+
+    _sql_constraints = [
+        ("order_id_uniq", "unique(order_id)", "An order can only be archived once."),
+    ]
+
+    def init(self):
+        tools.create_index(
+            self._cr,
+            f"{self._table}_company_status_changed_at_idx",
+            self._table,
+            ["company_id", "status_changed_at DESC"],
+        )
+
+    def _compute_proof_payloads(self):
+        Order = self.env["ecosire.fleet.order"]
+        attachments = self.env["ir.attachment"].sudo().search_fetch(
+            [
+                ("res_model", "=", self._name),
+                ("res_field", "in", list(PROOF_PAYLOAD_FIELDS.values())),
+                ("res_id", "in", self.ids),
+            ],
+            ["res_id", "res_field", "raw"],
+        ) if self.ids else []
+        payloads = {(att.res_id, att.res_field): att.raw for att in attachments}
+        for archive in self:
+            for name, file_field in PROOF_PAYLOAD_FIELDS.items():
+                raw = payloads.get((archive.id, file_field))
+                archive[name] = Order._decode_proof_payload(name, raw) if raw else False
+
+    def write(self, vals):
+        raise UserError(_("Archived fleet orders are read-only."))
+
+    def unlink(self):
+        raise UserError(_("Archived fleet orders cannot be deleted."))
+
+    @api.model
+    def _get_archive_after_days(self):
+        """Return the age, in days since the last status change, at which orders are archived.
+
+        System parameter: ``ecosire_fleet_api.archive_after_days``, default ``365``;
+        ``0`` disables archiving.
+        """
+        value = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("ecosire_fleet_api.archive_after_days", default="365")
+        )
+        try:
+            return max(int(value), 0)
+        except ValueError:
+            return 365
+
+    @api.model
+    def _claim_orders(self, cutoff, limit):
+        """Lock and return the ids of up to ``limit`` archivable orders, skipping rows locked elsewhere."""
+        self.env.cr.execute(
+            """
+            SELECT id
+              FROM ecosire_fleet_order
+             WHERE status IN %s
+               AND status_changed_at < %s
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            (ARCHIVE_STATUSES, cutoff, limit),
+        )
+        return [order_id for (order_id,) in self.env.cr.fetchall()]
+
+    @api.model
+    def _archive_orders(self, order_ids):
+        """Move the orders ``order_ids`` to the archive and return the archive records."""
+        if not order_ids:
+            return self.browse()
+        self.env.flush_all()
+        cr = self.env.cr
+        cr.execute(
+            f"""
+            INSERT INTO {self._table} (order_id, order_create_date, archived_at, {", ".join(ARCHIVE_COLUMNS)}, data)
+            SELECT o.id, o.create_date, %s, {", ".join(f"o.{column}" for column in ARCHIVE_COLUMNS)},
+                   jsonb_build_object(
+                       'order', to_jsonb(o),
+                       'lines', COALESCE((
+                           SELECT jsonb_agg(to_jsonb(l) ORDER BY l.id)
+                             FROM ecosire_fleet_order_line l WHERE l.order_id = o.id
+                       ), '[]'::jsonb),
+                       'cost_lines', COALESCE((
+                           SELECT jsonb_agg(to_jsonb(c) ORDER BY c.id)
+                             FROM ecosire_fleet_order_cost_line c WHERE c.order_id = o.id
+                       ), '[]'::jsonb),
+                       'events', COALESCE((
+                           SELECT jsonb_agg(to_jsonb(e) ORDER BY e.timestamp, e.id)
+                             FROM ecosire_fleet_order_event e WHERE e.order_id = o.id
+                       ), '[]'::jsonb)
+                   )
+              FROM ecosire_fleet_order o
+             WHERE o.id = ANY(%s)
+         RETURNING order_id, id
+            """,
+            (fields.Datetime.now(), order_ids),
+        )
+        mapping = cr.fetchall()
+        order_ids = [order_id for order_id, _archive_id in mapping]
+        archive_ids = [archive_id for _order_id, archive_id in mapping]
+        # Relink what refers to the orders before they are deleted.
+        cr.execute(
+            """
+            UPDATE ir_attachment a
+               SET res_model = %s, res_id = m.archive_id
+              FROM unnest(%s::int[], %s::int[]) AS m(order_id, archive_id)
+             WHERE a.res_model = 'ecosire.fleet.order' AND a.res_id = m.order_id
+            """,
+            (self._name, order_ids, archive_ids),
+        )
+        cr.execute(
+            """
+            UPDATE ecosire_fleet_order_event e
+               SET order_id = NULL, order_archive_id = m.archive_id
+              FROM unnest(%s::int[], %s::int[]) AS m(order_id, archive_id)
+             WHERE e.order_id = m.order_id
+            """,
+            (order_ids, archive_ids),
+        )
+        cr.execute(
+            """
+            UPDATE sale_order s
+               SET fleet_order_archive_id = m.archive_id
+              FROM unnest(%s::int[], %s::int[]) AS m(order_id, archive_id)
+             WHERE s.fleet_order_id = m.order_id
+            """,
+            (order_ids, archive_ids),
+        )
+        self.env.invalidate_all()
+        self.env["ecosire.fleet.order"].sudo().browse(order_ids).unlink()
+        return self.browse(archive_ids)
+
+    @api.model
+    def _cron_archive_orders(self, chunk_size=500, max_chunks=20):
+        """Archive old orders in a terminal status, ``chunk_size`` orders per committed chunk.
+
+        Each chunk only locks its own orders (skipping rows locked by ongoing
+        edits) and is committed before the next one outside of tests, so no
+        lock is held for long.
+        """
+        days = self._get_archive_after_days()
+        if not days:
+            return 0
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        total = 0
+        for _chunk in range(max_chunks):
+            archives = self._archive_orders(self._claim_orders(cutoff, chunk_size))
+            if not archives:
+                break
+            total += len(archives)
+            if auto_commit:
+                self.env.cr.commit()
+            _logger.info("Archived %s fleet orders.", total)
+        return total
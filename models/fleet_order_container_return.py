@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Statuses of orders whose container still has to be returned.
+CONTAINER_RETURN_OPEN_STATUSES = (
+    "created", "dispatched", "started", "enroute", "drop_off_complete", "completed",
+    "yard_drop_off", "yard_drop_off_complete", "yard_pick_up",
+)
+CONTAINER_RETURN_ACTIVITY_TYPE = "ecosire_fleet_api.mail_activity_type_container_return"
+SCANNED_UNTIL_PARAM = "ecosire_fleet_api.container_return_scanned_until"
+
+
+class EcosireFleetOrder(models.Model):
+    _name = "ecosire.fleet.order"
+    _inherit = ["ecosire.fleet.order", "mail.activity.mixin"]
+
+    days_to_container_return = fields.Integer(
+        string="Days to Container Return",
+        readonly=True,
+        copy=False,
+        help="Days left until the container return deadline, negative when overdue. "
+             "Only set while the container has not been returned; refreshed by the deadline cron.",
+    )
+
+    @api.model
+    def _get_container_return_alert_days(self):
+        """Return how many days ahead of the deadline an activity is scheduled.
+
+        System parameter: ``ecosire_fleet_api.container_return_alert_days``, default ``3``.
+        """
+        value = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("ecosire_fleet_api.container_return_alert_days", default=3)
+        )
+        return max(int(value), 0)
+
+    @api.model
+    def _refresh_container_return_days(self, ids=None):
+        """Recompute ``days_to_container_return`` of the orders ``ids``, or of every order.
+
+        Only rows whose value changes are written, so after the first run of the
+        day a refresh touches nothing.
+        """
+        self.flush_model(["status", "last_date_container_return"])
+        where = "id = ANY(%(ids)s)" if ids is not None else (
+            "(status IN %(open)s AND last_date_container_return IS NOT NULL)"
+            " OR days_to_container_return IS NOT NULL"
+        )
+        self.env.cr.execute(
+            f"""
+            WITH target AS (
+                SELECT id,
+                       CASE WHEN status IN %(open)s THEN last_date_container_return - %(today)s END AS days
+                  FROM ecosire_fleet_order
+                 WHERE {where}
+            )
+            UPDATE ecosire_fleet_order o
+               SET days_to_container_return = target.days
+              FROM target
+             WHERE o.id = target.id
+               AND o.days_to_container_return IS DISTINCT FROM target.days
+            """,
+            {
+                "ids": list(ids or []),
+                "open": CONTAINER_RETURN_OPEN_STATUSES,
+                "today": fields.Date.context_today(self),
+            },
+        )
+        self.invalidate_model(["days_to_container_return"])
+
+    def _schedule_container_return_activities(self):
+        """Create the missing container return activities of these orders in one batch."""
+        orders = self.filtered(
+            lambda order: order.status in CONTAINER_RETURN_OPEN_STATUSES and order.last_date_container_return
+        )
+        if not orders:
+            return self.env["mail.activity"]
+        activity_type = self.env.ref(CONTAINER_RETURN_ACTIVITY_TYPE)
+        existing = self.env["mail.activity"].sudo().search_fetch([
+            ("res_model", "=", self._name),
+            ("res_id", "in", orders.ids),
+            ("activity_type_id", "=", activity_type.id),
+        ], ["res_id"])
+        scheduled = set(existing.mapped("res_id"))
+        model_id = self.env["ir.model"]._get_id(self._name)
+        vals_list = [
+            {
+                "res_model_id": model_id,
+                "res_id": order.id,
+                "activity_type_id": activity_type.id,
+                "summary": _("Return container %(container)s", container=order.container_number or order.order_no),
+                "date_deadline": order.last_date_container_return,
+                "user_id": (
+                    order.create_uid.id if order.create_uid and order.create_uid._is_internal() else self.env.uid
+                ),
+                "automated": True,
+            }
+            for order in orders
+            if order.id not in scheduled
+        ]
+        return self.env["mail.activity"].sudo().create(vals_list)
+
+    @api.model
+    def _cron_track_container_returns(self):
+        """Refresh the days to deadline and alert on the deadlines entering the alert window.
+
+        Only deadlines between the end of the previously scanned window and
+        today plus the alert days are read, through the (status, deadline) index;
+        later deadline changes into an already scanned window are handled when
+        they are written.
+        """
+        self._refresh_container_return_days()
+        params = self.env["ir.config_parameter"].sudo()
+        scanned_until = fields.Date.to_date(params.get_param(SCANNED_UNTIL_PARAM) or None)
+        horizon = fields.Date.context_today(self) + timedelta(days=self._get_container_return_alert_days())
+        if scanned_until and horizon <= scanned_until:
+            return
+        domain = [
+            ("status", "in", CONTAINER_RETURN_OPEN_STATUSES),
+            ("last_date_container_return", "<=", horizon),
+        ]
+        if scanned_until:
+            domain.append(("last_date_container_return", ">", scanned_until))
+        orders = self.search(domain, order="last_date_container_return, id")
+        activities = orders._schedule_container_return_activities()
+        params.set_param(SCANNED_UNTIL_PARAM, fields.Date.to_string(horizon))
+        _logger.info("Scheduled %s container return activities.", len(activities))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        with_deadline = orders.filtered("last_date_container_return")
+        if with_deadline:
+            with_deadline._on_container_return_changed()
+        return orders
+
+    def write(self, vals):
+        result = super().write(vals)
+        if "last_date_container_return" in vals:
+            self._on_container_return_changed()
+        elif "status" in vals:
+            # Orders without a deadline have nothing to refresh nor any return activity.
+            self.filtered("last_date_container_return")._on_container_return_changed()
+        return result
+
+    def _on_container_return_changed(self):
+        if not self:
+            return
+        self._refresh_container_return_days(self.ids)
+        self.filtered(
+            lambda order: order.status not in CONTAINER_RETURN_OPEN_STATUSES or not order.last_date_container_return
+        ).activity_unlink([CONTAINER_RETURN_ACTIVITY_TYPE])
+        scanned_until = fields.Date.to_date(
+            self.env["ir.config_parameter"].sudo().get_param(SCANNED_UNTIL_PARAM) or None
+        )
+        if scanned_until:
+            # Deadlines moved into the window the cron already scanned are alerted right away.
+            self.filtered(
+                lambda order: order.last_date_container_return
+                and order.last_date_container_return <= scanned_until
+            )._schedule_container_return_activities()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError
+
+
+class EcosireFleetOrderEvent(models.Model):
+    """Append-only log of fleet order status changes.
+
+    One row is written per status change, in bulk alongside the status write,
+    so stage durations can be aggregated in SQL without mining external logs.
+    """
+
+    _name = "ecosire.fleet.order.event"
+    _description = "ECOSIRE Fleet Order Status Event"
+    _order = "timestamp desc, id desc"
+    _log_access = False
+
+    order_id = fields.Many2one("ecosire.fleet.order", string="Order", ondelete="cascade", readonly=True)
+    # Set instead of ``order_id`` once the order is moved to the archive, so its history is kept.
+    order_archive_id = fields.Many2one(
+        "ecosire.fleet.order.archive", string="Archived Order", index="btree_not_null", readonly=True
+    )
+    company_id = fields.Many2one("res.company", string="Company", required=True, readonly=True)
+    previous_status = fields.Selection(
+        selection=lambda self: self.env["ecosire.fleet.order"]._fields["status"].selection,
+        string="Previous Status",
+        readonly=True,
+    )
+    status = fields.Selection(
+        selection=lambda self: self.env["ecosire.fleet.order"]._fields["status"].selection,
+        string="Status",
+        required=True,
+        readonly=True,
+    )
+    timestamp = fields.Datetime(required=True, default=fields.Datetime.now, readonly=True)
+    user_id = fields.Many2one("res.users", string="User", readonly=True)
+
+    _sql_constraints = [
+        (
+            "order_or_archive_set",
+            "CHECK(order_id IS NOT NULL OR order_archive_id IS NOT NULL)",
+            "A status event belongs to an order or to an archived order.",
+        ),
+    ]
+
+    def init(self):
+        tools.create_index(
+            self._cr, "ecosire_fleet_order_event_order_timestamp_idx", self._table, ["order_id", "timestamp"]
+        )
+        tools.create_index(
+            self._cr, "ecosire_fleet_order_event_status_timestamp_idx", self._table, ["status", "timestamp"]
+        )
+
+    def write(self, vals):
+        raise UserError(_("Fleet order status events cannot be modified."))
+
+    def unlink(self):
+        raise UserError(_("Fleet order status events cannot be deleted."))
+
+    @api.model
+    def _log_status_changes(self, changes):
+        """Insert one event per ``(order, previous_status, status)`` change in a single batch."""
+        if not changes:
+            return self
+        now = fields.Datetime.now()
+        return self.sudo().create([
+            {
+                "order_id": order.id,
+                "company_id": order.company_id.id,
+                "previous_status": previous_status,
+                "status": status,
+                "timestamp": now,
+                "user_id": self.env.uid,
+            }
+            for order, previous_status, status in changes
+        ])
+
+    @api.model
+    def get_stage_dwell_times(self, date_from=None, date_to=None, company_ids=None):
+        """Return how long orders stay in each status, aggregated in SQL.
+
+        The dwell time of an event is the time until the next event of the same
+        order, archived orders included; events without a successor (the current
+        status) are ignored. Only
+        events entered between ``date_from`` and ``date_to`` are aggregated.
+
+        Returns ``{status: {"count", "avg_seconds", "p50_seconds", "p90_seconds"}}``.
+        """
+        self.flush_model()
+        company_ids = company_ids or self.env.companies.ids
+        self.env.cr.execute(
+            """
+            SELECT status,
+                   count(*),
+                   avg(dwell),
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY dwell),
+                   percentile_cont(0.9) WITHIN GROUP (ORDER BY dwell)
+              FROM (
+                    SELECT status,
+                           timestamp,
+                           EXTRACT(EPOCH FROM LEAD(timestamp) OVER (
+                               PARTITION BY order_id, order_archive_id ORDER BY timestamp, id
+                           ) - timestamp) AS dwell
+                      FROM ecosire_fleet_order_event
+                     WHERE company_id IN %s
+                       AND (%s IS NULL OR timestamp >= %s)
+                   ) AS events
+             WHERE dwell IS NOT NULL
+               AND (%s IS NULL OR timestamp < %s)
+          GROUP BY status
+            """,
+            (tuple(company_ids), date_from, date_from, date_to, date_to),
+        )
+        return {
+            status: {
+                "count": count,
+                "avg_seconds": float(avg),
+                "p50_seconds": float(p50),
+                "p90_seconds": float(p90),
+            }
+            for status, count, avg, p50, p90 in self.env.cr.fetchall()
+        }
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+# Order statuses counted as completed deliveries by the report.
+COMPLETED_STATUSES = ("completed", "empty_container_return")
+# Order fields feeding the report rows; writes touching them mark the order days dirty.
+REPORT_ORDER_FIELDS = {
+    "status", "status_changed_at", "company_id", "customer_id", "vehicle_id", "driver_id",
+    "container_weight", "bulk_weight", "fare",
+}
+REPORT_COST_LINE_FIELDS = {"order_id", "quantity", "price_unit", "tax_ids"}
+
+DIRTY_TABLE = "ecosire_fleet_order_report_dirty"
+# Columns the report reads, from both the live orders and the archived ones.
+REPORT_SOURCE_COLUMNS = (
+    "status_changed_at, company_id, currency_id, customer_id, vehicle_id, driver_id, status,"
+    " container_weight, bulk_weight, fare, amount_untaxed"
+)
+
+
+class EcosireFleetOrderReport(models.Model):
+    """Daily fleet order KPIs per customer, vehicle and driver.
+
+    Rows live in a summary table refreshed incrementally: order and cost line
+    changes record the days they touch and the refresh cron recomputes only
+    those days. An order is reported on the (UTC) day it reached its current
+    status; archived orders keep being reported.
+    """
+
+    _name = "ecosire.fleet.order.report"
+    _description = "ECOSIRE Fleet Order Analysis"
+    _auto = False
+    _order = "day desc"
+    _rec_name = "day"
+
+    day = fields.Date(string="Day", readonly=True)
+    company_id = fields.Many2one("res.company", string="Company", readonly=True)
+    currency_id = fields.Many2one("res.currency", string="Currency", readonly=True)
+    customer_id = fields.Many2one("res.partner", string="Customer", readonly=True)
+    vehicle_id = fields.Many2one("fleet.vehicle", string="Vehicle", readonly=True)
+    driver_id = fields.Many2one("hr.employee", string="Driver", readonly=True)
+    status = fields.Selection(
+        selection=lambda self: self.env["ecosire.fleet.order"]._fields["status"].selection,
+        string="Status",
+        readonly=True,
+    )
+    order_count = fields.Integer(string="Orders", readonly=True)
+    completed_count = fields.Integer(string="Completed", readonly=True)
+    canceled_count = fields.Integer(string="Canceled", readonly=True)
+    weight_moved = fields.Float(string="Weight Moved", readonly=True)
+    fare_total = fields.Float(string="Fare", readonly=True)
+    revenue_total = fields.Monetary(string="Revenue", readonly=True)
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self._table} (
+                id serial PRIMARY KEY,
+                day date NOT NULL,
+                company_id integer NOT NULL REFERENCES res_company(id) ON DELETE CASCADE,
+                currency_id integer REFERENCES res_currency(id) ON DELETE SET NULL,
+                customer_id integer REFERENCES res_partner(id) ON DELETE SET NULL,
+                vehicle_id integer REFERENCES fleet_vehicle(id) ON DELETE SET NULL,
+                driver_id integer REFERENCES hr_employee(id) ON DELETE SET NULL,
+                status varchar NOT NULL,
+                order_count integer NOT NULL DEFAULT 0,
+                completed_count integer NOT NULL DEFAULT 0,
+                canceled_count integer NOT NULL DEFAULT 0,
+                weight_moved double precision NOT NULL DEFAULT 0,
+                fare_total double precision NOT NULL DEFAULT 0,
+                revenue_total numeric NOT NULL DEFAULT 0
+            )
+        """)
+        self.env.cr.execute(f"CREATE TABLE IF NOT EXISTS {DIRTY_TABLE} (day date PRIMARY KEY)")
+        tools.create_index(self.env.cr, f"{self._table}_day_idx", self._table, ["day"])
+        tools.create_index(self.env.cr, f"{self._table}_company_day_idx", self._table, ["company_id", "day"])
+
+    @api.model
+    def _mark_dirty(self, days):
+        """Queue ``days`` for the next incremental refresh.
+
+        The days are collected for the whole transaction and written to the
+        shared dirty table once, just before commit.
+        """
+        days = {day for day in days if day}
+        if not days:
+            return
+        pending = self.env.cr.precommit.data.setdefault(DIRTY_TABLE, set())
+        if not pending:
+            self.env.cr.precommit.add(self._flush_dirty_days)
+        pending.update(days)
+
+    @api.model
+    def _flush_dirty_days(self):
+        days = sorted(self.env.cr.precommit.data.pop(DIRTY_TABLE, ()))
+        if not days:
+            return
+        self.env.cr.execute(
+            f"INSERT INTO {DIRTY_TABLE} (day) SELECT unnest(%s::date[]) ON CONFLICT DO NOTHING",
+            [days],
+        )
+
+    @api.model
+    def _refresh_days(self, days=None):
+        """Recompute the report rows of ``days``, or of every day when ``days`` is None."""
+        self.env["ecosire.fleet.order"].flush_model()
+        cr = self.env.cr
+        if days is None:
+            cr.execute(f"TRUNCATE {self._table}")
+            where, params = "o.status_changed_at IS NOT NULL", []
+        else:
+            days = sorted(set(days))
+            if not days:
+                return
+            cr.execute(f"DELETE FROM {self._table} WHERE day = ANY(%s::date[])", [days])
+            # The range lets the status_changed_at index narrow the scan before the exact day filter.
+            where = (
+                "o.status_changed_at >= %s AND o.status_changed_at < %s"
+                " AND (o.status_changed_at)::date = ANY(%s::date[])"
+            )
+            params = [days[0], days[-1] + timedelta(days=1), days]
+        cr.execute(
+            f"""
+            INSERT INTO {self._table} (
+                day, company_id, currency_id, customer_id, vehicle_id, driver_id, status,
+                order_count, completed_count, canceled_count, weight_moved, fare_total, revenue_total
+            )
+            SELECT (o.status_changed_at)::date, o.company_id, o.currency_id,
+                   o.customer_id, o.vehicle_id, o.driver_id, o.status,
+                   count(*),
+                   count(*) FILTER (WHERE o.status IN %s),
+                   count(*) FILTER (WHERE o.status = 'canceled'),
+                   COALESCE(sum(COALESCE(o.container_weight, 0) + COALESCE(o.bulk_weight, 0))
+                            FILTER (WHERE o.status IN %s), 0),
+                   COALESCE(sum(o.fare), 0),
+                   COALESCE(sum(o.amount_untaxed), 0)
+              FROM (
+                    SELECT {REPORT_SOURCE_COLUMNS} FROM ecosire_fleet_order
+                     UNION ALL
+                    SELECT {REPORT_SOURCE_COLUMNS} FROM ecosire_fleet_order_archive
+                   ) o
+             WHERE {where}
+          GROUP BY 1, 2, 3, 4, 5, 6, 7
+            """,
+            [COMPLETED_STATUSES, COMPLETED_STATUSES, *params],
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh(self):
+        """Recompute the days touched since the last run."""
+        self.env.cr.flush()
+        self.env.cr.execute(f"DELETE FROM {DIRTY_TABLE} RETURNING day")
+        days = [day for (day,) in self.env.cr.fetchall()]
+        self._refresh_days(days)
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole report and clear the pending days."""
+        self.env.cr.flush()
+        self.env.cr.execute(f"DELETE FROM {DIRTY_TABLE}")
+        self._refresh_days()
+
+
+class EcosireFleetOrder(models.Model):
+    _inherit = "ecosire.fleet.order"
+
+    def _get_report_days(self):
+        return [fields.Date.to_date(order.status_changed_at) for order in self]
+
+    def _ecosire_mark_report_dirty(self):
+        self.env["ecosire.fleet.order.report"]._mark_dirty(self._get_report_days())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        orders._ecosire_mark_report_dirty()
+        return orders
+
+    def write(self, vals):
+        if not REPORT_ORDER_FIELDS.intersection(vals):
+            return super().write(vals)
+        before = self._get_report_days()
+        result = super().write(vals)
+        self.env["ecosire.fleet.order.report"]._mark_dirty(before + self._get_report_days())
+        return result
+
+    def unlink(self):
+        self._ecosire_mark_report_dirty()
+        return super().unlink()
+
+
+class EcosireFleetOrderCostLine(models.Model):
+    _inherit = "ecosire.fleet.order.cost.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.order_id._ecosire_mark_report_dirty()
+        return lines
+
+    def write(self, vals):
+        if not REPORT_COST_LINE_FIELDS.intersection(vals):
+            return super().write(vals)
+        orders = self.order_id
+        result = super().write(vals)
+        (orders | self.order_id)._ecosire_mark_report_dirty()
+        return result
+
+    def unlink(self):
+        self.order_id._ecosire_mark_report_dirty()
+        return super().unlink()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+from odoo import api, fields, models
+
+
+class EcosireFleetOrderCounterMixin(models.AbstractModel):
+    """Fleet order counters maintained incrementally by the order writes.
+
+    Counters are updated in the same transaction as the order changes so
+    dashboards read a handful of rows instead of counting the order table.
+    """
+
+    _name = "ecosire.fleet.order.counter.mixin"
+    _description = "ECOSIRE Fleet Order Counter Mixin"
+    _log_access = False
+
+    company_id = fields.Many2one("res.company", string="Company", required=True, readonly=True, ondelete="cascade")
+    status = fields.Selection(
+        selection=lambda self: self.env["ecosire.fleet.order"]._fields["status"].selection,
+        string="Status",
+        required=True,
+        readonly=True,
+    )
+    order_count = fields.Integer(string="Orders", readonly=True)
+
+    # Columns of the counter key, in the order of the keys given to ``_apply_deltas``.
+    _counter_key_columns = ("company_id", "status")
+
+    @api.model
+    def _apply_deltas(self, deltas):
+        """Add ``deltas`` (``{key: delta}``, keys ordered as the key columns) with one upsert."""
+        values = [key + (delta,) for key, delta in deltas.items() if delta]
+        if not values:
+            return
+        columns = self._counter_key_columns
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {self._table} ({", ".join(columns)}, order_count)
+            VALUES {", ".join(["%s"] * len(values))}
+            ON CONFLICT ({", ".join(columns)})
+            DO UPDATE SET order_count = {self._table}.order_count + EXCLUDED.order_count
+            """,
+            values,
+        )
+        self.invalidate_model(["order_count"])
+
+    @api.model
+    def _rebuild(self):
+        """Recompute every counter from the order table."""
+        columns = self._counter_key_columns
+        group_by = ", ".join(
+            "(create_date AT TIME ZONE 'UTC')::date" if column == "day" else column for column in columns
+        )
+        self.env["ecosire.fleet.order"].flush_model()
+        self.env.cr.execute(f"DELETE FROM {self._table}")
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {self._table} ({", ".join(columns)}, order_count)
+            SELECT {group_by}, count(*)
+              FROM ecosire_fleet_order
+          GROUP BY {group_by}
+            """
+        )
+        self.invalidate_model()
+
+
+class EcosireFleetOrderStatusCount(models.Model):
+    """Number of fleet orders per company and status."""
+
+    _name = "ecosire.fleet.order.status.count"
+    _inherit = "ecosire.fleet.order.counter.mixin"
+    _description = "ECOSIRE Fleet Order Status Counter"
+
+    _sql_constraints = [
+        ("company_status_uniq", "unique(company_id, status)", "One counter per company and status."),
+    ]
+
+
+class EcosireFleetOrderStatusDayCount(models.Model):
+    """Number of fleet orders per company, status and creation day (UTC)."""
+
+    _name = "ecosire.fleet.order.status.day.count"
+    _inherit = "ecosire.fleet.order.counter.mixin"
+    _description = "ECOSIRE Fleet Order Daily Status Counter"
+
+    day = fields.Date(required=True, readonly=True)
+
+    _sql_constraints = [
+        ("company_status_day_uniq", "unique(company_id, status, day)", "One counter per company, status and day."),
+    ]
+
+    _counter_key_columns = ("company_id", "status", "day")
+
+
+class EcosireFleetOrder(models.Model):
+    _inherit = "ecosire.fleet.order"
+
+    def _get_status_count_keys(self):
+        """Return the ``(company_id, status, day)`` counter key of each order."""
+        return [
+            (order.company_id.id, order.status, fields.Date.to_date(order.create_date))
+            for order in self
+        ]
+
+    @api.model
+    def _update_status_counts(self, removed_keys, added_keys):
+        deltas = Counter(added_keys)
+        deltas.subtract(removed_keys)
+        totals = Counter()
+        for (company_id, status, _day), delta in deltas.items():
+            totals[(company_id, status)] += delta
+        self.env["ecosire.fleet.order.status.count"]._apply_deltas(totals)
+        self.env["ecosire.fleet.order.status.day.count"]._apply_deltas(deltas)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        self._update_status_counts([], orders._get_status_count_keys())
+        return orders
+
+    def write(self, vals):
+        if "status" not in vals and "company_id" not in vals:
+            return super().write(vals)
+        before = self._get_status_count_keys()
+        result = super().write(vals)
+        self._update_status_counts(before, self._get_status_count_keys())
+        return result
+
+    def unlink(self):
+        self._update_status_counts(self._get_status_count_keys(), [])
+        return super().unlink()
+
+    @api.model
+    def get_status_counts(self, company_ids=None, date_from=None, date_to=None):
+        """Return ``{status: count}`` for the given companies, read from the maintained counters.
+
+        Without dates the per-company totals are used; with ``date_from`` and/or
+        ``date_to`` (inclusive, on the UTC creation day) the daily counters are summed.
+        Orders moved to ``ecosire.fleet.order.archive`` are deleted from the order
+        table and so are no longer counted.
+        """
+        company_ids = company_ids or self.env.companies.ids
+        if date_from or date_to:
+            counter_model = self.env["ecosire.fleet.order.status.day.count"]
+            domain = [("company_id", "in", company_ids)]
+            if date_from:
+                domain.append(("day", ">=", date_from))
+            if date_to:
+                domain.append(("day", "<=", date_to))
+        else:
+            counter_model = self.env["ecosire.fleet.order.status.count"]
+            domain = [("company_id", "in", company_ids)]
+        counts = dict.fromkeys(dict(self._fields["status"].selection), 0)
+        for status, count in counter_model.sudo()._read_group(domain, ["status"], ["order_count:sum"]):
+            counts[status] = count
+        return counts
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from odoo import api, models
+
+from ..tools import geo
+from ..tools.routing import plan_route
+
+# Stops of an order in the order they must be visited: (kind, latitude field, longitude field).
+ORDER_STOPS = [
+    ("pickup", "pickup_location_lat", "pickup_location_lng"),
+    ("yard_dropoff", "yard_dropoff_location_lat", "yard_dropoff_location_lng"),
+    ("drop_off", "drop_off_location_lat", "drop_off_location_lng"),
+    ("empty_dropoff", "empty_dropoff_location_lat", "empty_dropoff_location_lng"),
+]
+
+
+class EcosireFleetRoutePlanner(models.AbstractModel):
+    """Sequences the stops of a driver's orders for a day.
+
+    Every order contributes its located stops as a chain that must be visited
+    in order (pickup, yard drop-off, drop-off, empty container return); the
+    chains are merged into one route with nearest insertion and improved with
+    precedence-preserving 2-opt moves.
+    """
+
+    _name = "ecosire.fleet.route.planner"
+    _description = "ECOSIRE Fleet Route Planner"
+
+    @api.model
+    def _get_driver_orders(self, driver, day):
+        return self.env["ecosire.fleet.order"].search([
+            ("driver_id", "=", driver.id),
+            ("expected_delivery_date", "=", day),
+            ("status", "not in", ("canceled", "completed", "empty_container_return")),
+        ], order="id")
+
+    @api.model
+    def _get_order_stops(self, orders):
+        """Return the located stops of ``orders`` as ``(order, kind, lat, lng)`` chains."""
+        chains = []
+        for order in orders:
+            chain = [
+                (order, kind, order[lat_field], order[lng_field])
+                for kind, lat_field, lng_field in ORDER_STOPS
+                if geo.has_coordinates(order[lat_field], order[lng_field])
+            ]
+            if chain:
+                chains.append(chain)
+        return chains
+
+    @api.model
+    def plan_orders(self, orders, start_point=None):
+        """Return the stop sequence covering ``orders``, optionally starting from ``start_point``.
+
+        Returns ``{"stops": [...], "total_km": float}`` where each stop is a dict
+        with ``order_id``, ``order_no``, ``kind``, ``lat``, ``lng`` and ``leg_km``
+        (distance from the previous stop, or from ``start_point``).
+        """
+        chains = self._get_order_stops(orders)
+        stops = [stop for chain in chains for stop in chain]
+        points = [(lat, lng) for _order, _kind, lat, lng in stops]
+        if start_point:
+            points.append(tuple(start_point))
+        if not stops:
+            return {"stops": [], "total_km": 0.0}
+
+        lat, lng = np.array(points, dtype=float).T
+        dist = geo.haversine_km_array(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+        node_chains = []
+        node = 0
+        for chain in chains:
+            node_chains.append(list(range(node, node + len(chain))))
+            node += len(chain)
+        start = len(stops) if start_point else None
+        route, total = plan_route(dist, node_chains, start=start)
+
+        result = []
+        previous = start
+        for index in route:
+            order, kind, stop_lat, stop_lng = stops[index]
+            result.append({
+                "order_id": order.id,
+                "order_no": order.order_no,
+                "kind": kind,
+                "lat": stop_lat,
+                "lng": stop_lng,
+                "leg_km": round(float(dist[previous, index]), 3) if previous is not None else 0.0,
+            })
+            previous = index
+        return {"stops": result, "total_km": round(total, 3)}
+
+    @api.model
+    def plan_driver_day(self, driver, day, start_point=None):
+        """Return the stop sequence of the orders assigned to ``driver`` (``hr.employee``) on ``day``.
+
+        The route starts from ``start_point`` when given, otherwise from the
+        current position of the driver's vehicle when known.
+        """
+        orders = self._get_driver_orders(driver, day)
+        if not start_point:
+            vehicle = orders.vehicle_id[:1]
+            if vehicle and geo.has_coordinates(vehicle.current_location_lat, vehicle.current_location_lng):
+                start_point = (vehicle.current_location_lat, vehicle.current_location_lng)
+        return self.plan_orders(orders, start_point=start_point)
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+
+import numpy as np
+
+from odoo import _, api, fields, models, tools
+from odoo.tools import groupby
+
+from ..tools.tariff import TariffTable
+
+_logger = logging.getLogger(__name__)
+
+# Statuses of orders whose tariff fare follows tariff edits.
+REPRICE_STATUSES = ("created", "dispatched")
+# Order fields a tariff fare depends on.
+PRICING_FIELDS = {
+    "company_id", "cargo_type", "cargo_size", "container_weight", "bulk_weight", "line_ids", "items",
+    "pickup_location_lat", "pickup_location_lng", "drop_off_location_lat", "drop_off_location_lng",
+}
+REPRICE_CRON = "ecosire_fleet_api.ir_cron_ecosire_fleet_order_reprice"
+# Key of the tariff changes collected in the transaction's precommit data.
+TARIFF_CHANGES = "ecosire.fleet.tariff.changed"
+# Per-company counter bumped by every committed tariff change; the tariff tables are cached under it.
+VERSION_TABLE = "ecosire_fleet_tariff_version"
+
+
+def _normalize_cargo_size(cargo_size):
+    return (cargo_size or "").strip().lower()
+
+
+class EcosireFleetTariff(models.Model):
+    """Fare tariff of a cargo type (and optionally a cargo size) for a company.
+
+    The tariff lines form a grid of distance x weight brackets; see
+    :class:`~odoo.addons.ecosire_fleet_api.tools.tariff.TariffTable`. Each
+    company's tariffs are loaded once per registry into array-backed tables,
+    cached under a version of the company's tariffs. Tariff and line changes
+    are collected per transaction: just before commit the version counter of
+    the changed companies is incremented and the open tariff-priced orders are
+    repriced by the cron.
+    """
+
+    _name = "ecosire.fleet.tariff"
+    _description = "ECOSIRE Fleet Tariff"
+    _order = "sequence, id"
+
+    name = fields.Char(required=True)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
+    currency_id = fields.Many2one(related="company_id.currency_id", string="Currency")
+    cargo_type = fields.Selection(
+        selection=lambda self: self.env["ecosire.fleet.order"]._fields["cargo_type"].selection, required=True
+    )
+    cargo_size = fields.Char(help="Cargo size the tariff applies to, e.g. 20FT. Leave empty for any size.")
+    minimum_fare = fields.Monetary(string="Minimum Fare")
+    line_ids = fields.One2many("ecosire.fleet.tariff.line", "tariff_id", string="Brackets", copy=True)
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+                company_id integer PRIMARY KEY REFERENCES res_company(id) ON DELETE CASCADE,
+                version bigint NOT NULL
+            )
+        """)
+
+    @api.model
+    def _get_tariff_tables(self, company_id):
+        """Return ``{(cargo_type, cargo size): TariffTable}`` of the company ``company_id``.
+
+        When several tariffs share a key, the first one in sequence wins. The
+        result is cached per registry and version of the company's tariffs; never
+        mutate it. Tariffs changed by the current transaction are read uncached.
+        """
+        if company_id in self.env.cr.precommit.data.get(TARIFF_CHANGES, ()):
+            return self._load_tariff_tables(company_id)
+        return self._get_cached_tariff_tables(company_id, self._get_tariff_version(company_id))
+
+    @api.model
+    def _get_tariff_version(self, company_id):
+        self.env.cr.execute(f"SELECT version FROM {VERSION_TABLE} WHERE company_id = %s", [company_id])
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    @tools.ormcache("company_id", "version")
+    def _get_cached_tariff_tables(self, company_id, version):
+        return self._load_tariff_tables(company_id)
+
+    @api.model
+    def _load_tariff_tables(self, company_id):
+        tariffs = self.sudo().with_context(active_test=True).search([("company_id", "=", company_id)])
+        tables = {}
+        for tariff in tariffs:
+            key = (tariff.cargo_type, _normalize_cargo_size(tariff.cargo_size))
+            if key not in tables:
+                tables[key] = TariffTable(
+                    [
+                        (line.distance_from, line.weight_from, line.base_amount, line.price_per_km, line.price_per_ton)
+                        for line in tariff.line_ids
+                    ],
+                    tariff.minimum_fare,
+                )
+        return tables
+
+    def _tariffs_changed(self):
+        """Queue these tariffs for a new version and a repricing run at the end of the transaction."""
+        if not self:
+            return
+        precommit = self.env.cr.precommit
+        if TARIFF_CHANGES not in precommit.data:
+            precommit.data[TARIFF_CHANGES] = set()
+            precommit.add(self._flush_tariff_changes)
+        precommit.data[TARIFF_CHANGES].update(self.sudo().company_id.ids)
+
+    @api.model
+    def _flush_tariff_changes(self):
+        company_ids = self.env.cr.precommit.data.pop(TARIFF_CHANGES, None)
+        if not company_ids:
+            return
+        # The increment waits for concurrent bumps of the same company, so versions grow in commit order.
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {VERSION_TABLE} AS v (company_id, version)
+            SELECT unnest(%s::int[]), 1
+            ON CONFLICT (company_id) DO UPDATE SET version = v.version + 1
+            """,
+            [sorted(company_ids)],
+        )
+        self.env.ref(REPRICE_CRON).sudo()._trigger()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tariffs = super().create(vals_list)
+        tariffs._tariffs_changed()
+        return tariffs
+
+    def write(self, vals):
+        if "company_id" in vals:
+            self._tariffs_changed()
+        result = super().write(vals)
+        self._tariffs_changed()
+        return result
+
+    def unlink(self):
+        self._tariffs_changed()
+        return super().unlink()
+
+
+class EcosireFleetTariffLine(models.Model):
+    """Rates of a tariff from a distance and a weight onwards."""
+
+    _name = "ecosire.fleet.tariff.line"
+    _description = "ECOSIRE Fleet Tariff Bracket"
+    _order = "tariff_id, distance_from, weight_from, id"
+
+    tariff_id = fields.Many2one("ecosire.fleet.tariff", required=True, ondelete="cascade", index=True)
+    currency_id = fields.Many2one(related="tariff_id.currency_id")
+    distance_from = fields.Float(string="From Distance (km)", required=True, default=0.0)
+    weight_from = fields.Float(string="From Weight (kg)", required=True, default=0.0)
+    base_amount = fields.Monetary(string="Base Amount")
+    price_per_km = fields.Monetary(string="Price per km")
+    price_per_ton = fields.Monetary(string="Price per Ton")
+
+    _sql_constraints = [
+        (
+            "bracket_uniq",
+            "unique(tariff_id, distance_from, weight_from)",
+            "A tariff can only have one bracket per distance and weight.",
+        ),
+        ("bracket_positive", "CHECK(distance_from >= 0 AND weight_from >= 0)", "Brackets start at zero or more."),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.tariff_id._tariffs_changed()
+        return lines
+
+    def write(self, vals):
+        tariffs = self.tariff_id
+        result = super().write(vals)
+        (tariffs | self.tariff_id)._tariffs_changed()
+        return result
+
+    def unlink(self):
+        self.tariff_id._tariffs_changed()
+        return super().unlink()
+
+
+class EcosireFleetOrder(models.Model):
+    _inherit = "ecosire.fleet.order"
+
+    fare_from_tariff = fields.Boolean(
+        string="Fare from Tariff",
+        copy=False,
+        readonly=True,
+        help="The fare was computed from the tariffs and follows their changes while the order is open. "
+             "Setting the fare by hand stops that.",
+    )
+
+    def init(self):
+        super().init()
+        tools.create_index(
+            self._cr,
+            "ecosire_fleet_order_tariff_reprice_idx",
+            self._table,
+            ["id"],
+            where=f"fare_from_tariff AND status IN {tuple(REPRICE_STATUSES)!r}",
+        )
+
+    def _compute_tariff_fares(self):
+        """Return ``{order id: fare}`` of the orders a tariff applies to.
+
+        Orders are grouped by company and tariff, and each group is priced in a
+        single vectorized lookup. The weight is the container or bulk weight,
+        falling back to the weight of the order lines.
+        """
+        Tariff = self.env["ecosire.fleet.tariff"]
+        fares = {}
+        for company, company_orders in groupby(self, key=lambda order: order.company_id):
+            tables = Tariff._get_tariff_tables(company.id)
+            if not tables:
+                continue
+
+            def table_key(order):
+                key = (order.cargo_type, _normalize_cargo_size(order.cargo_size))
+                return key if key in tables else (order.cargo_type, "")
+
+            for key, orders in groupby(company_orders, key=table_key):
+                table = tables.get(key)
+                if table is None:
+                    continue
+                distances = [order.trip_distance_km for order in orders]
+                weights = [
+                    (order.container_weight if order.cargo_type == "container" else order.bulk_weight)
+                    or order.total_weight
+                    for order in orders
+                ]
+                for order, fare in zip(orders, table.price(distances, weights)):
+                    if not np.isnan(fare):
+                        fares[order.id] = round(float(fare), 2)
+        return fares
+
+    def _apply_tariff_fares(self):
+        """Set the tariff fare of these orders with one UPDATE and return the ids of the changed orders."""
+        fares = self._compute_tariff_fares()
+        if not fares:
+            return []
+        self.flush_recordset(["fare", "fare_from_tariff"])
+        self.env.cr.execute(
+            """
+            UPDATE ecosire_fleet_order AS o
+               SET fare = v.fare, fare_from_tariff = TRUE, write_date = %s, write_uid = %s
+              FROM unnest(%s::int[], %s::float8[]) AS v(id, fare)
+             WHERE o.id = v.id
+               AND (o.fare IS DISTINCT FROM v.fare OR o.fare_from_tariff IS NOT TRUE)
+         RETURNING o.id
+            """,
+            (fields.Datetime.now(), self.env.uid, list(fares), list(fares.values())),
+        )
+        changed_ids = [order_id for (order_id,) in self.env.cr.fetchall()]
+        self.invalidate_model(["fare", "fare_from_tariff", "write_date", "write_uid"])
+        if changed_ids:
+            self.browse(changed_ids)._ecosire_mark_report_dirty()
+        return changed_ids
+
+    @api.model
+    def _cron_reprice_orders(self, chunk_size=10000):
+        """Reprice the open tariff-priced orders after tariff changes, in id-ordered chunks.
+
+        Commits after each chunk outside of tests.
+        """
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        domain = [("fare_from_tariff", "=", True), ("status", "in", REPRICE_STATUSES)]
+        last_id = 0
+        total = 0
+        while True:
+            orders = self.search(domain + [("id", ">", last_id)], order="id", limit=chunk_size)
+            if not orders:
+                break
+            total += len(orders._apply_tariff_fares())
+            last_id = orders[-1].id
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        _logger.info("Repriced %s fleet orders.", total)
+        return total
+
+    def action_apply_tariff(self):
+        """Price the selected open orders from the tariffs."""
+        orders = self.filtered(lambda order: order.status in REPRICE_STATUSES)
+        orders._apply_tariff_fares()
+        priced = orders.filtered("fare_from_tariff")
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "success" if priced else "warning",
+                "message": _(
+                    "%(priced)s of %(count)s orders priced from the tariffs.", priced=len(priced), count=len(self)
+                ),
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        # An explicit fare, zero included, is kept.
+        unpriced = self.browse([order.id for order, vals in zip(orders, vals_list) if "fare" not in vals])
+        if unpriced:
+            unpriced._apply_tariff_fares()
+        return orders
+
+    def write(self, vals):
+        if "fare" in vals and "fare_from_tariff" not in vals:
+            vals = dict(vals, fare_from_tariff=False)
+        result = super().write(vals)
+        if PRICING_FIELDS.intersection(vals):
+            self.filtered(
+                lambda order: order.fare_from_tariff and order.status in REPRICE_STATUSES
+            )._apply_tariff_fares()
+        return result
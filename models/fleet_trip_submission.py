@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import _, api, fields, models
+from odoo.tools import split_every
+
+from ..tools.http_session import get_http_session
+from ..tools.ratelimit import TokenBucket
+from ..tools.serialization import compile_serializer
+
+
+_logger = logging.getLogger(__name__)
+
+# Statuses in which an order's trip may be declared, once a vehicle and a driver are assigned.
+TRIP_SUBMISSION_STATUSES = ("dispatched", "started")
+# Trip payload: key -> order field path.
+TRIP_PAYLOAD_SPEC = (
+    ("reference", "id"),
+    ("order_no", "order_no"),
+    ("external_order_id", "external_order_id"),
+    ("cargo_type", "cargo_type"),
+    ("cargo_size", "cargo_size"),
+    ("container_number", "container_number"),
+    ("container_weight", "container_weight"),
+    ("bulk_weight", "bulk_weight"),
+    ("total_weight", "total_weight"),
+    ("total_quantity", "total_quantity"),
+    ("bill_of_lading_number", "bill_of_lading_number"),
+    ("customer_name", "customer_id.name"),
+    ("customer_vat", "customer_id.vat"),
+    ("vehicle_plate", "vehicle_id.license_plate"),
+    ("driver_name", "driver_id.name"),
+    ("driver_identification", "driver_id.identification_id"),
+    ("driver_phone", "driver_id.mobile_phone"),
+    ("pickup_lat", "pickup_location_lat"),
+    ("pickup_lng", "pickup_location_lng"),
+    ("pickup_address", "pickup_location_address"),
+    ("pickup_city", "pickup_location_city_new"),
+    ("drop_off_lat", "drop_off_location_lat"),
+    ("drop_off_lng", "drop_off_location_lng"),
+    ("drop_off_address", "drop_off_location_address"),
+    ("drop_off_city", "drop_off_location_city_new"),
+    ("expected_delivery_date", "expected_delivery_date"),
+    ("fare", "fare"),
+)
+# Order field -> key of the submission result it is filled from.
+RESULT_FIELDS = (
+    ("bayan_trip_id", "trip_id"),
+    ("waybill_id", "waybill_id"),
+    ("bayan_number", "bayan_number"),
+)
+
+_token_bucket_lock = threading.Lock()
+_token_buckets = {}
+
+
+def _get_token_bucket(rate):
+    """Return the worker's shared token bucket for ``rate`` requests per second."""
+    key = (os.getpid(), rate)
+    bucket = _token_buckets.get(key)
+    if bucket is None:
+        with _token_bucket_lock:
+            bucket = _token_buckets.setdefault(key, TokenBucket(rate))
+    return bucket
+
+
+class HttpTripTransport:
+    """Sends batches of trip payloads to the trip registration service.
+
+    Posts ``{"trips": [...]}`` as JSON and reads ``{"results": [...]}`` back.
+    ``send`` runs in worker threads and must not touch the ORM. It returns one
+    result dict per trip, keyed by the trip ``reference``, with the ``trip_id``,
+    ``waybill_id`` and ``bayan_number`` assigned by the service or an ``error``.
+    Other transports only need the same ``send`` method.
+    """
+
+    def __init__(self, url, session, timeout=30):
+        self.url = url
+        self.session = session
+        self.timeout = timeout
+
+    def send(self, trips):
+        response = self.session.post(self.url, json={"trips": trips}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get("results") or []
+
+
+class EcosireFleetTripSubmitter(models.AbstractModel):
+    """Submits fleet order trips (Bayan waybills) in rate-limited, parallel batches."""
+
+    _name = "ecosire.fleet.trip.submitter"
+    _description = "ECOSIRE Fleet Trip Submitter"
+
+    @api.model
+    def _get_param(self, key, default):
+        return self.env["ir.config_parameter"].sudo().get_param(f"ecosire_fleet_api.{key}", default=default)
+
+    @api.model
+    def _get_eligible_domain(self):
+        return [
+            ("status", "in", TRIP_SUBMISSION_STATUSES),
+            ("vehicle_id", "!=", False),
+            ("driver_id", "!=", False),
+            "|", ("bayan_trip_id", "=", False), ("bayan_trip_id", "=", 0),
+        ]
+
+    @api.model
+    def _get_transport(self):
+        """Return the transport trips are sent with; override to plug another one.
+
+        System parameters: ``ecosire_fleet_api.upload_base_url`` (default
+        ``http://app:8001``) and ``ecosire_fleet_api.trip_submission_concurrency``.
+        """
+        base_url = (self._get_param("upload_base_url", "http://app:8001") or "").rstrip("/")
+        session = get_http_session(self._get_concurrency())
+        return HttpTripTransport(f"{base_url}/api/v1/bayan/trips", session)
+
+    @api.model
+    def _get_concurrency(self):
+        """System parameter: ``ecosire_fleet_api.trip_submission_concurrency``, default ``4``."""
+        return max(int(self._get_param("trip_submission_concurrency", 4)), 1)
+
+    @api.model
+    def _get_rate(self):
+        """System parameter: ``ecosire_fleet_api.trip_submission_rate`` (requests per second), default ``5``."""
+        return max(float(self._get_param("trip_submission_rate", 5)), 0.1)
+
+    @api.model
+    def _get_batch_size(self):
+        """System parameter: ``ecosire_fleet_api.trip_submission_batch_size``, default ``50``."""
+        return max(int(self._get_param("trip_submission_batch_size", 50)), 1)
+
+    @api.model
+    def _serialize_trips(self, orders):
+        return compile_serializer(orders, TRIP_PAYLOAD_SPEC)(orders)
+
+    @api.model
+    def _send_batches(self, batches):
+        """Send ``batches`` of trips in parallel and return the results of every trip by reference.
+
+        At most the configured concurrency of requests are in flight and their
+        start is held to the configured rate. A failed request marks all of its
+        trips with the error.
+        """
+        transport = self._get_transport()
+        bucket = _get_token_bucket(self._get_rate())
+
+        def send(trips):
+            bucket.acquire()
+            try:
+                return trips, transport.send(trips)
+            except Exception as error:
+                _logger.warning("Trip submission of %s orders failed: %s", len(trips), error)
+                return trips, [{"reference": trip["reference"], "error": str(error)} for trip in trips]
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self._get_concurrency(), len(batches))) as executor:
+            for trips, batch_results in executor.map(send, batches):
+                by_reference = {result.get("reference"): result for result in batch_results}
+                for trip in trips:
+                    results[trip["reference"]] = by_reference.get(trip["reference"]) or {
+                        "error": _("No result returned for this trip."),
+                    }
+        return results
+
+    @api.model
+    def _write_results(self, results):
+        """Store the submission ``results`` ({order id: result}) on the orders.
+
+        Orders sharing the same values (e.g. the same error) are written together.
+        """
+        now = fields.Datetime.now()
+        order_ids_by_vals = defaultdict(list)
+        for order_id, result in results.items():
+            error = result.get("error")
+            if not error and not result.get("trip_id"):
+                error = _("The service did not return a trip id.")
+            vals = {"bayan_submission_error": error or False}
+            if not error:
+                vals["bayan_submitted_at"] = now
+            for field_name, key in RESULT_FIELDS:
+                if result.get(key):
+                    vals[field_name] = result[key]
+            order_ids_by_vals[tuple(sorted(vals.items()))].append(order_id)
+        Order = self.env["ecosire.fleet.order"]
+        for vals, order_ids in order_ids_by_vals.items():
+            Order.browse(order_ids).write(dict(vals))
+
+    @api.model
+    def submit(self, orders):
+        """Submit the trips of the eligible ``orders`` and return ``{order id: result}``.
+
+        Orders are serialized in batches, sent through the transport and the
+        returned trip ids, waybill ids and Bayan numbers (or errors) are written
+        back once all batches are done.
+        """
+        orders = orders.filtered_domain(self._get_eligible_domain())
+        if not orders:
+            return {}
+        orders.flush_model()
+        batches = [
+            self._serialize_trips(batch) for batch in split_every(self._get_batch_size(), orders.ids, orders.browse)
+        ]
+        results = self._send_batches(batches)
+        self._write_results(results)
+        return results
+
+    @api.model
+    def _cron_submit_trips(self, limit=1000):
+        orders = self.env["ecosire.fleet.order"].search(self._get_eligible_domain(), limit=limit, order="id")
+        results = self.submit(orders)
+        failed = sum(1 for result in results.values() if result.get("error"))
+        _logger.info("Submitted %s fleet order trips, %s failed.", len(results) - failed, failed)
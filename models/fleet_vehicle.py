@@ -49,6 +49,22 @@ class FleetVehicle(models.Model):
         ('other', 'Other')
     ], string='Vehicle Category', help='Category/type of the vehicle for fleet management')
     
+    # Dispatch information
+    payload_capacity = fields.Float(
+        string='Payload Capacity (kg)',
+        help='Maximum cargo weight the vehicle can carry; leave empty for no limit'
+    )
+
+    current_location_lat = fields.Float(
+        string='Current Latitude',
+        help='Last known latitude of the vehicle, used when dispatching orders'
+    )
+
+    current_location_lng = fields.Float(
+        string='Current Longitude',
+        help='Last known longitude of the vehicle, used when dispatching orders'
+    )
+
     # Computed field for formatted plate display
     formatted_plate = fields.Char(
         string='Formatted Plate',
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+
+_logger = logging.getLogger(__name__)
+
+
+class EcosireInvoiceUploadJob(models.Model):
+    """Outbox entry for uploading a posted invoice PDF to the external API.
+
+    Posting an invoice only enqueues a job; the ``Invoice PDF Upload`` cron
+    drains the queue outside the posting transaction, retrying failures with
+    exponential backoff and dead-lettering jobs that exhaust their attempts.
+    """
+
+    _name = "ecosire.invoice.upload.job"
+    _description = "ECOSIRE Invoice Upload Job"
+    _order = "next_attempt_at, id"
+    _rec_name = "move_id"
+
+    move_id = fields.Many2one(
+        "account.move", string="Invoice", required=True, index=True, ondelete="cascade"
+    )
+    company_id = fields.Many2one(
+        related="move_id.company_id", comodel_name="res.company", string="Company", store=True, readonly=True
+    )
+    external_order_id = fields.Char(string="External ID", readonly=True)
+    state = fields.Selection(
+        selection=[
+            ("pending", "Pending"),
+            ("done", "Uploaded"),
+            ("dead", "Failed"),
+        ],
+        default="pending",
+        required=True,
+        readonly=True,
+    )
+    attempt_count = fields.Integer(string="Attempts", readonly=True)
+    next_attempt_at = fields.Datetime(
+        string="Next Attempt", default=fields.Datetime.now, readonly=True
+    )
+    last_attempt_at = fields.Datetime(string="Last Attempt", readonly=True)
+    response_status = fields.Integer(string="Response Status", readonly=True)
+    last_error = fields.Text(string="Last Error", readonly=True)
+    pdf_hash = fields.Char(
+        string="PDF Hash",
+        readonly=True,
+        help="Hash of the invoice PDF acknowledged by the remote service.",
+    )
+    pdf_file = fields.Binary(
+        string="Rendered PDF",
+        attachment=True,
+        copy=False,
+        readonly=True,
+        help="PDF rendered for this upload, reused by retries while the invoice is unchanged.",
+    )
+    pdf_file_hash = fields.Char(
+        string="Rendered PDF Hash",
+        copy=False,
+        readonly=True,
+        help="Hash of the rendering-relevant invoice values the rendered PDF comes from.",
+    )
+
+    def init(self):
+        tools.create_index(
+            self._cr,
+            "ecosire_invoice_upload_job_pending_idx",
+            self._table,
+            ["next_attempt_at", "id"],
+            where="state = 'pending'",
+        )
+        tools.create_index(
+            self._cr,
+            "ecosire_invoice_upload_job_acknowledged_idx",
+            self._table,
+            ["external_order_id", "pdf_hash"],
+            where="state = 'done'",
+        )
+
+    # -------------------------------------------------------------------------
+    # Queue API
+    # -------------------------------------------------------------------------
+    @api.model
+    def _enqueue(self, moves):
+        """Create one pending job per move and point the moves to it."""
+        if not moves:
+            return self
+        jobs = self.sudo().create([
+            {"move_id": move.id, "external_order_id": move.external_order_id}
+            for move in moves
+        ])
+        for move, job in zip(moves, jobs):
+            move.sudo().ecosire_upload_job_id = job
+        cron = self.env.ref("ecosire_fleet_api.ir_cron_ecosire_invoice_upload", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return jobs
+
+    @api.model
+    def _get_acknowledged_hashes(self, keys):
+        """Return which ``(external_order_id, pdf_hash)`` pairs were already uploaded."""
+        keys = [(external_id, pdf_hash) for external_id, pdf_hash in keys if external_id and pdf_hash]
+        if not keys:
+            return set()
+        self.flush_model(["state", "external_order_id", "pdf_hash"])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT external_order_id, pdf_hash
+              FROM ecosire_invoice_upload_job
+             WHERE state = 'done'
+               AND (external_order_id, pdf_hash) IN %s
+            """,
+            (tuple(keys),),
+        )
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _get_retry_policy(self):
+        """Return ``(max_attempts, base_delay_seconds, max_delay_seconds)``.
+
+        System parameters: ``ecosire_fleet_api.upload_max_attempts`` (default 8),
+        ``ecosire_fleet_api.upload_retry_base_seconds`` (default 60) and
+        ``ecosire_fleet_api.upload_retry_max_seconds`` (default 21600).
+        """
+        params = self.env["ir.config_parameter"].sudo()
+        return (
+            int(params.get_param("ecosire_fleet_api.upload_max_attempts", default=8)),
+            int(params.get_param("ecosire_fleet_api.upload_retry_base_seconds", default=60)),
+            int(params.get_param("ecosire_fleet_api.upload_retry_max_seconds", default=21600)),
+        )
+
+    @api.model
+    def _claim_due_jobs(self, limit):
+        """Lock and return up to ``limit`` due pending jobs, skipping jobs locked elsewhere."""
+        self.env.cr.execute(
+            """
+            SELECT id
+              FROM ecosire_invoice_upload_job
+             WHERE state = 'pending'
+               AND next_attempt_at <= %s
+          ORDER BY next_attempt_at, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            (fields.Datetime.now(), limit),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=50, max_batches=20):
+        """Drain due upload jobs in batches, committing after each batch."""
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        for _batch in range(max_batches):
+            jobs = self._claim_due_jobs(batch_size)
+            if not jobs:
+                break
+            jobs._process()
+            if auto_commit:
+                self.env.cr.commit()
+
+    # -------------------------------------------------------------------------
+    # Processing
+    # -------------------------------------------------------------------------
+    def _get_pdf_attachments(self):
+        return self.env["ir.attachment"].sudo().search([
+            ("res_model", "=", self._name),
+            ("res_field", "=", "pdf_file"),
+            ("res_id", "in", self.ids),
+        ])
+
+    def _process(self):
+        results = self.move_id._ecosire_upload_invoice_pdfs()
+        for job in self:
+            result = results.get(job.move_id.id)
+            if isinstance(result, Exception):
+                _logger.warning(
+                    "Upload of invoice PDF for %s failed (attempt %s): %s",
+                    job.move_id.name,
+                    job.attempt_count + 1,
+                    result,
+                )
+                job._mark_failed(result)
+            else:
+                job._mark_done(result)
+
+    def _mark_done(self, response=None):
+        self.ensure_one()
+        self.write({
+            "state": "done",
+            "pdf_hash": self.move_id._ecosire_compute_pdf_hash(),
+            "attempt_count": self.attempt_count + 1,
+            "last_attempt_at": fields.Datetime.now(),
+            "response_status": getattr(response, "status_code", 0),
+            "last_error": False,
+            # Acknowledged PDFs are never sent again; drop the rendered copy.
+            "pdf_file": False,
+        })
+
+    def _mark_failed(self, error):
+        """Schedule the next attempt with exponential backoff, or dead-letter the job."""
+        self.ensure_one()
+        max_attempts, base_delay, max_delay = self._get_retry_policy()
+        attempts = self.attempt_count + 1
+        now = fields.Datetime.now()
+        vals = {
+            "attempt_count": attempts,
+            "last_attempt_at": now,
+            "response_status": getattr(getattr(error, "response", None), "status_code", 0) or 0,
+            "last_error": str(error),
+        }
+        if attempts >= max_attempts:
+            vals["state"] = "dead"
+            _logger.error(
+                "Giving up upload of invoice PDF for %s after %s attempts.", self.move_id.name, attempts
+            )
+        else:
+            delay = min(base_delay * 2 ** (attempts - 1), max_delay)
+            vals["next_attempt_at"] = now + timedelta(seconds=delay)
+        self.write(vals)
+
+    def action_retry(self):
+        """Requeue failed jobs for an immediate attempt."""
+        self.filtered(lambda job: job.state == "dead").write({
+            "state": "pending",
+            "attempt_count": 0,
+            "next_attempt_at": fields.Datetime.now(),
+        })
+        self.env.ref("ecosire_fleet_api.ir_cron_ecosire_invoice_upload").sudo()._trigger()
+        return True
@@ -10,6 +10,10 @@ class SaleOrder(models.Model):
         "ecosire.fleet.order", string="Fleet Order", index=True
     )
 
+    fleet_order_archive_id = fields.Many2one(
+        "ecosire.fleet.order.archive", string="Archived Fleet Order", index="btree_not_null", readonly=True
+    )
+
     external_order_id = fields.Char(
         string="External ID",
         index=True,
@@ -2,3 +2,10 @@
 
 from . import test_driver_contacts
 from . import test_fleet_vehicle
+from . import test_fleet_order
+from . import test_invoice_upload
+from . import test_fleet_geo
+from . import test_fleet_dispatch
+from . import test_fleet_route
+from . import test_fleet_trip_submission
+from . import test_fleet_tariff
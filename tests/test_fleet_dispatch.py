@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+import numpy as np
+
+from odoo.addons.ecosire_fleet_api.tools.assignment import INFEASIBLE, _hungarian, solve_assignment
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestFleetDispatch(TransactionCase):
+    """Test cases for the driver/vehicle dispatch optimizer in ECOSIRE Fleet API module."""
+
+    def setUp(self):
+        super().setUp()
+        self.order_model = self.env['ecosire.fleet.order']
+        self.customer = self.env['res.partner'].create({'name': 'Dispatch Customer'})
+        brand = self.env['fleet.vehicle.model.brand'].create({'name': 'Volvo'})
+        self.vehicle_model_id = self.env['fleet.vehicle.model'].create({'name': 'FH', 'brand_id': brand.id})
+
+    def _create_unit(self, name, lat, lng, category='truck', license_class='class_a', capacity=0.0):
+        driver = self.env['res.partner'].create({
+            'name': name,
+            'contact_type': 'driver',
+            'driver_license_class': license_class,
+        })
+        employee = self.env['hr.employee'].create({'name': name, 'work_contact_id': driver.id})
+        vehicle = self.env['fleet.vehicle'].create({
+            'model_id': self.vehicle_model_id.id,
+            'driver_id': driver.id,
+            'vehicle_category': category,
+            'payload_capacity': capacity,
+            'current_location_lat': lat,
+            'current_location_lng': lng,
+        })
+        return vehicle, employee
+
+    def _create_order(self, lat, lng, cargo_type='container', weight=0.0):
+        return self.order_model.create({
+            'order_type': 'transport',
+            'cargo_type': cargo_type,
+            'delivery_type': 'client',
+            'customer_id': self.customer.id,
+            'pickup_location_lat': lat,
+            'pickup_location_lng': lng,
+            'bulk_weight' if cargo_type == 'bulk' else 'container_weight': weight,
+        })
+
+    def test_solver_matches_brute_force(self):
+        """Test that the assignment is optimal and skips infeasible pairs."""
+        cost = np.array([[4.0, 1.0, 3.0], [2.0, 0.0, 5.0], [3.0, 2.0, 2.0]])
+        self.assertEqual(sorted(solve_assignment(cost)), [(0, 1), (1, 0), (2, 2)])
+        self.assertEqual(list(_hungarian(cost)), [1, 0, 2])
+
+        cost = np.array([[INFEASIBLE, INFEASIBLE], [1.0, 2.0], [5.0, 1.0]])
+        self.assertEqual(sorted(solve_assignment(cost)), [(1, 0), (2, 1)])
+
+    def test_solver_benchmark_500x500(self):
+        """Benchmark: a 500 x 500 dispatch is solved well under a few seconds."""
+        cost = np.random.default_rng(42).random((500, 500)) * 100
+
+        start = time.perf_counter()
+        pairs = solve_assignment(cost)
+        elapsed = time.perf_counter() - start
+        numpy_start = time.perf_counter()
+        columns = _hungarian(cost)
+        numpy_elapsed = time.perf_counter() - numpy_start
+        _logger.info("500x500 assignment: %.3fs (solver), %.3fs (NumPy Hungarian)", elapsed, numpy_elapsed)
+
+        self.assertEqual(len(pairs), 500)
+        self.assertAlmostEqual(
+            sum(cost[row, column] for row, column in pairs), cost[np.arange(500), columns].sum()
+        )
+        self.assertLess(numpy_elapsed, 5.0)
+
+    def test_dispatch_assigns_nearest_compatible_units(self):
+        """Test that orders get the nearest compatible vehicle and driver and are dispatched."""
+        jeddah_truck = self._create_unit('Jeddah Driver', 21.48, 39.17)
+        riyadh_truck = self._create_unit('Riyadh Driver', 24.71, 46.67)
+        jeddah_van = self._create_unit('Van Driver', 21.49, 39.18, category='van', license_class='class_c')
+        riyadh_order = self._create_order(24.70, 46.68)
+        jeddah_order = self._create_order(21.47, 39.16)
+        bulk_order = self._create_order(21.50, 39.19, cargo_type='bulk', weight=800.0)
+        heavy_bulk = self._create_order(21.50, 39.19, cargo_type='bulk', weight=9000.0)
+
+        dispatched = self.env['ecosire.fleet.dispatcher'].dispatch(
+            riyadh_order | jeddah_order | bulk_order | heavy_bulk
+        )
+
+        self.assertEqual(dispatched, riyadh_order | jeddah_order | bulk_order)
+        self.assertEqual((jeddah_order.vehicle_id, jeddah_order.driver_id), jeddah_truck)
+        self.assertEqual((riyadh_order.vehicle_id, riyadh_order.driver_id), riyadh_truck)
+        self.assertEqual((bulk_order.vehicle_id, bulk_order.driver_id), jeddah_van)
+        self.assertEqual(set(dispatched.mapped('status')), {'dispatched'})
+        self.assertEqual(heavy_bulk.status, 'created')
+
+        # Busy units are not offered again.
+        late_order = self._create_order(21.47, 39.16)
+        self.assertFalse(self.env['ecosire.fleet.dispatcher'].dispatch(late_order))
+
+    def test_driver_of_two_vehicles_is_assigned_once(self):
+        """Test that a driver of two free vehicles is offered, and assigned, only once."""
+        vehicle, employee = self._create_unit('Shared Driver', 21.48, 39.17)
+        second_vehicle = vehicle.copy({'current_location_lat': 21.49, 'current_location_lng': 39.18})
+        first_order = self._create_order(21.47, 39.16)
+        second_order = self._create_order(21.50, 39.19)
+
+        units = self.env['ecosire.fleet.dispatcher']._get_available_vehicles(self.env.company)
+        self.assertEqual([unit for unit in units if unit[1] == employee], [(vehicle, employee)])
+        self.assertNotIn(second_vehicle, [unit[0] for unit in units])
+
+        dispatched = self.env['ecosire.fleet.dispatcher'].dispatch(first_order | second_order)
+
+        self.assertEqual(len(dispatched), 1)
+        self.assertEqual(dispatched.driver_id, employee)
+        self.assertEqual(dispatched.status, 'dispatched')
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+from odoo.addons.ecosire_fleet_api.tools import geo
+from odoo.tests.common import TransactionCase
+
+JEDDAH_PORT = (21.4735, 39.1512)
+
+
+class TestFleetGeo(TransactionCase):
+    """Test cases for geohash indexing and proximity search of fleet orders."""
+
+    def setUp(self):
+        super().setUp()
+        self.order_model = self.env['ecosire.fleet.order']
+        self.customer = self.env['res.partner'].create({'name': 'Geo Customer'})
+
+    def _create_order(self, lat, lng, **vals):
+        return self.order_model.create({
+            'order_type': 'transport',
+            'cargo_type': 'container',
+            'delivery_type': 'client',
+            'customer_id': self.customer.id,
+            'pickup_location_lat': lat,
+            'pickup_location_lng': lng,
+            **vals,
+        })
+
+    def test_geohash_helpers(self):
+        """Test geohash encoding, bounds and the covering cells of a circle."""
+        self.assertEqual(geo.geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        lat_min, lat_max, lng_min, lng_max = geo.geohash_bounds('u4pruydqqvj')
+        self.assertTrue(lat_min <= 57.64911 <= lat_max and lng_min <= 10.40744 <= lng_max)
+
+        cells = geo.geohash_cover(*JEDDAH_PORT, 20)
+        precision = len(cells[0])
+        self.assertGreaterEqual(precision, 4)
+        self.assertLessEqual(len(cells), 32)
+        self.assertIn(geo.geohash_encode(*JEDDAH_PORT, precision), cells)
+        # The prefilter reads a small multiple of the circle's area, not the cells of a coarse grid.
+        lat_span, lng_span = geo.geohash_cell_size(precision)
+        cell_area = lat_span * 110.574 * lng_span * 111.320 * math.cos(math.radians(JEDDAH_PORT[0]))
+        self.assertLess(len(cells) * cell_area, 4 * math.pi * 20 ** 2)
+        for bearing in range(0, 360, 15):
+            # Points 19.9 km away in every direction fall within the cover.
+            lat = JEDDAH_PORT[0] + 19.9 / 110.574 * math.cos(math.radians(bearing))
+            lng = JEDDAH_PORT[1] + 19.9 / (111.320 * math.cos(math.radians(lat))) * math.sin(math.radians(bearing))
+            if geo.haversine_km(*JEDDAH_PORT, lat, lng) <= 20:
+                self.assertIn(geo.geohash_encode(lat, lng, precision), cells)
+        self.assertEqual(len(geo.geohash_cover(-89.5, 10.0, 100)[0]), 2)
+        self.assertAlmostEqual(geo.haversine_km(21.48, 39.17, 21.54, 39.17), 6.67, places=2)
+
+    def test_geohash_cover_near_pole(self):
+        """Test that a large circle at a high latitude is covered up to its widest longitudes."""
+        center_lat, center_lng, radius = -83.7, 20.0, 500
+        cells = geo.geohash_cover(center_lat, center_lng, radius)
+        phi = math.radians(center_lat)
+        distance = 499 / geo.EARTH_RADIUS_KM
+        for bearing in map(math.radians, range(0, 360, 5)):
+            # Destination point 499 km away along ``bearing`` on the sphere.
+            lat = math.asin(math.sin(phi) * math.cos(distance) + math.cos(phi) * math.sin(distance) * math.cos(bearing))
+            lng = math.radians(center_lng) + math.atan2(
+                math.sin(bearing) * math.sin(distance) * math.cos(phi),
+                math.cos(distance) - math.sin(phi) * math.sin(lat),
+            )
+            geohash = geo.geohash_encode(math.degrees(lat), (math.degrees(lng) + 540.0) % 360.0 - 180.0, 9)
+            self.assertTrue(any(geohash.startswith(cell) for cell in cells), geohash)
+
+    def test_geohash_is_stored_per_location(self):
+        """Test that geohashes follow the coordinates and stay empty when unset."""
+        order = self._create_order(*JEDDAH_PORT)
+
+        self.assertEqual(order.pickup_geohash, geo.geohash_encode(*JEDDAH_PORT, 9))
+        self.assertFalse(order.drop_off_geohash)
+        order.write({'drop_off_location_lat': 24.7136, 'drop_off_location_lng': 46.6753})
+        self.assertEqual(order.drop_off_geohash, geo.geohash_encode(24.7136, 46.6753, 9))
+
+    def test_search_near_filters_and_sorts_by_distance(self):
+        """Test that proximity search keeps orders within the radius, nearest first."""
+        far = self._create_order(21.5433, 39.1728)       # ~8 km
+        near = self._create_order(21.4800, 39.1600)      # ~1 km
+        outside = self._create_order(21.2854, 39.2376)   # ~22 km
+        riyadh = self._create_order(24.7136, 46.6753)
+        canceled = self._create_order(21.4740, 39.1515, status='canceled')
+
+        orders = self.order_model.search_near(JEDDAH_PORT, 20)
+        self.assertEqual(orders.ids, [canceled.id, near.id, far.id])
+        self.assertNotIn(outside, orders)
+        self.assertNotIn(riyadh, orders)
+
+        orders = self.order_model.search_near(JEDDAH_PORT, 20, domain=[('status', '!=', 'canceled')], limit=1)
+        self.assertEqual(orders, near)
+
+    def test_trip_distances_are_computed_in_batch(self):
+        """Test stored trip and empty return distances, zero when a leg is incomplete."""
+        orders = self.order_model.create([
+            {
+                'order_type': 'transport',
+                'cargo_type': 'container',
+                'delivery_type': 'client',
+                'customer_id': self.customer.id,
+                'pickup_location_lat': JEDDAH_PORT[0],
+                'pickup_location_lng': JEDDAH_PORT[1],
+                'drop_off_location_lat': 24.7136,
+                'drop_off_location_lng': 46.6753,
+                'empty_dropoff_location_lat': JEDDAH_PORT[0],
+                'empty_dropoff_location_lng': JEDDAH_PORT[1],
+            },
+            {
+                'order_type': 'transport',
+                'cargo_type': 'bulk',
+                'delivery_type': 'client',
+                'customer_id': self.customer.id,
+                'pickup_location_lat': JEDDAH_PORT[0],
+                'pickup_location_lng': JEDDAH_PORT[1],
+            },
+        ])
+
+        expected = geo.haversine_km(*JEDDAH_PORT, 24.7136, 46.6753)
+        self.assertAlmostEqual(orders[0].trip_distance_km, expected, places=2)
+        self.assertAlmostEqual(orders[0].return_distance_km, expected, places=2)
+        self.assertEqual(orders[1].trip_distance_km, 0.0)
+        self.assertEqual(orders[1].return_distance_km, 0.0)
+
+    def test_backfill_trip_distances(self):
+        """Test that the SQL backfill recomputes stored distances in chunks."""
+        orders = self._create_order(*JEDDAH_PORT) | self._create_order(21.5433, 39.1728)
+        orders.write({'drop_off_location_lat': 24.7136, 'drop_off_location_lng': 46.6753})
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order SET trip_distance_km = NULL WHERE id IN %s", (tuple(orders.ids),)
+        )
+        self.order_model.invalidate_model(['trip_distance_km'])
+
+        self.order_model._backfill_trip_distances(chunk_size=1)
+
+        for order in orders:
+            expected = geo.haversine_km(order.pickup_location_lat, order.pickup_location_lng, 24.7136, 46.6753)
+            self.assertAlmostEqual(order.trip_distance_km, expected, places=2)
+
+    def test_backfill_geohashes(self):
+        """Test that the SQL backfill recomputes stored geohashes in chunks."""
+        orders = self._create_order(*JEDDAH_PORT) | self._create_order(0.0, 0.0)
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order SET pickup_geohash = 'x' WHERE id IN %s", (tuple(orders.ids),)
+        )
+        self.order_model.invalidate_model(['pickup_geohash'])
+
+        self.order_model._backfill_geohashes(chunk_size=1)
+
+        self.assertEqual(orders[0].pickup_geohash, geo.geohash_encode(*JEDDAH_PORT, 9))
+        self.assertFalse(orders[1].pickup_geohash)
+        self.assertFalse(orders[0].drop_off_geohash)
@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests.common import TransactionCase
+
+
+class TestFleetOrder(TransactionCase):
+    """Test cases for fleet order functionality in ECOSIRE Fleet API module."""
+
+    def setUp(self):
+        super().setUp()
+        self.order_model = self.env['ecosire.fleet.order']
+        self.customer = self.env['res.partner'].create({
+            'name': 'Fleet Customer',
+            'contact_type': 'company',
+        })
+
+    def _order_vals(self, **overrides):
+        vals = {
+            'order_type': 'transport',
+            'cargo_type': 'container',
+            'delivery_type': 'client',
+            'customer_id': self.customer.id,
+        }
+        vals.update(overrides)
+        return vals
+
+    def _count_create_queries(self, size):
+        vals_list = [
+            self._order_vals(line_ids=[(0, 0, {'unit': 'box', 'quantity': 1.0})])
+            for _i in range(size)
+        ]
+        self.env.invalidate_all()
+        start = self.env.cr.sql_log_count
+        self.order_model.create(vals_list)
+        return self.env.cr.sql_log_count - start
+
+    def test_batch_create_assigns_distinct_order_numbers(self):
+        """Test that a batch create reserves one sequence number per order."""
+        orders = self.order_model.create([self._order_vals() for _i in range(5)])
+
+        numbers = orders.mapped('order_no')
+        self.assertEqual(len(set(numbers)), 5)
+        for number in numbers:
+            self.assertTrue(number.startswith('CP'))
+            self.assertEqual(len(number), 7)
+
+    def test_batch_create_keeps_explicit_order_numbers(self):
+        """Test that explicit order numbers are not replaced by the sequence."""
+        orders = self.order_model.create([
+            self._order_vals(order_no='EXT-1'),
+            self._order_vals(order_no='/'),
+        ])
+
+        self.assertEqual(orders[0].order_no, 'EXT-1')
+        self.assertTrue(orders[1].order_no.startswith('CP'))
+
+    def test_batch_create_query_count_is_flat(self):
+        """Test that the number of queries does not grow with the batch size."""
+        self._count_create_queries(2)  # warm up caches
+        small = self._count_create_queries(5)
+        large = self._count_create_queries(50)
+
+        self.assertLessEqual(large, small + 2)
+
+    def test_upsert_creates_updates_and_skips_unchanged(self):
+        """Test that the bulk upsert reports created, updated and unchanged orders."""
+        existing = self.order_model.create([
+            self._order_vals(external_order_id='EXT-100', fare=100.0),
+            self._order_vals(external_order_id='EXT-101', fare=200.0),
+        ])
+
+        results = self.order_model.upsert_from_external([
+            self._order_vals(external_order_id='EXT-100', fare=100.0),
+            self._order_vals(external_order_id='EXT-101', fare=250.0),
+            self._order_vals(external_order_id='EXT-102', fare=300.0),
+        ])
+
+        self.assertEqual([r['status'] for r in results], ['unchanged', 'updated', 'created'])
+        self.assertEqual(results[0]['id'], existing[0].id)
+        self.assertEqual(existing[1].fare, 250.0)
+        created = self.order_model.browse(results[2]['id'])
+        self.assertEqual(created.external_order_id, 'EXT-102')
+        self.assertTrue(created.order_no.startswith('CP'))
+
+    def test_upsert_reports_errors_per_item(self):
+        """Test that invalid payloads are reported without rejecting valid ones."""
+        results = self.order_model.upsert_from_external([
+            self._order_vals(),
+            self._order_vals(external_order_id='EXT-200', customer_id=False),
+            self._order_vals(external_order_id='EXT-201'),
+            self._order_vals(external_order_id='EXT-201'),
+        ])
+
+        self.assertEqual([r['status'] for r in results], ['error', 'error', 'created', 'error'])
+        self.assertFalse(self.order_model.search([('external_order_id', '=', 'EXT-200')]))
+        self.assertEqual(self.order_model.search_count([('external_order_id', '=', 'EXT-201')]), 1)
+
+    def test_completing_orders_creates_one_quotation_each(self):
+        """Test that completing orders in one write creates one draft quotation per order."""
+        orders = self.order_model.create([
+            self._order_vals(external_order_id='EXT-300', status='drop_off_complete'),
+            self._order_vals(external_order_id='EXT-301', status='drop_off_complete'),
+        ])
+
+        orders.write({'status': 'completed'})
+        orders.with_context(ecosire_skip_status_check=True).write({'status': 'drop_off_complete'})
+        orders.write({'status': 'completed'})
+
+        for order in orders:
+            self.assertEqual(len(order.sale_order_ids), 1)
+            sale = order.sale_order_ids
+            self.assertEqual(sale.state, 'draft')
+            self.assertEqual(sale.partner_id, self.customer)
+            self.assertEqual(sale.origin, order.order_no)
+            self.assertEqual(sale.external_order_id, order.external_order_id)
+
+    def test_quotation_lines_from_cost_lines(self):
+        """Test that quotation lines are generated from the order's cost lines."""
+        product = self.env['product.product'].create({
+            'name': 'Transport Fee',
+            'type': 'service',
+            'list_price': 500.0,
+            'taxes_id': [(6, 0, [])],
+        })
+        order = self.order_model.create(self._order_vals(status='drop_off_complete', cost_line_ids=[
+            (0, 0, {'product_id': product.id, 'quantity': 2.0, 'price_unit': 450.0}),
+            (0, 0, {'product_id': product.id, 'name': 'Waiting time', 'price_unit': 50.0}),
+        ]))
+
+        order.write({'status': 'completed'})
+
+        lines = order.sale_order_ids.order_line
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0].product_id, product)
+        self.assertEqual(lines[0].product_uom_qty, 2.0)
+        self.assertEqual(lines[0].price_unit, 450.0)
+        self.assertIn('Transport Fee', lines[0].name)
+        self.assertEqual(lines[1].name, 'Waiting time')
+        self.assertEqual(order.sale_order_ids.amount_untaxed, 950.0)
+
+    def test_quotation_lines_keep_cost_line_taxes(self):
+        """Test that untaxed cost lines do not pick up the product's default taxes."""
+        tax = self.env['account.tax'].create({
+            'name': 'VAT 15%',
+            'amount': 15.0,
+            'amount_type': 'percent',
+            'type_tax_use': 'sale',
+        })
+        product = self.env['product.product'].create({
+            'name': 'Taxed Fee',
+            'type': 'service',
+            'taxes_id': [(6, 0, tax.ids)],
+        })
+        order = self.order_model.create(self._order_vals(status='drop_off_complete', cost_line_ids=[
+            (0, 0, {'product_id': product.id, 'quantity': 1.0, 'price_unit': 100.0, 'tax_ids': [(6, 0, [])]}),
+        ]))
+
+        order.write({'status': 'completed'})
+
+        sale = order.sale_order_ids
+        self.assertFalse(sale.order_line.tax_id)
+        self.assertEqual(sale.amount_total, order.amount_total)
+
+    def test_status_transitions_are_enforced(self):
+        """Test that only transitions of the status graph are accepted."""
+        order = self.order_model.create(self._order_vals())
+
+        with self.assertRaises(UserError):
+            order.write({'status': 'completed'})
+        order.write({'status': 'dispatched'})
+        order.write({'status': 'canceled'})
+        with self.assertRaises(UserError):
+            order.write({'status': 'started'})
+        order.with_context(ecosire_skip_status_check=True).write({'status': 'started'})
+        self.assertEqual(order.status, 'started')
+
+    def test_status_changes_are_logged(self):
+        """Test that creating and moving orders appends status events."""
+        orders = self.order_model.create([self._order_vals(), self._order_vals()])
+        orders.write({'status': 'dispatched'})
+        orders.write({'status': 'dispatched'})
+
+        events = self.env['ecosire.fleet.order.event'].search([('order_id', 'in', orders.ids)])
+        self.assertEqual(len(events), 4)
+        self.assertEqual(
+            sorted(events.mapped(lambda e: (e.previous_status, e.status))),
+            [(False, 'created')] * 2 + [('created', 'dispatched')] * 2,
+        )
+        with self.assertRaises(UserError):
+            events[0].write({'status': 'canceled'})
+
+    def test_status_changed_at_only_moves_on_status_changes(self):
+        """Test that only the orders whose status changes get a new status timestamp."""
+        orders = self.order_model.create([self._order_vals(), self._order_vals()])
+        orders[0].write({'status': 'dispatched'})
+        earlier = fields.Datetime.now() - timedelta(days=1)
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order SET status_changed_at = %s WHERE id = ANY(%s)", (earlier, orders.ids)
+        )
+        self.order_model.invalidate_model(['status_changed_at'])
+
+        orders.write({'status': 'dispatched', 'fare': 10.0})
+
+        self.assertEqual(orders[0].status_changed_at, earlier)
+        self.assertGreater(orders[1].status_changed_at, earlier)
+        self.assertEqual(orders.mapped('fare'), [10.0, 10.0])
+
+    def test_stage_dwell_times(self):
+        """Test the per-status dwell time aggregate."""
+        order = self.order_model.create(self._order_vals())
+        event_model = self.env['ecosire.fleet.order.event']
+        start = fields.Datetime.now() - timedelta(hours=3)
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order_event SET timestamp = %s WHERE order_id = %s",
+            (start, order.id),
+        )
+        event_model._log_status_changes([(order, 'created', 'dispatched')])
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order_event SET timestamp = %s WHERE order_id = %s AND status = 'dispatched'",
+            (start + timedelta(hours=2), order.id),
+        )
+
+        dwell = event_model.get_stage_dwell_times(company_ids=order.company_id.ids)
+
+        self.assertEqual(dwell['created']['count'], 1)
+        self.assertAlmostEqual(dwell['created']['avg_seconds'], 7200.0)
+        self.assertNotIn('dispatched', dwell)
+
+    def test_cost_line_amounts_are_stored_and_aggregated(self):
+        """Test stored line amounts, order totals and memoized tax computation."""
+        tax = self.env['account.tax'].create({
+            'name': 'VAT 15%',
+            'amount': 15.0,
+            'amount_type': 'percent',
+            'type_tax_use': 'sale',
+        })
+        line_vals = {'name': 'Transport', 'quantity': 2.0, 'price_unit': 100.0, 'tax_ids': [(6, 0, tax.ids)]}
+        tax_class = type(self.env['account.tax'])
+        compute_all = tax_class.compute_all
+
+        with patch.object(tax_class, 'compute_all', autospec=True, side_effect=compute_all) as mocked:
+            orders = self.order_model.create([
+                self._order_vals(cost_line_ids=[(0, 0, dict(line_vals)) for _i in range(5)])
+                for _j in range(2)
+            ])
+            orders.flush_model()
+
+        self.assertEqual(mocked.call_count, 1)
+        for order in orders:
+            self.assertEqual(order.amount_untaxed, 1000.0)
+            self.assertAlmostEqual(order.amount_total, 1150.0)
+        groups = self.order_model.read_group(
+            [('id', 'in', orders.ids)], ['amount_total:sum'], ['customer_id']
+        )
+        self.assertAlmostEqual(groups[0]['amount_total'], 2300.0)
+        self.assertEqual(
+            self.order_model.search([('id', 'in', orders.ids)], order='amount_total desc, id'), orders
+        )
+
+    def test_keyset_pagination(self):
+        """Test that cursor pages walk all orders newest first without overlap."""
+        orders = self.order_model.create([self._order_vals(external_order_id=f'PAGE-{i}') for i in range(5)])
+        base = fields.Datetime.now() - timedelta(days=1)
+        for index, order in enumerate(orders):
+            # Two orders share a timestamp to exercise the id tie-breaker.
+            self.env.cr.execute(
+                "UPDATE ecosire_fleet_order SET create_date = %s WHERE id = %s",
+                (base + timedelta(minutes=min(index, 3)), order.id),
+            )
+        self.order_model.invalidate_model(['create_date'])
+        domain = [('id', 'in', orders.ids)]
+
+        seen, cursor = [], None
+        while True:
+            page = self.order_model.search_page(domain, cursor=cursor, limit=2, field_names=['order_no'])
+            seen += [record['id'] for record in page['records']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [orders[4].id, orders[3].id, orders[2].id, orders[1].id, orders[0].id])
+        with self.assertRaises(UserError):
+            self.order_model.search_page(domain, cursor='not-a-cursor')
+
+    def test_keyset_pagination_within_one_second(self):
+        """Test that orders created in the same second but different microseconds are all paged."""
+        orders = self.order_model.create([self._order_vals(external_order_id=f'PAGE-US-{i}') for i in range(5)])
+        base = fields.Datetime.now().replace(microsecond=0) - timedelta(days=1)
+        for index, order in enumerate(orders):
+            self.env.cr.execute(
+                "UPDATE ecosire_fleet_order SET create_date = %s WHERE id = %s",
+                (base + timedelta(microseconds=(5 - index) * 1000), order.id),
+            )
+        self.order_model.invalidate_model(['create_date'])
+        domain = [('id', 'in', orders.ids)]
+
+        seen, cursor = [], None
+        while True:
+            page = self.order_model.search_page(domain, cursor=cursor, limit=2, field_names=['order_no'])
+            seen += [record['id'] for record in page['records']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, orders.ids)
+
+    def test_status_counters_follow_order_changes(self):
+        """Test that the maintained status counters match a live count."""
+        company = self.env.company
+        before = self.order_model.get_status_counts(company_ids=company.ids)
+        orders = self.order_model.create([self._order_vals() for _i in range(3)])
+        orders[:2].write({'status': 'dispatched'})
+        orders[0].write({'status': 'canceled'})
+        orders[2].unlink()
+
+        counts = self.order_model.get_status_counts(company_ids=company.ids)
+        self.assertEqual(counts['created'] - before['created'], 0)
+        self.assertEqual(counts['dispatched'] - before['dispatched'], 1)
+        self.assertEqual(counts['canceled'] - before['canceled'], 1)
+
+        today = fields.Date.to_date(orders[0].create_date)
+        daily = self.order_model.get_status_counts(company_ids=company.ids, date_from=today, date_to=today)
+        live = self.order_model.read_group(
+            [('company_id', '=', company.id), ('create_date', '>=', today)], ['status'], ['status'], lazy=False
+        )
+        self.assertEqual({group['status']: group['__count'] for group in live},
+                         {status: count for status, count in daily.items() if count})
+
+        self.env['ecosire.fleet.order.status.count']._rebuild()
+        self.assertEqual(self.order_model.get_status_counts(company_ids=company.ids), counts)
+
+    def test_report_refreshes_touched_days(self):
+        """Test that the analysis refreshes only dirty days and matches a full rebuild."""
+        report = self.env['ecosire.fleet.order.report']
+        report._rebuild()
+        customer = self.env['res.partner'].create({'name': 'Report Customer', 'contact_type': 'company'})
+        orders = self.order_model.create([
+            self._order_vals(customer_id=customer.id, fare=100.0, container_weight=10.0,
+                             cost_line_ids=[(0, 0, {'name': 'Transport', 'price_unit': 50.0})])
+            for _i in range(3)
+        ])
+        orders.with_context(ecosire_skip_status_check=True).write({'status': 'completed'})
+        orders[2].write({'status': 'empty_container_return'})
+        yesterday = fields.Datetime.now() - timedelta(days=1)
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order SET status_changed_at = %s WHERE id = %s", (yesterday, orders[0].id)
+        )
+        self.order_model.invalidate_model(['status_changed_at'])
+
+        report._cron_refresh()
+        rows = report.search([('customer_id', '=', customer.id)])
+        self.assertEqual(sum(rows.mapped('order_count')), 2)
+        self.assertEqual(sum(rows.mapped('completed_count')), 2)
+        self.assertEqual(sum(rows.mapped('weight_moved')), 20.0)
+        self.assertEqual(sum(rows.mapped('fare_total')), 200.0)
+        self.assertEqual(sum(rows.mapped('revenue_total')), 100.0)
+
+        # Touching the order through the ORM marks both its old and new day.
+        orders[0].write({'fare': 150.0})
+        orders[1].cost_line_ids.write({'price_unit': 80.0})
+        report._cron_refresh()
+        fields_ = ['day', 'status', 'order_count', 'fare_total', 'revenue_total']
+        refreshed = sorted(tuple(row[name] for name in fields_) for row in report.search_read(
+            [('customer_id', '=', customer.id)], fields_))
+        report._rebuild()
+        rebuilt = sorted(tuple(row[name] for name in fields_) for row in report.search_read(
+            [('customer_id', '=', customer.id)], fields_))
+        self.assertEqual(refreshed, rebuilt)
+        self.assertEqual(sum(row[3] for row in rebuilt), 350.0)
+        self.assertEqual(sum(row[4] for row in rebuilt), 180.0)
+
+    def test_proof_payloads_are_stored_as_attachments(self):
+        """Test that proof payloads round-trip through shared, content-addressed attachments."""
+        # 1x1 transparent PNG
+        png = ('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII=')
+        signature = {'signed_by': 'Receiver', 'image': f'data:image/png;base64,{png}'}
+        orders = self.order_model.create([
+            self._order_vals(proof_of_delivery='https://example.com/pod.jpg', proof_of_delivery_sign=signature)
+            for _i in range(2)
+        ])
+        self.env.invalidate_all()
+
+        attachments = self.env['ir.attachment'].search([
+            ('res_model', '=', 'ecosire.fleet.order'),
+            ('res_field', '=', 'proof_of_delivery_sign_file'),
+            ('res_id', 'in', orders.ids),
+        ])
+        self.assertEqual(len(attachments), 2)
+        self.assertEqual(len(set(attachments.mapped('store_fname'))), 1)
+        for order in orders:
+            self.assertEqual(order.proof_of_delivery_sign, signature)
+            self.assertEqual(order.proof_of_delivery, 'https://example.com/pod.jpg')
+            self.assertFalse(order.proof_empty_container_return)
+            self.assertTrue(order.proof_of_delivery_sign_thumbnail)
+
+        orders[0].write({'proof_of_delivery_sign': False, 'proof_empty_container_return': 'ECR-1'})
+        self.env.invalidate_all()
+        self.assertFalse(orders[0].proof_of_delivery_sign)
+        self.assertFalse(orders[0].proof_of_delivery_sign_thumbnail)
+        self.assertEqual(orders[0].proof_of_delivery, 'https://example.com/pod.jpg')
+        self.assertEqual(orders[0].proof_empty_container_return, 'ECR-1')
+
+        domain = [('id', 'in', orders.ids)]
+        self.assertEqual(self.order_model.search(domain + [('proof_of_delivery_sign', '!=', False)]), orders[1])
+        self.assertEqual(self.order_model.search(domain + [('proof_empty_container_return', '=', False)]), orders[1])
+        self.assertEqual(self.order_model.search(domain + [('proof_of_delivery', '!=', False)]), orders)
+
+    def test_items_are_normalized_into_lines(self):
+        """Test that items payloads become order lines with stored totals."""
+        items = [
+            {'unit': 'box', 'quantity': '2', 'weight': 10.5, 'goodType': 'Food', 'note': 'ignored'},
+            {'unit': 'pallet', 'qty': 1, 'weight': '4.5', 'price': 30},
+            'not an item',
+        ]
+        order = self.order_model.create(self._order_vals(items=items))
+        self.assertEqual(len(order.line_ids), 2)
+        self.assertEqual(order.line_ids.mapped('good_type'), ['Food', False])
+        self.assertEqual(order.total_quantity, 3.0)
+        self.assertEqual(order.total_weight, 15.0)
+
+        order.write({'items': [{'unit': 'box', 'quantity': 5, 'weight': 1.0}]})
+        self.assertEqual(len(order.line_ids), 1)
+        self.assertEqual(order.total_weight, 1.0)
+
+        explicit = self.order_model.create(self._order_vals(
+            items=items, line_ids=[(0, 0, {'unit': 'crate', 'quantity': 7.0})],
+        ))
+        self.assertEqual(explicit.line_ids.mapped('unit'), ['crate'])
+
+    def test_backfill_item_lines(self):
+        """Test that the backfill converts legacy items and fills the totals."""
+        orders = self.order_model.create([self._order_vals() for _i in range(3)])
+        orders.flush_model()
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order SET items = %s, total_weight = NULL WHERE id = ANY(%s)",
+            ('[{"unit": "box", "quantity": 2, "weight": 3}]', orders[:2].ids),
+        )
+        self.order_model.invalidate_model(['items', 'total_weight'])
+
+        self.assertEqual(self.order_model._backfill_item_lines(chunk_size=1), 2)
+        self.assertEqual(orders.mapped('total_weight'), [3.0, 3.0, 0.0])
+        self.assertEqual(len(orders.line_ids), 2)
+        # Already normalized orders are left alone on a second run.
+        self.assertEqual(self.order_model._backfill_item_lines(), 0)
+
+    def test_archive_old_terminal_orders(self):
+        """Test that old orders in a terminal status move to the read-only archive."""
+        orders = self.order_model.create([
+            self._order_vals(
+                container_number=f'ARCH-{i}',
+                proof_of_delivery='https://example.com/pod.jpg',
+                line_ids=[(0, 0, {'unit': 'box', 'quantity': 2.0, 'weight': 5.0})],
+            )
+            for i in range(3)
+        ])
+        orders[:2].with_context(ecosire_skip_status_check=True).write({'status': 'completed'})
+        orders.flush_model()
+        old = fields.Datetime.now() - timedelta(days=400)
+        # The first order is old and completed, the second recent, the third old but still open.
+        self.env.cr.execute(
+            "UPDATE ecosire_fleet_order SET status_changed_at = %s WHERE id = ANY(%s)",
+            (old, [orders[0].id, orders[2].id]),
+        )
+        self.order_model.invalidate_model(['status_changed_at'])
+        archived_id = orders[0].id
+        report = self.env['ecosire.fleet.order.report']
+        report._rebuild()
+        before = sum(report.search([('customer_id', '=', self.customer.id)]).mapped('order_count'))
+
+        archive_model = self.env['ecosire.fleet.order.archive']
+        self.assertEqual(archive_model._cron_archive_orders(chunk_size=1), 1)
+
+        self.assertFalse(self.order_model.browse(archived_id).exists())
+        self.assertEqual(len(orders.exists()), 2)
+        archive = archive_model.search([('container_number', '=', 'ARCH-0')])
+        self.assertEqual(archive.order_id, archived_id)
+        self.assertEqual(archive.status, 'completed')
+        self.assertEqual(archive.total_weight, 5.0)
+        self.assertEqual(archive.proof_of_delivery, 'https://example.com/pod.jpg')
+        self.assertEqual(len(archive.data['lines']), 1)
+        self.assertEqual([event['status'] for event in archive.data['events']], ['created', 'completed'])
+        with self.assertRaises(UserError):
+            archive.write({'fare': 1.0})
+        with self.assertRaises(UserError):
+            archive.unlink()
+        events = self.env['ecosire.fleet.order.event'].search([('order_archive_id', '=', archive.id)])
+        self.assertEqual(sorted(events.mapped('status')), ['completed', 'created'])
+        self.assertFalse(events.order_id)
+
+        report._cron_refresh()
+        after = sum(report.search([('customer_id', '=', self.customer.id)]).mapped('order_count'))
+        self.assertEqual(after, before)
+        self.assertEqual(archive_model._cron_archive_orders(), 0)
+
+    def test_quick_search_ranks_identifier_matches(self):
+        """Test that the quick search matches fragments, ranks exact identifiers first and is bounded."""
+        orders = self.order_model.create([
+            self._order_vals(container_number='MSCU1234567'),
+            self._order_vals(bill_of_lading_number='BL-MSCU1234567-X'),
+            self._order_vals(pickup_location_address='Warehouse 12, King Fahd Road, Riyadh'),
+            self._order_vals(bayan_number='50%_OFF'),
+        ])
+
+        found = self.order_model.quick_search('mscu1234567', domain=[('id', 'in', orders.ids)])
+        self.assertEqual(found, orders[0] | orders[1])
+        self.assertEqual(found[0], orders[0])
+        self.assertEqual(self.order_model.quick_search('fahd road', domain=[('id', 'in', orders.ids)]), orders[2])
+        # LIKE wildcards in the term are matched literally.
+        self.assertEqual(self.order_model.quick_search('50%_', domain=[('id', 'in', orders.ids)]), orders[3])
+        self.assertFalse(self.order_model.quick_search('  '))
+        self.assertEqual(len(self.order_model.quick_search('m', domain=[('id', 'in', orders.ids)], limit=1)), 1)
+
+    def test_container_return_deadlines(self):
+        """Test the days to deadline and the incremental container return alerts."""
+        today = fields.Date.context_today(self.order_model)
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('ecosire_fleet_api.container_return_alert_days', 3)
+        params.set_param('ecosire_fleet_api.container_return_scanned_until', False)
+        orders = self.order_model.create([
+            self._order_vals(last_date_container_return=today + timedelta(days=offset))
+            for offset in (-1, 2, 10)
+        ])
+        self.assertEqual(orders.mapped('days_to_container_return'), [-1, 2, 10])
+
+        self.order_model._cron_track_container_returns()
+        activity_type = self.env.ref('ecosire_fleet_api.mail_activity_type_container_return')
+        alerted = orders.filtered(lambda order: order.activity_ids.activity_type_id == activity_type)
+        self.assertEqual(alerted, orders[:2])
+        self.assertEqual(orders[0].activity_ids.date_deadline, today - timedelta(days=1))
+
+        # A second run scans nothing new and creates no duplicates.
+        self.order_model._cron_track_container_returns()
+        self.assertEqual(len(orders.activity_ids), 2)
+
+        # A deadline moved into the scanned window is alerted when written.
+        orders[2].last_date_container_return = today + timedelta(days=1)
+        self.assertEqual(orders[2].days_to_container_return, 1)
+        self.assertEqual(len(orders[2].activity_ids), 1)
+
+        # Returning the container clears the days and the alert.
+        orders[0].with_context(ecosire_skip_status_check=True).write({'status': 'empty_container_return'})
+        self.assertFalse(orders[0].days_to_container_return)
+        self.assertFalse(orders[0].activity_ids)
+        self.assertEqual(
+            self.order_model.search([('id', 'in', orders.ids)], order='days_to_container_return, id'),
+            orders[2] | orders[1] | orders[0],
+        )
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import random
+import time
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestFleetRoute(TransactionCase):
+    """Test cases for the driver route planner in ECOSIRE Fleet API module."""
+
+    def setUp(self):
+        super().setUp()
+        self.planner = self.env['ecosire.fleet.route.planner']
+        self.customer = self.env['res.partner'].create({'name': 'Route Customer'})
+        self.driver = self.env['hr.employee'].create({'name': 'Route Driver'})
+        self.today = fields.Date.today()
+
+    def _create_order(self, pickup, drop_off, empty=None, **vals):
+        vals.update({
+            'order_type': 'transport',
+            'cargo_type': 'container',
+            'delivery_type': 'client',
+            'customer_id': self.customer.id,
+            'driver_id': self.driver.id,
+            'expected_delivery_date': self.today,
+            'pickup_location_lat': pickup[0],
+            'pickup_location_lng': pickup[1],
+            'drop_off_location_lat': drop_off[0],
+            'drop_off_location_lng': drop_off[1],
+        })
+        if empty:
+            vals.update({'empty_dropoff_location_lat': empty[0], 'empty_dropoff_location_lng': empty[1]})
+        return self.env['ecosire.fleet.order'].create(vals)
+
+    def _assert_precedence(self, stops):
+        kinds_by_order = {}
+        for stop in stops:
+            kinds_by_order.setdefault(stop['order_id'], []).append(stop['kind'])
+        rank = {'pickup': 0, 'yard_dropoff': 1, 'drop_off': 2, 'empty_dropoff': 3}
+        for kinds in kinds_by_order.values():
+            self.assertEqual(kinds, sorted(kinds, key=rank.get))
+
+    def test_plan_driver_day_respects_precedence(self):
+        """Test that each order is visited pickup, then drop-off, then empty return."""
+        first = self._create_order((21.48, 39.17), (21.60, 39.20), empty=(21.47, 39.16))
+        second = self._create_order((21.55, 39.19), (21.50, 39.18))
+        self._create_order((21.40, 39.10), (21.41, 39.11), status='canceled')
+
+        plan = self.planner.plan_driver_day(self.driver, self.today, start_point=(21.47, 39.16))
+
+        self.assertEqual(len(plan['stops']), 5)
+        self.assertEqual({stop['order_id'] for stop in plan['stops']}, {first.id, second.id})
+        self._assert_precedence(plan['stops'])
+        self.assertAlmostEqual(plan['total_km'], sum(stop['leg_km'] for stop in plan['stops']), places=2)
+
+    def test_plan_handles_many_stops_quickly(self):
+        """Test that a day of 60 container orders (180 stops) is planned well under a second."""
+        rng = random.Random(7)
+
+        def point():
+            return (21.2 + rng.random(), 39.0 + rng.random())
+
+        orders = self.env['ecosire.fleet.order']
+        for _i in range(60):
+            orders |= self._create_order(point(), point(), empty=point())
+
+        start = time.perf_counter()
+        plan = self.planner.plan_orders(orders)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(plan['stops']), 180)
+        self._assert_precedence(plan['stops'])
+        self.assertLess(elapsed, 1.0)
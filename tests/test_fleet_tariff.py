@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+from odoo.addons.ecosire_fleet_api.tools.tariff import TariffTable
+from odoo.tests.common import TransactionCase
+
+
+class TestFleetTariff(TransactionCase):
+    """Test cases for the tariff fare engine in ECOSIRE Fleet API module."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.order_model = cls.env['ecosire.fleet.order']
+        cls.customer = cls.env['res.partner'].create({'name': 'Tariff Customer', 'contact_type': 'company'})
+        cls.tariff = cls.env['ecosire.fleet.tariff'].create({
+            'name': 'Container',
+            'cargo_type': 'container',
+            'minimum_fare': 150.0,
+            'line_ids': [
+                (0, 0, {'distance_from': 0.0, 'weight_from': 0.0, 'base_amount': 100.0, 'price_per_km': 2.0}),
+                (0, 0, {'distance_from': 100.0, 'weight_from': 0.0, 'base_amount': 200.0, 'price_per_km': 1.5}),
+                (0, 0, {'distance_from': 0.0, 'weight_from': 20000.0, 'base_amount': 100.0,
+                        'price_per_km': 2.0, 'price_per_ton': 10.0}),
+            ],
+        })
+        cls.tariff_40ft = cls.env['ecosire.fleet.tariff'].create({
+            'name': 'Container 40FT',
+            'cargo_type': 'container',
+            'cargo_size': '40FT',
+            'line_ids': [(0, 0, {'base_amount': 500.0})],
+        })
+
+    def _create_order(self, **vals):
+        return self.order_model.create({
+            'order_type': 'transport',
+            'cargo_type': 'container',
+            'delivery_type': 'client',
+            'customer_id': self.customer.id,
+            'pickup_location_lat': 24.7136,
+            'pickup_location_lng': 46.6753,
+            'drop_off_location_lat': 24.7136,
+            'drop_off_location_lng': 47.6753,
+            **vals,
+        })
+
+    def _expected_fare(self, base, per_km, distance, per_ton=0.0, weight=0.0):
+        return round(max(base + per_km * distance + per_ton * weight / 1000.0, 150.0), 2)
+
+    def test_tariff_table_brackets(self):
+        """Test that prices come from the bracket below each distance and weight, filled upwards."""
+        table = TariffTable([
+            (0, 0, 100, 2, 10),
+            (100, 0, 150, 1.5, 10),
+            (0, 20000, 200, 2, 12),
+        ], minimum=120)
+        fares = table.price([10, 150, 50, 150], [1000, 1000, 25000, 25000])
+        self.assertEqual(fares.tolist(), [130.0, 385.0, 600.0, 625.0])
+        self.assertTrue(math.isnan(TariffTable([]).price([10], [10])[0]))
+        self.assertEqual(table.price(150, 1000).tolist(), [385.0])
+        self.assertTrue(math.isnan(TariffTable([]).price(10, 10)[0]))
+
+    def test_orders_priced_on_create(self):
+        """Test that orders without a fare are priced from the matching tariff, others are kept."""
+        order = self._create_order(container_weight=5000.0)
+        self.assertTrue(order.fare_from_tariff)
+        self.assertAlmostEqual(order.fare, self._expected_fare(200.0, 1.5, order.trip_distance_km), places=2)
+
+        heavy = self._create_order(container_weight=25000.0, drop_off_location_lng=46.9753)
+        self.assertLess(heavy.trip_distance_km, 100.0)
+        self.assertAlmostEqual(
+            heavy.fare, self._expected_fare(100.0, 2.0, heavy.trip_distance_km, 10.0, 25000.0), places=2
+        )
+
+        sized = self._create_order(cargo_size=' 40ft ')
+        self.assertEqual(sized.fare, 500.0)
+
+        manual = self._create_order(fare=999.0)
+        self.assertEqual(manual.fare, 999.0)
+        self.assertFalse(manual.fare_from_tariff)
+
+        free = self._create_order(fare=0.0)
+        self.assertEqual(free.fare, 0.0)
+        self.assertFalse(free.fare_from_tariff)
+
+        bulk = self._create_order(cargo_type='bulk', bulk_weight=1000.0)
+        self.assertFalse(bulk.fare)
+        self.assertFalse(bulk.fare_from_tariff)
+
+        # A fare set by hand is no longer managed by the tariffs.
+        order.fare = 420.0
+        self.assertFalse(order.fare_from_tariff)
+        order.container_weight = 30000.0
+        self.assertEqual(order.fare, 420.0)
+
+    def test_tariff_changes_reprice_open_orders(self):
+        """Test that tariff edits drop the cached tables and reprice the open tariff-priced orders."""
+        open_order = self._create_order()
+        dispatched = self._create_order()
+        dispatched.status = 'dispatched'
+        canceled = self._create_order()
+        canceled.status = 'canceled'
+        fare_before = canceled.fare
+
+        self.tariff.line_ids.filtered(lambda line: line.distance_from == 100.0).base_amount = 300.0
+        tables = self.env['ecosire.fleet.tariff']._get_tariff_tables(self.env.company.id)
+        self.assertEqual(tables[('container', '')].rates[1, 0, 0], 300.0)
+
+        repriced = self.order_model._cron_reprice_orders()
+        self.assertEqual(repriced, 2)
+        expected = self._expected_fare(300.0, 1.5, open_order.trip_distance_km)
+        self.assertAlmostEqual(open_order.fare, expected, places=2)
+        self.assertAlmostEqual(dispatched.fare, expected, places=2)
+        self.assertEqual(canceled.fare, fare_before)
+        self.assertEqual(self.order_model._cron_reprice_orders(), 0)
+
+    def test_tariff_tables_cached_per_version(self):
+        """Test that the tables are cached until a committed tariff change bumps the company's version."""
+        Tariff = self.env['ecosire.fleet.tariff']
+        company_id = self.env.company.id
+        self.env.cr.flush()
+        version = Tariff._get_tariff_version(company_id)
+        tables = Tariff._get_tariff_tables(company_id)
+        self.assertIs(Tariff._get_tariff_tables(company_id), tables)
+
+        self.tariff_40ft.line_ids.base_amount = 550.0
+        # Uncommitted changes are read uncached and leave the version alone until commit.
+        self.assertEqual(Tariff._get_tariff_tables(company_id)[('container', '40ft')].rates[0, 0, 0], 550.0)
+        self.assertEqual(Tariff._get_tariff_version(company_id), version)
+        self.env.cr.flush()
+        self.assertEqual(Tariff._get_tariff_version(company_id), version + 1)
+        refreshed = Tariff._get_tariff_tables(company_id)
+        self.assertIsNot(refreshed, tables)
+        self.assertEqual(refreshed[('container', '40ft')].rates[0, 0, 0], 550.0)
+        self.assertIs(Tariff._get_tariff_tables(company_id), refreshed)
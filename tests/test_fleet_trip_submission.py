@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from odoo.addons.ecosire_fleet_api.tools.ratelimit import TokenBucket
+from odoo.tests.common import TransactionCase
+
+
+class _TripStubHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Bayan trip service, recording batches and concurrent requests."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        trips = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['trips']
+        with server.lock:
+            server.batches.append(trips)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        results = [
+            {'reference': trip['reference'], 'error': 'Unknown container.'} if trip['container_number'] == 'FAIL'
+            else {
+                'reference': trip['reference'],
+                'trip_id': 1000 + trip['reference'],
+                'waybill_id': 2000 + trip['reference'],
+                'bayan_number': f"BY-{trip['reference']}",
+            }
+            for trip in trips
+        ]
+        body = json.dumps({'results': results}).encode()
+        with server.lock:
+            server.in_flight -= 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFleetTripSubmission(TransactionCase):
+    """Test cases for the Bayan trip submission pipeline in ECOSIRE Fleet API module."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.submitter = cls.env['ecosire.fleet.trip.submitter']
+        cls.customer = cls.env['res.partner'].create({'name': 'Trip Customer', 'vat': '300000000000003'})
+        brand = cls.env['fleet.vehicle.model.brand'].create({'name': 'Volvo'})
+        model = cls.env['fleet.vehicle.model'].create({'name': 'FH', 'brand_id': brand.id})
+        cls.vehicle = cls.env['fleet.vehicle'].create({'model_id': model.id, 'license_plate': 'ABC 1234'})
+        cls.driver = cls.env['hr.employee'].create({'name': 'Trip Driver', 'identification_id': '1012345678'})
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _TripStubHandler)
+        self.server.lock = threading.Lock()
+        self.server.batches = []
+        self.server.in_flight = self.server.max_in_flight = 0
+        self.server.delay = 0.05
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('ecosire_fleet_api.upload_base_url', f'http://127.0.0.1:{self.server.server_port}')
+        params.set_param('ecosire_fleet_api.trip_submission_batch_size', 2)
+        params.set_param('ecosire_fleet_api.trip_submission_concurrency', 2)
+        params.set_param('ecosire_fleet_api.trip_submission_rate', 1000)
+
+    def _create_orders(self, count, **vals):
+        orders = self.env['ecosire.fleet.order'].create([{
+            'order_type': 'transport',
+            'cargo_type': 'container',
+            'delivery_type': 'client',
+            'customer_id': self.customer.id,
+            'container_number': f'MSCU{index:07d}',
+            **vals,
+        } for index in range(count)])
+        orders.write({'status': 'dispatched', 'vehicle_id': self.vehicle.id, 'driver_id': self.driver.id})
+        return orders
+
+    def test_submit_batches_and_writes_back(self):
+        """Test that eligible orders are sent in capped parallel batches and results written back."""
+        orders = self._create_orders(5)
+        orders[4].container_number = 'FAIL'
+        not_dispatched = self.env['ecosire.fleet.order'].create({
+            'order_type': 'transport', 'cargo_type': 'bulk', 'delivery_type': 'client',
+            'customer_id': self.customer.id,
+        })
+
+        results = self.submitter.submit(orders | not_dispatched)
+
+        self.assertEqual(sorted(results), sorted(orders.ids))
+        self.assertEqual(sorted(len(batch) for batch in self.server.batches), [1, 2, 2])
+        self.assertLessEqual(self.server.max_in_flight, 2)
+        trip = self.server.batches[0][0]
+        self.assertEqual(trip['vehicle_plate'], 'ABC 1234')
+        self.assertEqual(trip['driver_identification'], '1012345678')
+        self.assertEqual(trip['customer_vat'], '300000000000003')
+        for order in orders[:4]:
+            self.assertEqual(order.bayan_trip_id, 1000 + order.id)
+            self.assertEqual(order.waybill_id, 2000 + order.id)
+            self.assertEqual(order.bayan_number, f'BY-{order.id}')
+            self.assertTrue(order.bayan_submitted_at)
+            self.assertFalse(order.bayan_submission_error)
+        self.assertFalse(orders[4].bayan_trip_id)
+        self.assertEqual(orders[4].bayan_submission_error, 'Unknown container.')
+
+        # Submitted orders are no longer eligible; the failed one is retried.
+        self.server.batches.clear()
+        self.submitter.submit(orders)
+        self.assertEqual([[trip['reference'] for trip in batch] for batch in self.server.batches], [[orders[4].id]])
+
+    def test_transport_failure_marks_the_batch(self):
+        """Test that a failing transport records its error on every trip of the batch."""
+        class FailingTransport:
+            def send(self, trips):
+                raise ConnectionError('Service unavailable')
+
+        orders = self._create_orders(3)
+        with patch.object(type(self.submitter), '_get_transport', return_value=FailingTransport()):
+            self.submitter.submit(orders)
+
+        self.assertEqual(set(orders.mapped('bayan_submission_error')), {'Service unavailable'})
+        self.assertFalse(any(orders.mapped('bayan_trip_id')))
+
+    def test_token_bucket_holds_the_rate(self):
+        """Test that the token bucket allows bursts up to its capacity, then waits for refills."""
+        now = [0.0]
+
+        def sleep(delay):
+            now[0] += delay
+
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(now[0], 1.0)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import io
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.addons.ecosire_fleet_api.models.account_move_inherit import _gzip_chunks, _MultipartFileBody
+from odoo.tests import tagged
+
+POST_UPLOAD = 'odoo.addons.ecosire_fleet_api.models.account_move_inherit._post_upload'
+
+
+class _UploadStubHandler(BaseHTTPRequestHandler):
+    """Stand-in for the external upload endpoint, recording client connections."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.bodies.append(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.connections.add(self.client_address)
+        time.sleep(self.server.delay)
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@tagged('post_install', '-at_install')
+class TestInvoiceUpload(AccountTestInvoicingCommon):
+    """Test cases for the queued invoice PDF upload in ECOSIRE Fleet API module."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.job_model = cls.env['ecosire.invoice.upload.job']
+        cls.move_class = type(cls.env['account.move'])
+
+    def _create_invoice(self, external_order_id='EXT-900'):
+        invoice = self.init_invoice('out_invoice', products=self.product_a)
+        invoice.external_order_id = external_order_id
+        return invoice
+
+    def _patch_upload(self, error=None):
+        def fake_upload(moves):
+            return {move.id: error or Mock(status_code=200) for move in moves}
+        return patch.object(self.move_class, '_ecosire_upload_invoice_pdfs', autospec=True, side_effect=fake_upload)
+
+    def _run_jobs(self):
+        self.job_model.search([('state', '=', 'pending')]).write({
+            'next_attempt_at': fields.Datetime.now() - timedelta(seconds=1),
+        })
+        self.job_model._cron_process_jobs()
+
+    def test_post_enqueues_without_uploading(self):
+        """Test that posting only queues the upload."""
+        invoice = self._create_invoice()
+
+        with self._patch_upload() as upload:
+            invoice.action_post()
+
+        upload.assert_not_called()
+        self.assertEqual(invoice.ecosire_upload_state, 'pending')
+        self.assertEqual(invoice.ecosire_upload_job_id.external_order_id, 'EXT-900')
+
+    def test_post_skips_invoices_without_external_id(self):
+        """Test that invoices without external ID are not queued."""
+        invoice = self._create_invoice(external_order_id=False)
+
+        invoice.action_post()
+
+        self.assertFalse(invoice.ecosire_upload_job_id)
+
+    def test_cron_marks_successful_upload_done(self):
+        """Test that the cron uploads pending jobs and marks them done."""
+        invoice = self._create_invoice()
+        invoice.action_post()
+
+        with self._patch_upload() as upload:
+            self._run_jobs()
+
+        upload.assert_called_once()
+        self.assertEqual(invoice.ecosire_upload_state, 'done')
+        self.assertEqual(invoice.ecosire_upload_job_id.attempt_count, 1)
+
+    def test_single_upload_logs_errors_without_raising(self):
+        """Test that the single invoice upload keeps logging failures instead of raising."""
+        invoice = self._create_invoice()
+
+        with self._patch_upload(error=ConnectionError('service unavailable')) as upload, \
+                self.assertLogs('odoo.addons.ecosire_fleet_api.models.account_move_inherit', 'ERROR'):
+            self.assertIsNone(invoice._ecosire_upload_invoice_pdf())
+
+        upload.assert_called_once()
+
+    def test_payment_changes_pdf_hash(self):
+        """Test that paying an invoice changes its PDF hash, as the payment status is printed."""
+        invoice = self._create_invoice()
+        invoice.action_post()
+        unpaid_hash = invoice._ecosire_compute_pdf_hash()
+
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids,
+        ).create({})._create_payments()
+
+        self.assertNotEqual(invoice._ecosire_compute_pdf_hash(), unpaid_hash)
+
+    def test_batch_render_uses_one_report_call(self):
+        """Test that invoices are rendered in one report call and split per invoice."""
+        invoices = self._create_invoice('EXT-901') | self._create_invoice('EXT-902')
+        invoices.action_post()
+        report_class = type(self.env['ir.actions.report'])
+
+        def fake_streams(report, report_ref, data, res_ids=None):
+            return {res_id: {'stream': io.BytesIO(b'%%PDF-%s' % res_id), 'attachment': None} for res_id in res_ids}
+
+        with patch.object(report_class, '_render_qweb_pdf_prepare_streams', autospec=True, side_effect=fake_streams) as render:
+            pdfs = invoices._ecosire_render_invoice_pdfs()
+
+        render.assert_called_once()
+        self.assertEqual(pdfs, {move.id: b'%%PDF-%s' % move.id for move in invoices})
+
+    def test_batch_render_passes_footer_option(self):
+        """Test that the batch render passes the same report data as the account invoice print."""
+        invoice = self._create_invoice()
+        invoice.action_post()
+        self.env['ir.config_parameter'].sudo().set_param('account.display_name_in_footer', True)
+        report_class = type(self.env['ir.actions.report'])
+
+        def fake_streams(report, report_ref, data, res_ids=None):
+            return {res_id: {'stream': io.BytesIO(b'%PDF-1.4'), 'attachment': None} for res_id in res_ids}
+
+        with patch.object(report_class, '_render_qweb_pdf_prepare_streams', autospec=True, side_effect=fake_streams) as render:
+            invoice._ecosire_render_invoice_pdfs()
+
+        self.assertEqual(render.call_args.args[2], {'display_name_in_footer': True})
+
+    def test_failed_upload_backs_off_then_dead_letters(self):
+        """Test exponential backoff on failure and dead-lettering after max attempts."""
+        self.env['ir.config_parameter'].sudo().set_param('ecosire_fleet_api.upload_max_attempts', 3)
+        invoice = self._create_invoice()
+        invoice.action_post()
+        job = invoice.ecosire_upload_job_id
+        failure = ConnectionError('service unavailable')
+
+        delays = []
+        with self._patch_upload(error=failure):
+            for _attempt in range(2):
+                self._run_jobs()
+                delays.append((job.next_attempt_at - job.last_attempt_at).total_seconds())
+                self.assertEqual(job.state, 'pending')
+            self._run_jobs()
+
+        self.assertEqual(delays, [60, 120])
+        self.assertEqual(job.state, 'dead')
+        self.assertEqual(job.attempt_count, 3)
+        self.assertIn('service unavailable', invoice.ecosire_upload_error)
+
+        job.action_retry()
+        self.assertEqual(job.state, 'pending')
+        self.assertEqual(job.attempt_count, 0)
+
+
+@tagged('post_install', '-at_install')
+class TestInvoiceUploadTransport(AccountTestInvoicingCommon):
+    """Test cases for the pooled, concurrent upload transport against a local stub server."""
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _UploadStubHandler)
+        self.server.connections = set()
+        self.server.bodies = []
+        self.server.delay = 0.2
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('ecosire_fleet_api.upload_base_url', 'http://127.0.0.1:%s' % self.server.server_port)
+        params.set_param('ecosire_fleet_api.upload_concurrency', 4)
+        render = patch.object(
+            type(self.env['account.move']), '_ecosire_render_invoice_pdfs', autospec=True,
+            side_effect=lambda moves: {move.id: b'%PDF-1.4 test' for move in moves},
+        )
+        self.render = render.start()
+        self.addCleanup(render.stop)
+
+    def test_batch_upload_is_parallel_and_connection_bounded(self):
+        """Test that a batch uploads in parallel over at most `upload_concurrency` connections."""
+        invoices = self.env['account.move']
+        for index in range(8):
+            invoice = self.init_invoice('out_invoice', products=self.product_a)
+            invoice.external_order_id = 'EXT-%s' % index
+            invoices |= invoice
+
+        start = time.monotonic()
+        results = invoices._ecosire_upload_invoice_pdfs()
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(set(results), set(invoices.ids))
+        self.assertTrue(all(response.status_code == 200 for response in results.values()))
+        # Serial uploads would take 8 * 0.2s; four parallel connections take about 0.4s.
+        self.assertLess(elapsed, 1.0)
+        self.assertLessEqual(len(self.server.connections), 4)
+
+        # A second batch reuses the pooled keep-alive connections instead of opening new ones.
+        connections = set(self.server.connections)
+        invoices._ecosire_upload_invoice_pdfs()
+        self.assertEqual(len(self.server.bodies), 16)
+        self.assertEqual(self.server.connections, connections)
+
+    def test_unchanged_invoice_reuses_pdf_and_skips_acknowledged_upload(self):
+        """Test that retries reuse the stored PDF and acknowledged PDFs are not re-sent."""
+        invoice = self.init_invoice('out_invoice', products=self.product_a)
+        invoice.external_order_id = 'EXT-910'
+        invoice.action_post()
+        job = invoice.ecosire_upload_job_id
+        move_class = type(self.env['account.move'])
+        self.render.reset_mock()
+
+        with patch(POST_UPLOAD, side_effect=ConnectionError('timeout')):
+            job._process()
+            job._process()
+
+        self.render.assert_called_once()
+        self.assertEqual(job.pdf_file_hash, invoice._ecosire_compute_pdf_hash())
+        self.assertEqual(len(job._get_pdf_attachments()), 1)
+        self.assertEqual(job.attempt_count, 2)
+
+        with patch(POST_UPLOAD, return_value=Mock(status_code=200)) as post:
+            job._process()
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(job.state, 'done')
+        self.assertFalse(job._get_pdf_attachments())
+
+        second_job = self.env['ecosire.invoice.upload.job']._enqueue(invoice)
+        with patch.object(move_class, '_ecosire_render_invoice_pdfs') as render_again, \
+                patch(POST_UPLOAD) as post_again:
+            second_job._process()
+        render_again.assert_not_called()
+        post_again.assert_not_called()
+        self.assertEqual(second_job.state, 'done')
+
+    def test_upload_streams_pdf_from_filestore(self):
+        """Test that the PDF part is read from the attachment file and sent intact."""
+        invoice = self.init_invoice('out_invoice', products=self.product_a)
+        invoice.external_order_id = 'EXT-920'
+        invoice.action_post()
+
+        invoice._ecosire_upload_invoice_pdfs()
+
+        attachment = invoice.ecosire_upload_job_id._get_pdf_attachments()
+        upload = invoice._ecosire_prepare_upload(attachment)
+        self.assertEqual(upload['file']['file_path'], attachment._full_path(attachment.store_fname))
+        self.assertNotIn('file_content', upload['file'])
+        body = self.server.bodies[-1]
+        self.assertIn(b'name="order_id"\r\n\r\nEXT-920\r\n', body)
+        self.assertIn(b'Content-Type: application/pdf\r\n\r\n%PDF-1.4 test\r\n', body)
+
+    def test_multipart_body_is_chunked_and_gzip_round_trips(self):
+        """Test that the multipart body streams bounded chunks and survives gzip encoding."""
+        content = b'%PDF-1.4 ' + b'x' * (3 * _MultipartFileBody.chunk_size)
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as file:
+            file.write(content)
+            file.flush()
+            body = _MultipartFileBody(
+                {'order_id': 'EXT-930'}, file_name='invoice.pdf',
+                content_type='application/pdf', file_path=file.name,
+            )
+            chunks = list(body)
+            compressed = b''.join(_gzip_chunks(body))
+
+        payload = b''.join(chunks)
+        self.assertEqual(len(payload), len(body))
+        self.assertLessEqual(max(len(chunk) for chunk in chunks[1:-1]), _MultipartFileBody.chunk_size)
+        self.assertIn(content, payload)
+        self.assertEqual(gzip.decompress(compressed), payload)
+
+    def test_multipart_headers_escape_quotes_and_line_breaks(self):
+        """Test that quotes and line breaks cannot break out of the part header parameters."""
+        body = _MultipartFileBody(
+            {'order_"id': 'EXT-"940"\r\n'}, file_name='invoice_INV/"1"\r\nX-Injected: 1.pdf',
+            content_type='application/pdf', file_content=b'%PDF-1.4',
+        )
+        head = body.head.decode()
+
+        self.assertIn('name="order_%22id"\r\n\r\nEXT-"940"\r\n', head)
+        self.assertIn('filename="invoice_INV/%221%22%0D%0AX-Injected: 1.pdf"\r\n', head)
+        self.assertNotIn('\r\nX-Injected', head)
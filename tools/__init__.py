@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from . import geo
+from . import assignment
+from . import routing
+from . import ratelimit
+from . import serialization
+from . import tariff
+from . import http_session
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Minimum-cost assignment solver for dispatching orders to vehicles."""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Cost marking a pair that must never be assigned.
+INFEASIBLE = 1e12
+
+
+def _hungarian(cost):
+    """Shortest augmenting path Hungarian algorithm for ``n <= m`` cost matrices.
+
+    Runs in O(n^2 m), with the inner loop over columns vectorized. Returns the
+    assigned column of every row.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)  # p[j]: row (1-based) assigned to column j, 0 if free
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            used_columns = np.flatnonzero(used)
+            u[p[used_columns]] += delta
+            v[used_columns] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    columns = np.zeros(n, dtype=int)
+    for j in range(1, m + 1):
+        if p[j]:
+            columns[p[j] - 1] = j - 1
+    return columns
+
+
+def solve_assignment(cost):
+    """Return the ``(row, column)`` pairs of a minimum-cost assignment of ``cost``.
+
+    ``cost`` may be rectangular; every row of the smaller dimension is assigned.
+    Pairs whose cost is :data:`INFEASIBLE` or more are left out of the result.
+    SciPy's solver is used when available, otherwise a NumPy implementation.
+    """
+    cost = np.asarray(cost, dtype=float)
+    if not cost.size:
+        return []
+    if linear_sum_assignment is not None:
+        rows, columns = linear_sum_assignment(cost)
+    elif cost.shape[0] <= cost.shape[1]:
+        rows = np.arange(cost.shape[0])
+        columns = _hungarian(cost)
+    else:
+        columns = np.arange(cost.shape[1])
+        rows = _hungarian(cost.T)
+    return [
+        (int(row), int(column))
+        for row, column in zip(rows, columns)
+        if cost[row, column] < INFEASIBLE
+    ]
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Geographic helpers for fleet order locations: geohash cells and great-circle distances."""
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {char: index for index, char in enumerate(_BASE32)}
+
+
+def has_coordinates(lat, lng):
+    """Return whether a lat/lng pair is set (unset Float fields read as 0.0)."""
+    return bool(lat or lng)
+
+
+def geohash_encode(lat, lng, precision=9):
+    """Return the geohash of ``(lat, lng)`` with ``precision`` characters."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value_range, value = (lng_range, lng) if even else (lat_range, lat)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash):
+    """Return ``(lat_min, lat_max, lng_min, lng_max)`` of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            value_range = lng_range if even else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if bits >> shift & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def geohash_cell_size(precision):
+    """Return the ``(lat_span, lng_span)`` in degrees of cells of ``precision`` characters."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def _nearest_lng(lng, lng_min, lng_max):
+    """Return the edge of ``[lng_min, lng_max]`` closest to ``lng``, across the antimeridian."""
+    to_min = abs((lng - lng_min + 180.0) % 360.0 - 180.0)
+    to_max = abs((lng - lng_max + 180.0) % 360.0 - 180.0)
+    return lng_min if to_min <= to_max else lng_max
+
+
+def distance_to_cell_km(lat, lng, lat_min, lat_max, lng_min, lng_max):
+    """Return the great-circle distance from ``(lat, lng)`` to the nearest point of a lat/lng cell."""
+    if lng_min <= lng <= lng_max:
+        return haversine_km(lat, lng, min(max(lat, lat_min), lat_max), lng)
+    edge_lng = _nearest_lng(lng, lng_min, lng_max)
+    d_lambda = math.radians((edge_lng - lng + 180.0) % 360.0 - 180.0)
+    if abs(d_lambda) >= math.pi / 2:
+        return 0.0
+    # The point of a meridian nearest to (lat, lng) lies poleward of lat.
+    nearest_lat = math.degrees(math.atan2(math.tan(math.radians(lat)), math.cos(d_lambda)))
+    return haversine_km(lat, lng, min(max(nearest_lat, lat_min), lat_max), edge_lng)
+
+
+def geohash_cover(lat, lng, radius_km, max_precision=9, max_cells=32):
+    """Return the geohash prefixes covering a circle of ``radius_km`` around ``(lat, lng)``.
+
+    The bounding box of the circle is tiled with the finest cells (up to
+    ``max_precision`` characters) of which at most ``max_cells`` touch the
+    circle; cells that do not touch it are left out. The prefixes then cover a
+    small multiple of the circle's area, whatever the radius.
+    """
+    lat_radius = radius_km / 110.574
+    lat_low, lat_high = max(lat - lat_radius, -90.0), min(lat + lat_radius, 90.0)
+    # Longitude degrees are shortest at the bounding box latitude furthest from the equator.
+    cos_lat = math.cos(math.radians(max(abs(lat_low), abs(lat_high))))
+    if cos_lat < 1e-6:
+        # The circle contains a pole: it spans every longitude.
+        lng_radius = 180.0
+    else:
+        lng_radius = min(radius_km / (111.320 * cos_lat), 180.0)
+    for precision in range(max_precision, 0, -1):
+        lat_span, lng_span = geohash_cell_size(precision)
+        row_count, column_count = round(180.0 / lat_span), round(360.0 / lng_span)
+        rows = range(
+            int((lat_low + 90.0) // lat_span), min(int((lat_high + 90.0) // lat_span), row_count - 1) + 1
+        )
+        first_column = int((lng - lng_radius + 180.0) // lng_span)
+        last_column = min(int((lng + lng_radius + 180.0) // lng_span), first_column + column_count - 1)
+        columns = range(first_column, last_column + 1)
+        # A circle touches at least about pi/4 of the cells of its bounding box.
+        if len(rows) * len(columns) > 2 * max_cells:
+            continue
+        cells = set()
+        for row in rows:
+            cell_lat_min = -90.0 + row * lat_span
+            for column in columns:
+                cell_lng_min = -180.0 + (column % column_count) * lng_span
+                bounds = (cell_lat_min, cell_lat_min + lat_span, cell_lng_min, cell_lng_min + lng_span)
+                if distance_to_cell_km(lat, lng, *bounds) <= radius_km:
+                    cells.add(geohash_encode(cell_lat_min + lat_span / 2, cell_lng_min + lng_span / 2, precision))
+        if len(cells) <= max_cells:
+            return sorted(cells)
+    return sorted(_BASE32)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Return the great-circle distance in kilometres between two points."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_km_array(lat1, lng1, lat2, lng2):
+    """Vectorized :func:`haversine_km` over array-likes of coordinates (broadcasting)."""
+    phi1 = np.radians(np.asarray(lat1, dtype=float))
+    phi2 = np.radians(np.asarray(lat2, dtype=float))
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.asarray(lng2, dtype=float) - np.asarray(lng1, dtype=float))
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def leg_distances_km(lat1, lng1, lat2, lng2):
+    """Return leg distances between two coordinate arrays, ``0.0`` where either end is unset."""
+    lat1, lng1, lat2, lng2 = (np.asarray(values, dtype=float) for values in (lat1, lng1, lat2, lng2))
+    distances = haversine_km_array(lat1, lng1, lat2, lng2)
+    is_set = ((lat1 != 0) | (lng1 != 0)) & ((lat2 != 0) | (lng2 != 0))
+    return np.where(is_set, distances, 0.0)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Process-wide pooled HTTP sessions for the calls to external services."""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Hosts whose connection pools a session keeps at once (upload and trip services, with room to spare).
+POOLED_HOSTS = 10
+
+_http_session_lock = threading.Lock()
+_http_sessions = {}
+
+
+def get_http_session(pool_size):
+    """Return the worker's shared HTTP session for ``pool_size`` connections per host.
+
+    Sessions are kept per process and pool size so keep-alive connections are
+    reused across requests, with at most ``pool_size`` connections per host. The
+    pools of up to ``POOLED_HOSTS`` hosts are kept side by side, so callers of
+    different services do not evict each other's connections.
+    """
+    key = (os.getpid(), pool_size)
+    session = _http_sessions.get(key)
+    if session is None:
+        with _http_session_lock:
+            session = _http_sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOLED_HOSTS, pool_maxsize=pool_size, pool_block=True)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_sessions[key] = session
+    return session
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Thread-safe token bucket limiting the request rate towards external services."""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second on average, with bursts of up to ``capacity``.
+
+    ``acquire`` blocks the calling thread until a token is available, so worker
+    threads sharing a bucket are collectively held to the rate.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1.0))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` if available right now and return whether they were taken."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available, take them and return the time waited."""
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than the bucket capacity")
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Stop sequencing heuristics for a driver's route: nearest insertion followed by 2-opt."""
+
+import numpy as np
+
+
+def _insert_nearest(dist, chains, start):
+    """Build a route by repeatedly inserting the nearest stop whose predecessor is routed.
+
+    Each stop is inserted at its cheapest position after its predecessor, so the
+    order of every chain is kept.
+    """
+    predecessor = {}
+    successor = {}
+    for chain in chains:
+        for previous, node in zip(chain, chain[1:]):
+            predecessor[node] = previous
+            successor[previous] = node
+    available = [chain[0] for chain in chains if chain]
+    route = [] if start is None else [start]
+    while available:
+        if route:
+            candidates = dist[np.ix_(available, route)].min(axis=1)
+            node = available.pop(int(np.argmin(candidates)))
+        else:
+            node = available.pop(0)
+        first_position = route.index(predecessor[node]) + 1 if node in predecessor else (1 if start is not None else 0)
+        costs = []
+        for position in range(first_position, len(route) + 1):
+            before = route[position - 1] if position > 0 else None
+            after = route[position] if position < len(route) else None
+            cost = 0.0
+            if before is not None:
+                cost += dist[before, node]
+            if after is not None:
+                cost += dist[node, after]
+            if before is not None and after is not None:
+                cost -= dist[before, after]
+            costs.append(cost)
+        route.insert(first_position + int(np.argmin(costs)) if costs else len(route), node)
+        if node in successor:
+            available.append(successor[node])
+    return route
+
+
+def _two_opt(route, dist, chain_of, fixed_start, max_passes):
+    """Improve an open route with 2-opt moves that keep every chain's order.
+
+    Reversing a segment flips the order of its stops, so segments holding two
+    stops of the same chain are skipped.
+    """
+    d = dist.tolist()
+    n = len(route)
+    first = 1 if fixed_start else 0
+    for _pass in range(max_passes):
+        improved = False
+        for i in range(first, n - 1):
+            seen = {chain_of[route[i]]}
+            for j in range(i + 1, n):
+                chain = chain_of[route[j]]
+                if chain in seen:
+                    break
+                seen.add(chain)
+                delta = 0.0
+                if i > 0:
+                    delta += d[route[i - 1]][route[j]] - d[route[i - 1]][route[i]]
+                if j < n - 1:
+                    delta += d[route[i]][route[j + 1]] - d[route[j]][route[j + 1]]
+                if delta < -1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    improved = True
+                    seen = {chain_of[node] for node in route[i:j + 1]}
+        if not improved:
+            break
+    return route
+
+
+def plan_route(dist, chains, start=None, max_passes=20):
+    """Sequence stops so that each chain is visited in order, keeping the route short.
+
+    ``dist`` is a square matrix of distances between nodes, ``chains`` a list of
+    node lists whose order must be respected (e.g. pickup, drop-off, empty
+    return of one order) and ``start`` an optional node the route starts from.
+
+    Returns ``(stops, total_distance)`` where ``stops`` excludes ``start``.
+    """
+    dist = np.asarray(dist, dtype=float)
+    chain_of = {node: index for index, chain in enumerate(chains) for node in chain}
+    if start is not None:
+        chain_of[start] = -1
+    route = _insert_nearest(dist, chains, start)
+    route = _two_opt(route, dist, chain_of, start is not None, max_passes)
+    total = float(sum(dist[a, b] for a, b in zip(route, route[1:])))
+    return (route[1:] if start is not None else route), total
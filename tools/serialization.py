@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Compiled record serializers producing plain JSON-ready dicts for external payloads."""
+
+import weakref
+
+
+_serializers = weakref.WeakKeyDictionary()
+
+
+def _convert_value(field):
+    """Return the function turning a value of ``field`` into its JSON representation."""
+    if field.type == "many2one":
+        return lambda value: value.id or None
+    if field.type in ("date", "datetime"):
+        return lambda value: value.isoformat() if value else None
+    if field.type == "boolean":
+        return bool
+    if field.type in ("integer", "float", "monetary", "json"):
+        return lambda value: value
+    return lambda value: value or None
+
+
+def _compile_path(model, path):
+    """Return ``(getter, converter, field names to prefetch)`` of the dotted field ``path``."""
+    names = path.split(".")
+    current = model
+    for name in names[:-1]:
+        field = current._fields[name]
+        if field.type != "many2one":
+            raise ValueError(f"{path}: only many2one fields can be traversed, not {field.type} {name!r}")
+        current = model.env[field.comodel_name]
+    field = current._fields[names[-1]]
+    convert = _convert_value(field)
+    if len(names) == 1:
+        name = names[0]
+        return (lambda record: record[name]), convert, name
+    def getter(record):
+        for name in names:
+            record = record[name]
+        return record
+    return getter, convert, names[0]
+
+
+def compile_serializer(model, spec):
+    """Return a function serializing records of ``model`` into a list of dicts.
+
+    ``spec`` is a tuple of ``(key, field path)`` pairs, where a path may follow
+    many2one fields (``"vehicle_id.license_plate"``). Field lookups and value
+    converters are resolved once per model class and spec, so serializing a
+    batch only runs the precomputed getters; the top-level fields are fetched in
+    one query and related records rely on the ORM prefetching.
+    """
+    cache = _serializers.setdefault(type(model), {})
+    serializer = cache.get(spec)
+    if serializer is None:
+        compiled = [(key, *_compile_path(model, path)) for key, path in spec]
+        fetch_names = sorted({name for _key, _getter, _convert, name in compiled if name != "id"})
+
+        def serializer(records):
+            records.fetch(fetch_names)
+            return [
+                {key: convert(getter(record)) for key, getter, convert, _name in compiled}
+                for record in records
+            ]
+
+        cache[spec] = serializer
+    return serializer
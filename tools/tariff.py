@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Array-backed tariff grids pricing many orders at once."""
+
+import numpy as np
+
+
+class TariffTable:
+    """Read-only grid of fare rates over distance brackets x weight brackets.
+
+    Built from rows ``(distance_from_km, weight_from_kg, base_amount,
+    price_per_km, price_per_ton)``; a row applies from its lower bounds up to the
+    next brackets. Cells without a row inherit the rates of the bracket below
+    (lighter weight first, then shorter distance), so a tariff only needs to list
+    the brackets where rates change.
+    """
+
+    __slots__ = ("distance_breaks", "weight_breaks", "rates", "minimum")
+
+    def __init__(self, rows, minimum=0.0):
+        rows = np.asarray(list(rows), dtype=float).reshape(-1, 5)
+        self.distance_breaks = np.unique(rows[:, 0])
+        self.weight_breaks = np.unique(rows[:, 1])
+        rates = np.full((len(self.distance_breaks), len(self.weight_breaks), 3), np.nan)
+        rows_d = np.searchsorted(self.distance_breaks, rows[:, 0])
+        rows_w = np.searchsorted(self.weight_breaks, rows[:, 1])
+        rates[rows_d, rows_w] = rows[:, 2:]
+        for j in range(1, rates.shape[1]):
+            missing = np.isnan(rates[:, j, 0])
+            rates[missing, j] = rates[missing, j - 1]
+        for i in range(1, rates.shape[0]):
+            missing = np.isnan(rates[i, :, 0])
+            rates[i, missing] = rates[i - 1, missing]
+        rates.setflags(write=False)
+        self.rates = rates
+        self.minimum = float(minimum or 0.0)
+
+    def price(self, distances_km, weights_kg):
+        """Return the fares of the ``distances_km``/``weights_kg`` pairs, NaN where no bracket applies.
+
+        Scalars are priced as one-element arrays.
+        """
+        distances = np.maximum(np.atleast_1d(np.asarray(distances_km, dtype=float)), 0.0)
+        weights = np.maximum(np.atleast_1d(np.asarray(weights_kg, dtype=float)), 0.0)
+        if not self.rates.size:
+            return np.full(distances.shape, np.nan)
+        i = np.searchsorted(self.distance_breaks, distances, side="right") - 1
+        j = np.searchsorted(self.weight_breaks, weights, side="right") - 1
+        valid = (i >= 0) & (j >= 0)
+        cells = self.rates[np.maximum(i, 0), np.maximum(j, 0)]
+        fares = cells[..., 0] + cells[..., 1] * distances + cells[..., 2] * weights / 1000.0
+        fares = np.maximum(fares, self.minimum)
+        fares[~valid] = np.nan
+        return fares